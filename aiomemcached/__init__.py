@@ -20,6 +20,18 @@ Usage example::
 """
 
 from .client import Client
+from .binary import BinaryClient
+from .distributed import DistributedClient
+from .nearcache import NearCache
+from .compression import Compressor
+from .serialization import Serializer
+from .metrics import Metrics
+from .hooks import CommandHook, CommandEvent
+from .slowlog import SlowLog
+from .replay import TrafficRecorder, Replayer
+from .meta import MetaResponse
+from .lease import Lease
+from .streaming import ValueStream
 from .exceptions import (
     ClientException,
     ValidationException,
@@ -30,6 +42,20 @@ from .exceptions import (
 
 __all__ = (
     "Client",
+    "BinaryClient",
+    "DistributedClient",
+    "NearCache",
+    "Compressor",
+    "Serializer",
+    "Metrics",
+    "CommandHook",
+    "CommandEvent",
+    "SlowLog",
+    "TrafficRecorder",
+    "Replayer",
+    "MetaResponse",
+    "Lease",
+    "ValueStream",
     "ClientException",
     "ValidationException",
     "ResponseException",
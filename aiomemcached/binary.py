@@ -0,0 +1,711 @@
+import asyncio
+import functools
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .buffered import BufferedConnection, readinto
+from .client import Client
+from .constants import DEFAULT_BULK_BATCH_SIZE
+from .exceptions import ResponseException, ValidationException
+from .pool import MemcachedConnection
+
+"""
+Ref:
+- https://github.com/memcached/memcached/wiki/BinaryProtocolRevamped
+"""
+
+__all__ = ["BinaryClient"]
+
+REQUEST_MAGIC = 0x80
+RESPONSE_MAGIC = 0x81
+
+OP_GET = 0x00
+OP_SET = 0x01
+OP_ADD = 0x02
+OP_REPLACE = 0x03
+OP_DELETE = 0x04
+OP_INCREMENT = 0x05
+OP_DECREMENT = 0x06
+OP_FLUSH = 0x08
+OP_NOOP = 0x0A
+OP_VERSION = 0x0B
+OP_GETKQ = 0x0D
+OP_APPEND = 0x0E
+OP_PREPEND = 0x0F
+OP_STAT = 0x10
+OP_SETQ = 0x11
+OP_ADDQ = 0x12
+OP_REPLACEQ = 0x13
+OP_DELETEQ = 0x14
+OP_INCREMENTQ = 0x15
+OP_DECREMENTQ = 0x16
+OP_APPENDQ = 0x19
+OP_PREPENDQ = 0x1A
+OP_TOUCH = 0x1C
+
+STATUS_NO_ERROR = 0x00
+STATUS_KEY_NOT_FOUND = 0x01
+STATUS_KEY_EXISTS = 0x02
+STATUS_ITEM_NOT_STORED = 0x05
+
+# magic, opcode, key length, extras length, data type, vbucket id (request) or
+# status (response), total body length, opaque, cas
+_HEADER = struct.Struct("!BBHBBHIIQ")
+_FLAGS = struct.Struct("!I")
+_EXPTIME = struct.Struct("!I")
+_STORAGE_EXTRAS = struct.Struct("!II")  # flags, exptime
+_COUNTER_EXTRAS = struct.Struct("!QQI")  # delta, initial value, exptime
+_COUNTER = struct.Struct("!Q")
+
+# smaller bodies are read in one go, then sliced
+_SPLIT_READ_SIZE = 64 * 1024
+
+# the exptime of incr/decr extras: fail on a missing counter, as the text protocol
+_COUNTER_NO_CREATE = 0xFFFFFFFF
+
+# cmd -> (opcode, quiet opcode)
+_STORAGE_OPCODES = {
+    b"set": (OP_SET, OP_SETQ),
+    b"add": (OP_ADD, OP_ADDQ),
+    b"replace": (OP_REPLACE, OP_REPLACEQ),
+    b"append": (OP_APPEND, OP_APPENDQ),
+    b"prepend": (OP_PREPEND, OP_PREPENDQ),
+    b"cas": (OP_SET, OP_SETQ),
+}
+_STORAGE_FAILURES = (STATUS_KEY_NOT_FOUND, STATUS_KEY_EXISTS, STATUS_ITEM_NOT_STORED)
+
+# opcode -> the name of the text command, see Metrics
+_COMMAND_NAMES = {
+    OP_GET: b"get",
+    OP_GETKQ: b"get",
+    OP_SET: b"set",
+    OP_SETQ: b"set",
+    OP_ADD: b"add",
+    OP_ADDQ: b"add",
+    OP_REPLACE: b"replace",
+    OP_REPLACEQ: b"replace",
+    OP_APPEND: b"append",
+    OP_APPENDQ: b"append",
+    OP_PREPEND: b"prepend",
+    OP_PREPENDQ: b"prepend",
+    OP_DELETE: b"delete",
+    OP_DELETEQ: b"delete",
+    OP_INCREMENT: b"incr",
+    OP_INCREMENTQ: b"incr",
+    OP_DECREMENT: b"decr",
+    OP_DECREMENTQ: b"decr",
+    OP_TOUCH: b"touch",
+    OP_STAT: b"stats",
+    OP_VERSION: b"version",
+    OP_FLUSH: b"flush_all",
+    OP_NOOP: b"noop",
+}
+
+
+def pack_request(
+    opcode: int,
+    key: bytes = b"",
+    extras: bytes = b"",
+    value: bytes = b"",
+    opaque: int = 0,
+    cas: int = 0,
+) -> bytes:
+    header = _HEADER.pack(
+        REQUEST_MAGIC,
+        opcode,
+        len(key),
+        len(extras),
+        0,
+        0,
+        len(extras) + len(key) + len(value),
+        opaque,
+        cas,
+    )
+    return b"".join((header, extras, key, value))
+
+
+_NOOP_REQUEST = pack_request(OP_NOOP)
+
+
+class BinaryResponse:
+    __slots__ = ("opcode", "status", "opaque", "cas", "extras", "key", "value")
+
+    def __init__(self, opcode, status, opaque, cas, extras, key, value=None):
+        self.opcode = opcode
+        self.status = status
+        self.opaque = opaque
+        self.cas = cas
+        self.extras = extras
+        self.key = key
+        self.value = value
+
+    def unexpected(self) -> ResponseException:
+        return ResponseException(
+            "opcode 0x{:02x}".format(self.opcode),
+            "status 0x{:02x} {!r}".format(self.status, self.value),
+        )
+
+
+async def _read_response_head(
+    reader: asyncio.StreamReader, read_value: bool = False
+) -> (BinaryResponse, int):
+    """Reads a response up to its value, returns it and the value length.
+
+    read_value: reads the value too when the body is small, in one go.
+    """
+    header = await reader.readexactly(_HEADER.size)
+    (
+        magic,
+        opcode,
+        key_len,
+        extras_len,
+        _,
+        status,
+        body_len,
+        opaque,
+        cas,
+    ) = _HEADER.unpack(header)
+    if magic != RESPONSE_MAGIC:
+        raise ResponseException("binary protocol", header)
+
+    key_end = extras_len + key_len
+    if read_value and body_len <= _SPLIT_READ_SIZE:
+        body = await reader.readexactly(body_len)
+        response = BinaryResponse(
+            opcode,
+            status,
+            opaque,
+            cas,
+            body[:extras_len],
+            body[extras_len:key_end],
+            body[key_end:],
+        )
+        return response, 0
+
+    extras = key = b""
+    if key_end:
+        data = await reader.readexactly(key_end)
+        extras, key = data[:extras_len], data[extras_len:]
+
+    response = BinaryResponse(opcode, status, opaque, cas, extras, key)
+    return response, body_len - key_end
+
+
+async def read_binary_response(
+    reader: asyncio.StreamReader, as_memoryview: bool = False
+) -> BinaryResponse:
+    response, value_len = await _read_response_head(reader, not as_memoryview)
+    if response.value is not None:
+        return response
+
+    if as_memoryview and value_len:
+        response.value = memoryview(bytearray(value_len))
+        await readinto(reader, response.value)
+    else:
+        response.value = await reader.readexactly(value_len)
+
+    return response
+
+
+async def read_binary_until_noop(
+    reader: asyncio.StreamReader,
+    count: Optional[int] = None,
+    as_memoryview: bool = False,
+) -> List[BinaryResponse]:
+    """Reads the responses of (up to count) quiet commands, up to the response
+    of their trailing noop.
+    """
+    responses = []
+    while True:
+        response = await read_binary_response(reader, as_memoryview)
+        if response.opcode == OP_NOOP:
+            return responses
+
+        responses.append(response)
+        if count is not None and len(responses) > count:
+            raise ResponseException(
+                "noop", response.key, ext_message="received too many responses"
+            )
+
+
+async def read_binary_responses(
+    reader: asyncio.StreamReader, count: int
+) -> List[BinaryResponse]:
+    return [await read_binary_response(reader) for _ in range(count)]
+
+
+async def read_binary_stats(reader: asyncio.StreamReader) -> Dict[bytes, bytes]:
+    """One response per stat, up to a response without key."""
+    result = {}
+    while True:
+        response = await read_binary_response(reader)
+        if response.status != STATUS_NO_ERROR:
+            raise response.unexpected()
+        if not response.key:
+            return result
+
+        result[response.key] = response.value
+
+
+class BinaryConnection(MemcachedConnection):
+    noreply_sync_cmd = _NOOP_REQUEST
+
+
+class BinaryBufferedConnection(BufferedConnection):
+    noreply_sync_cmd = _NOOP_REQUEST
+
+
+class BinaryClient(Client):
+    """Client over the memcached binary protocol, same API as Client.
+
+    Requests are packed behind fixed 24 bytes headers, multi-key commands
+    are batches of quiet commands (GetKQ, SetQ, DeleteQ, ...) ended by a
+    Noop: the server only answers the hits, or the failures, and the Noop.
+    The responses are matched to their keys by opaque.
+
+    noreply commands use the quiet opcodes (touch has none, its response is
+    skipped with the errors of the quiet commands).
+
+    The meta commands are only available with the text protocol, they raise
+    ValidationException.
+    """
+
+    _connection_class = BinaryConnection
+    _buffered_connection_class = BinaryBufferedConnection
+    _lease_meta = False
+
+    @staticmethod
+    async def _read_after_noreply_errors(read_response, reader: asyncio.StreamReader):
+        await read_binary_until_noop(reader)
+        return await read_response(reader)
+
+    @staticmethod
+    def _command_name(cmd: bytes) -> bytes:
+        """The opcode of the first request, the command of a batch."""
+        return _COMMAND_NAMES.get(cmd[1], b"0x%02x" % cmd[1])
+
+    async def _execute_binary_cmd(
+        self, packet: bytes, noreply: bool = False, keys: Sequence[bytes] = ()
+    ) -> Optional[BinaryResponse]:
+        return await self._execute_raw_cmd(
+            cmd=packet, read_response=read_binary_response, noreply=noreply, keys=keys
+        )
+
+    @staticmethod
+    def _opaque_key(keys: List[bytes], response: BinaryResponse) -> bytes:
+        try:
+            return keys[response.opaque]
+
+        except IndexError:
+            raise ResponseException(
+                "opaque", response.opaque, ext_message="unexpected opaque"
+            )
+
+    async def _storage_command(
+        self,
+        cmd: bytes,
+        key: bytes,
+        value: bytes,
+        flags: int = 0,
+        exptime: int = 0,
+        cas: int = None,
+        noreply: bool = False,
+    ) -> Optional[bool]:
+        self.validate_key(key)
+        self.validate_value(value)
+
+        if flags < 0 or exptime < 0:
+            raise ValidationException(
+                "flags:[{}] and exptime:[{}] must be unsigned integer"
+                "".format(flags, exptime)
+            )
+
+        opcode, quiet_opcode = _STORAGE_OPCODES[cmd]
+        extras = b""
+        if cmd not in (b"append", b"prepend"):
+            extras = _STORAGE_EXTRAS.pack(flags, exptime)
+
+        packet = pack_request(
+            quiet_opcode if noreply else opcode, key, extras, value, cas=cas or 0
+        )
+        response = await self._execute_binary_cmd(packet, noreply=noreply, keys=(key,))
+        self._key_written(key)
+        if noreply:
+            return None
+
+        if response.status == STATUS_NO_ERROR:
+            if self._near_cache is not None and cmd in (b"set", b"cas"):
+                self._near_cache.update(key, value, flags=flags, exptime=exptime)
+            return True
+
+        elif response.status in _STORAGE_FAILURES:
+            return False
+
+        raise response.unexpected()
+
+    async def _storage_many(
+        self,
+        cmd: bytes,
+        items,
+        flags: int = 0,
+        exptime: int = 0,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        concurrency: Optional[int] = None,
+        encode: bool = True,
+    ) -> Dict[bytes, bool]:
+        if isinstance(items, dict):
+            items = items.items()
+
+        if flags < 0 or exptime < 0:
+            raise ValidationException(
+                "flags:[{}] and exptime:[{}] must be unsigned integer"
+                "".format(flags, exptime)
+            )
+
+        _, quiet_opcode = _STORAGE_OPCODES[cmd]
+        extras = _STORAGE_EXTRAS.pack(flags, exptime)
+
+        items = list(items)
+        for key, _ in items:
+            self.validate_key(key)
+
+        encoded = [(value, flags) for _, value in items]
+        if encode:
+            encoded = await self._encode_many(encoded)
+
+        keys, values, items_flags, packets = [], [], [], []
+        for (key, _), (value, item_flags) in zip(items, encoded):
+            self.validate_value(value)
+
+            item_extras = extras
+            if item_flags != flags:
+                item_extras = _STORAGE_EXTRAS.pack(item_flags, exptime)
+            packets.append(
+                pack_request(quiet_opcode, key, item_extras, value, opaque=len(keys))
+            )
+            keys.append(key)
+            values.append(value)
+            items_flags.append(item_flags)
+
+        failures = await self._execute_many(
+            packets,
+            batch_size,
+            concurrency,
+            read_batch=read_binary_until_noop,
+            terminator=_NOOP_REQUEST,
+            keys=keys,
+        )
+
+        result = dict.fromkeys(keys, True)
+        error = None
+        for response in failures:
+            key = self._opaque_key(keys, response)
+            if response.status in _STORAGE_FAILURES:
+                result[key] = False
+            else:
+                del result[key]
+                if error is None:
+                    error = response.unexpected()
+
+        for key, value, item_flags in zip(keys, values, items_flags):
+            self._key_written(key)
+            if self._near_cache is not None and cmd == b"set" and result.get(key):
+                self._near_cache.update(key, value, flags=item_flags, exptime=exptime)
+
+        if error is not None:
+            error.results = result
+            raise error
+
+        return result
+
+    async def _retrieval_command(
+        self, keys: List[bytes], with_cas: bool = False
+    ) -> (Dict[bytes, bytes], Dict[bytes, Dict[bytes, Optional[int]]]):
+        [self.validate_key(key) for key in keys]
+
+        if len(keys) == 1:
+            # a plain get answers a miss too, no need for a trailing noop
+            response = await self._execute_raw_cmd(
+                cmd=pack_request(OP_GET, keys[0]),
+                read_response=functools.partial(
+                    read_binary_response, as_memoryview=self._memoryview_values
+                ),
+                keys=keys,
+            )
+            responses = [] if response.status == STATUS_KEY_NOT_FOUND else [response]
+        else:
+            packet = b"".join(
+                pack_request(OP_GETKQ, key, opaque=i) for i, key in enumerate(keys)
+            )
+            responses = await self._execute_raw_cmd(
+                cmd=packet + _NOOP_REQUEST,
+                read_response=functools.partial(
+                    read_binary_until_noop,
+                    count=len(keys),
+                    as_memoryview=self._memoryview_values,
+                ),
+                keys=keys,
+            )
+
+        values = {}
+        info = {}
+        for response in responses:
+            if response.status != STATUS_NO_ERROR:
+                raise response.unexpected()
+
+            key = self._opaque_key(keys, response)
+            if key in values:
+                raise ResponseException(
+                    "getkq", key, ext_message="Duplicate results from server"
+                )
+
+            values[key] = response.value
+            info[key] = {
+                "flags": _FLAGS.unpack(response.extras)[0],
+                "cas": response.cas if with_cas else None,
+            }
+
+        if self._metrics is not None:
+            self._metrics.record_retrieval(len(keys), len(values))
+        return values, info
+
+    async def _get_into(
+        self, key: bytes, buffer: memoryview
+    ) -> (Optional[int], Dict[bytes, Optional[int]]):
+        self.validate_key(key)
+
+        data_len, info = await self._execute_raw_cmd(
+            cmd=pack_request(OP_GET, key),
+            read_response=functools.partial(self._read_binary_into, buffer=buffer),
+            keys=(key,),
+        )
+        if self._metrics is not None:
+            self._metrics.record_retrieval(1, data_len is not None)
+        if data_len is not None and data_len > len(buffer):
+            raise ValidationException(
+                "A value of {} bytes does not fit the {} bytes buffer".format(
+                    data_len, len(buffer)
+                )
+            )
+
+        return data_len, info
+
+    @staticmethod
+    async def _read_binary_into(
+        reader: asyncio.StreamReader, buffer: memoryview
+    ) -> (Optional[int], Dict[bytes, Optional[int]]):
+        response, value_len = await _read_response_head(reader)
+        if response.status != STATUS_NO_ERROR or value_len > len(buffer):
+            response.value = await reader.readexactly(value_len)
+            if response.status == STATUS_KEY_NOT_FOUND:
+                return None, dict()
+            if response.status != STATUS_NO_ERROR:
+                raise response.unexpected()
+
+        else:
+            await readinto(reader, buffer[:value_len])
+
+        return value_len, {"flags": _FLAGS.unpack(response.extras)[0], "cas": None}
+
+    @staticmethod
+    def _stream_cmd(key: bytes) -> bytes:
+        return pack_request(OP_GET, key)
+
+    @staticmethod
+    async def _read_stream_head(
+        reader: asyncio.StreamReader, raw_cmd: bytes
+    ) -> Optional[Tuple[int, Dict[bytes, Optional[int]]]]:
+        response, value_len = await _read_response_head(reader)
+        if response.status != STATUS_NO_ERROR:
+            response.value = await reader.readexactly(value_len)
+            if response.status == STATUS_KEY_NOT_FOUND:
+                return None
+            raise response.unexpected()
+
+        return value_len, {"flags": _FLAGS.unpack(response.extras)[0], "cas": None}
+
+    @staticmethod
+    async def _read_stream_trailer(reader: asyncio.StreamReader, raw_cmd: bytes):
+        """The value is the end of the response."""
+
+    async def delete(self, key: bytes, noreply: bool = False) -> Optional[bool]:
+        self.validate_key(key)
+
+        packet = pack_request(OP_DELETEQ if noreply else OP_DELETE, key)
+        response = await self._execute_binary_cmd(packet, noreply=noreply, keys=(key,))
+        self._key_written(key)
+        if noreply:
+            return None
+
+        if response.status == STATUS_NO_ERROR:
+            return True
+
+        elif response.status == STATUS_KEY_NOT_FOUND:
+            return False
+
+        raise response.unexpected()
+
+    async def delete_many(
+        self,
+        keys,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        concurrency: Optional[int] = None,
+    ) -> Dict[bytes, bool]:
+        keys = list(keys)
+        [self.validate_key(key) for key in keys]
+
+        packets = [
+            pack_request(OP_DELETEQ, key, opaque=i) for i, key in enumerate(keys)
+        ]
+        failures = await self._execute_many(
+            packets,
+            batch_size,
+            concurrency,
+            read_batch=read_binary_until_noop,
+            terminator=_NOOP_REQUEST,
+            keys=keys,
+        )
+
+        result = dict.fromkeys(keys, True)
+        error = None
+        for response in failures:
+            key = self._opaque_key(keys, response)
+            if response.status == STATUS_KEY_NOT_FOUND:
+                result[key] = False
+            else:
+                del result[key]
+                if error is None:
+                    error = response.unexpected()
+
+        for key in keys:
+            self._key_written(key)
+
+        if error is not None:
+            error.results = result
+            raise error
+
+        return result
+
+    async def _incr_decr(
+        self, cmd: bytes, key: bytes, value: int, noreply: bool = False
+    ) -> Optional[int]:
+        self.validate_key(key)
+
+        if value < 0 or not isinstance(value, int):
+            raise ValidationException(
+                "value:[{}]  must be unsigned integer".format(value)
+            )
+
+        if cmd == b"incr":
+            opcode = OP_INCREMENTQ if noreply else OP_INCREMENT
+        else:
+            opcode = OP_DECREMENTQ if noreply else OP_DECREMENT
+
+        extras = _COUNTER_EXTRAS.pack(value, 0, _COUNTER_NO_CREATE)
+        response = await self._execute_binary_cmd(
+            pack_request(opcode, key, extras), noreply=noreply, keys=(key,)
+        )
+        self._key_written(key)
+        if noreply:
+            return None
+
+        if response.status == STATUS_NO_ERROR:
+            return _COUNTER.unpack(response.value)[0]
+
+        elif response.status == STATUS_KEY_NOT_FOUND:
+            return None
+
+        raise response.unexpected()
+
+    async def touch(
+        self, key: bytes, exptime: int, noreply: bool = False
+    ) -> Optional[bool]:
+        self.validate_key(key)
+        self._validate_exptime(exptime)
+
+        packet = pack_request(OP_TOUCH, key, _EXPTIME.pack(exptime))
+        response = await self._execute_binary_cmd(packet, noreply=noreply, keys=(key,))
+        self._key_written(key)
+        if noreply:
+            return None
+
+        if response.status == STATUS_NO_ERROR:
+            return True
+
+        elif response.status == STATUS_KEY_NOT_FOUND:
+            return False
+
+        raise response.unexpected()
+
+    async def touch_many(
+        self,
+        keys,
+        exptime: int,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        concurrency: Optional[int] = None,
+    ) -> Dict[bytes, bool]:
+        """touch has no quiet opcode, every key gets its response."""
+        keys = list(keys)
+        [self.validate_key(key) for key in keys]
+        self._validate_exptime(exptime)
+
+        extras = _EXPTIME.pack(exptime)
+        packets = [
+            pack_request(OP_TOUCH, key, extras, opaque=i) for i, key in enumerate(keys)
+        ]
+        responses = await self._execute_many(
+            packets,
+            batch_size,
+            concurrency,
+            read_batch=read_binary_responses,
+            keys=keys,
+        )
+
+        result = {}
+        error = None
+        for response in responses:
+            if response.status in (STATUS_NO_ERROR, STATUS_KEY_NOT_FOUND):
+                result[self._opaque_key(keys, response)] = (
+                    response.status == STATUS_NO_ERROR
+                )
+            elif error is None:
+                error = response.unexpected()
+
+        for key in keys:
+            self._key_written(key)
+
+        if error is not None:
+            error.results = result
+            raise error
+
+        return result
+
+    async def stats(self, args: bytes = None) -> dict:
+        return await self._execute_raw_cmd(
+            cmd=pack_request(OP_STAT, args or b""), read_response=read_binary_stats
+        )
+
+    async def version(self) -> bytes:
+        response = await self._execute_binary_cmd(pack_request(OP_VERSION))
+        if response.status != STATUS_NO_ERROR:
+            raise response.unexpected()
+
+        return response.value
+
+    async def flush_all(self) -> bool:
+        response = await self._execute_binary_cmd(pack_request(OP_FLUSH))
+        if self._near_cache is not None:
+            self._near_cache.clear()
+        if response.status != STATUS_NO_ERROR:
+            raise response.unexpected()
+
+        return True
+
+    async def _meta_command(self, *args, **kwargs):
+        raise ValidationException("meta commands need the text protocol")
+
+    async def meta_get_many(self, *args, **kwargs):
+        raise ValidationException("meta commands need the text protocol")
+
+    async def meta_set_many(self, *args, **kwargs):
+        raise ValidationException("meta commands need the text protocol")
@@ -0,0 +1,215 @@
+import asyncio
+from typing import Optional
+
+from .constants import DEFAULT_READ_BUFFER_SIZE
+from .pool import MemcachedConnection
+
+__all__ = ["BufferedReaderProtocol", "BufferedConnection", "readinto"]
+
+
+class BufferedReaderProtocol(asyncio.BufferedProtocol):
+    """Receives into a preallocated, reusable bytearray.
+
+    Exposes the part of the StreamReader interface used by the client
+    (readline, readexactly, feed_eof), so the response readers work on both.
+
+    Lines and small data blocks are parsed in place from the internal buffer.
+    readinto() makes the transport receive the rest of a data block straight
+    into the destination buffer, large values are never copied through the
+    internal buffer.
+    """
+
+    # see CountingStreamReader
+    metrics = None
+    on_data = None
+    bytes_received = 0
+
+    def __init__(self, buffer_size: int = DEFAULT_READ_BUFFER_SIZE):
+        self._buffer_size = buffer_size
+        # blocks missing more than this are received directly, not buffered
+        self._direct_threshold = buffer_size // 4
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0  # first unread byte
+        self._end = 0  # end of the received bytes
+
+        # set while readinto() receives directly into its destination
+        self._target = None  # type: Optional[memoryview]
+        self._target_pos = 0
+
+        self._transport = None
+        self._paused = False
+        self._waiter = None
+        self._eof = False
+        self._exception = None
+
+    # asyncio.BufferedProtocol ---
+
+    def connection_made(self, transport):
+        self._transport = transport
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        if self._target is not None:
+            return self._target[self._target_pos :]
+
+        if self._start == self._end:
+            self._start = self._end = 0
+
+        elif self._end == len(self._buffer):
+            self._compact()
+
+        return self._view[self._end :]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self.bytes_received += nbytes
+        if self.metrics is not None:
+            self.metrics.bytes_received += nbytes
+        if self.on_data is not None:
+            on_data, self.on_data = self.on_data, None
+            on_data()
+
+        if self._target is not None:
+            self._target_pos += nbytes
+
+        else:
+            self._end += nbytes
+            if not self._paused and self._end - self._start > self._buffer_size:
+                # nobody is reading, stop growing the buffer
+                self._transport.pause_reading()
+                self._paused = True
+
+        self._wakeup()
+
+    def eof_received(self) -> bool:
+        self.feed_eof()
+        return False
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if exc is not None:
+            self._exception = exc
+        self.feed_eof()
+
+    # reader ---
+
+    def buffered(self) -> int:
+        return self._end - self._start
+
+    def feed_eof(self) -> None:
+        self._eof = True
+        self._wakeup()
+
+    def _wakeup(self) -> None:
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def _compact(self) -> None:
+        """Moves the unread bytes to the front, grows the buffer if it is full
+        (a line longer than the buffer, or responses nobody reads yet).
+        """
+        unread = self._end - self._start
+        if unread == len(self._buffer):
+            self._buffer = self._buffer + bytearray(len(self._buffer))
+            self._view = memoryview(self._buffer)
+
+        else:
+            self._buffer[:unread] = bytes(self._view[self._start : self._end])
+
+        self._start, self._end = 0, unread
+
+    async def _wait_for_data(self) -> None:
+        if self._exception is not None:
+            raise self._exception
+
+        if self._paused:
+            self._paused = False
+            self._transport.resume_reading()
+
+        self._waiter = asyncio.get_running_loop().create_future()
+        try:
+            await self._waiter
+        finally:
+            self._waiter = None
+
+    def _consume(self, n: int) -> bytes:
+        data = bytes(self._view[self._start : self._start + n])
+        self._start += n
+        return data
+
+    async def readline(self) -> bytes:
+        while True:
+            index = self._buffer.find(b"\n", self._start, self._end)
+            if index >= 0:
+                return self._consume(index + 1 - self._start)
+
+            if self._eof:
+                return self._consume(self._end - self._start)
+
+            await self._wait_for_data()
+
+    async def _wait_for_buffered(self, n: int) -> None:
+        while self._end - self._start < n:
+            if self._eof:
+                raise asyncio.IncompleteReadError(
+                    self._consume(self._end - self._start), n
+                )
+
+            await self._wait_for_data()
+
+    async def readexactly(self, n: int) -> bytes:
+        if n - (self._end - self._start) > self._direct_threshold:
+            data = bytearray(n)
+            await self.readinto(memoryview(data))
+            return bytes(data)
+
+        await self._wait_for_buffered(n)
+        return self._consume(n)
+
+    async def readinto(self, view: memoryview) -> None:
+        """Fills view with the next len(view) bytes of the stream."""
+        n = len(view)
+        if n - (self._end - self._start) <= self._direct_threshold:
+            # small enough to go through the internal buffer
+            await self._wait_for_buffered(n)
+            view[:] = self._view[self._start : self._start + n]
+            self._start += n
+            return
+
+        taken = self._end - self._start
+        view[:taken] = self._view[self._start : self._end]
+        self._start += taken
+
+        self._target, self._target_pos = view, taken
+        try:
+            while self._target_pos < n:
+                if self._eof:
+                    raise asyncio.IncompleteReadError(
+                        bytes(view[: self._target_pos]), n
+                    )
+
+                await self._wait_for_data()
+
+        finally:
+            self._target = None
+
+
+class BufferedConnection(MemcachedConnection):
+    """A MemcachedConnection over a BufferedReaderProtocol,
+    the transport itself is the writer.
+    """
+
+    @classmethod
+    async def open(cls, host: str, port: int) -> "BufferedConnection":
+        _, protocol = await asyncio.get_running_loop().create_connection(
+            BufferedReaderProtocol, host, port
+        )
+        return cls(protocol, protocol._transport)
+
+
+async def readinto(reader, view: memoryview) -> None:
+    """Fills view from reader, a BufferedReaderProtocol or a StreamReader."""
+    if isinstance(reader, BufferedReaderProtocol):
+        await reader.readinto(view)
+
+    else:
+        view[:] = await reader.readexactly(len(view))
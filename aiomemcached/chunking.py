@@ -0,0 +1,83 @@
+import hashlib
+import os
+import struct
+import zlib
+from typing import List, Optional
+
+from .constants import DEFAULT_MAX_KEY_LENGTH
+
+__all__ = ["ChunkManifest", "CHUNKED_FLAG"]
+
+# set in the flags of a manifest item, reserved when large values are enabled
+CHUNKED_FLAG = 1 << 31
+
+# magic, format version, value length, chunk size, crc32, value version
+_MANIFEST = struct.Struct("!4sBQII8s")
+_MANIFEST_MAGIC = b"AMCK"
+_MANIFEST_FORMAT = 1
+
+
+class ChunkManifest:
+    """Describes a large value stored as chunks under derived keys.
+
+    The manifest is stored under the key of the value, with CHUNKED_FLAG
+    set in its flags. Every write gets a new random version which is part of
+    the chunk keys: a reader never mixes the chunks of two writes, the
+    chunks of a superseded value are left to expire or be evicted.
+    """
+
+    __slots__ = ("length", "chunk_size", "checksum", "version")
+
+    def __init__(self, length: int, chunk_size: int, checksum: int, version: bytes):
+        self.length = length
+        self.chunk_size = chunk_size
+        self.checksum = checksum
+        self.version = version
+
+    @classmethod
+    def for_value(cls, value, chunk_size: int) -> "ChunkManifest":
+        return cls(len(value), chunk_size, zlib.crc32(value), os.urandom(8))
+
+    def pack(self) -> bytes:
+        return _MANIFEST.pack(
+            _MANIFEST_MAGIC,
+            _MANIFEST_FORMAT,
+            self.length,
+            self.chunk_size,
+            self.checksum,
+            self.version,
+        )
+
+    @classmethod
+    def unpack(cls, data) -> Optional["ChunkManifest"]:
+        """Returns None if data is not a manifest this version can read."""
+        if len(data) != _MANIFEST.size:
+            return None
+
+        magic, format_version, length, chunk_size, checksum, version = _MANIFEST.unpack(
+            data
+        )
+        if magic != _MANIFEST_MAGIC or format_version != _MANIFEST_FORMAT:
+            return None
+        if chunk_size < 1:
+            return None
+
+        return cls(length, chunk_size, checksum, version)
+
+    @property
+    def chunk_count(self) -> int:
+        return -(-self.length // self.chunk_size)
+
+    def chunk_keys(self, key: bytes) -> List[bytes]:
+        # keep the derived keys within the key length limit
+        prefix = key if len(key) <= DEFAULT_MAX_KEY_LENGTH - 40 else None
+        if prefix is None:
+            prefix = hashlib.sha1(key).hexdigest().encode()
+
+        version = self.version.hex().encode()
+        return [
+            b"%b:chunk:%b:%d" % (prefix, version, i) for i in range(self.chunk_count)
+        ]
+
+    def verify(self, value) -> bool:
+        return len(value) == self.length and zlib.crc32(value) == self.checksum
@@ -1,9 +1,23 @@
+import os
 import re
+import time
+import inspect
 import functools
 import asyncio
 import warnings
+from concurrent.futures import Executor, ProcessPoolExecutor
 from io import BytesIO
-from typing import List, Dict, Optional
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Dict,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 from .constants import (
     DEFAULT_SERVER_HOST,
@@ -13,6 +27,17 @@ from .constants import (
     DEFAULT_TIMEOUT,
     DEFAULT_MAX_KEY_LENGTH,
     DEFAULT_MAX_VALUE_LENGTH,
+    DEFAULT_PIPELINE_MAX_INFLIGHT,
+    DEFAULT_COALESCE_MAX_KEYS,
+    DEFAULT_BULK_BATCH_SIZE,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_MAX_LARGE_VALUE_LENGTH,
+    DEFAULT_STREAM_CHUNK_SIZE,
+    DEFAULT_EXECUTOR_THRESHOLD,
+    DEFAULT_XFETCH_BETA,
+    DEFAULT_LEASE_TTL,
+    DEFAULT_LEASE_WAIT,
+    META_NOOP,
     STORED,
     NOT_STORED,
     EXISTS,
@@ -23,7 +48,23 @@ from .constants import (
     VERSION,
     OK,
 )
-from .pool import MemcachedPool, MemcachedConnection
+from .pool import MemcachedPool, MemcachedConnection, read_noreply_errors
+from .pipeline import MemcachedPipeline
+from .buffered import BufferedConnection, readinto
+from .coalescing import GetCoalescer
+from .singleflight import SingleFlight
+from .nearcache import NearCache
+from .chunking import CHUNKED_FLAG, ChunkManifest
+from .compression import CODEC_FLAGS, Compressor
+from .serialization import TYPE_FLAGS, Serializer
+from .offload import compress_values, decode_values
+from .metrics import Metrics
+from .hooks import CommandEvent, CommandHook
+from .slowlog import SlowLog
+from .streaming import ChunkedValueStream, ValueStream
+from .lease import Lease, backoff, lease_key
+from .xfetch import pack_envelope, should_recompute, unpack_envelope
+from .meta import MetaResponse, build_meta_cmd, read_meta_batch, read_meta_response
 from .exceptions import (
     ValidationException,
     ResponseException,
@@ -50,6 +91,25 @@ _URI_RE = re.compile(
     r"(:(?P<port>[0-9]+))?"
 )
 
+# the first 4 bytes of the usual commands -> their name, see _command_name
+_COMMAND_NAMES = {
+    name[:4]: name.strip()
+    for name in (
+        b"get ",
+        b"gets",
+        b"set ",
+        b"add ",
+        b"replace",
+        b"append",
+        b"prepend",
+        b"cas ",
+        b"delete",
+        b"incr",
+        b"decr",
+        b"touch",
+    )
+}
+
 
 def acquire(func):
     @functools.wraps(func)
@@ -58,7 +118,13 @@ def acquire(func):
         try:
             return await func(self, conn, *args, **kwargs)
 
-        except (ConnectionError, ConnectException):
+        except (
+            ConnectionError,
+            ConnectException,
+            ResponseException,
+            asyncio.CancelledError,
+        ):
+            # the response stream is broken or has not been fully read
             await self._pool.dispose(conn)
             raise
 
@@ -69,6 +135,11 @@ def acquire(func):
 
 
 class Client(object):
+    _connection_class = MemcachedConnection
+    _buffered_connection_class = BufferedConnection
+    # get_with_lease: the meta protocol win/stale flags, or add
+    _lease_meta = True
+
     def __init__(
         self,
         uri: str = None,
@@ -79,7 +150,90 @@ class Client(object):
         timeout: int = DEFAULT_TIMEOUT,
         connect_timeout: int = DEFAULT_TIMEOUT,
         value_length: int = DEFAULT_MAX_VALUE_LENGTH,
+        pipeline: bool = False,
+        pipeline_max_inflight: int = DEFAULT_PIPELINE_MAX_INFLIGHT,
+        buffered_protocol: bool = False,
+        memoryview_values: bool = False,
+        pool_acquire_timeout: Optional[float] = None,
+        pool_fair: bool = True,
+        coalesce_gets: bool = False,
+        coalesce_window: float = 0,
+        coalesce_max_keys: int = DEFAULT_COALESCE_MAX_KEYS,
+        single_flight: bool = False,
+        near_cache: Optional[NearCache] = None,
+        large_values: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        large_value_length: int = DEFAULT_MAX_LARGE_VALUE_LENGTH,
+        compressor: Optional[Compressor] = None,
+        serializer: Optional[Serializer] = None,
+        executor: Optional[Executor] = None,
+        executor_threshold: int = DEFAULT_EXECUTOR_THRESHOLD,
+        metrics: Optional[Metrics] = None,
+        slowlog: Optional[SlowLog] = None,
     ):
+        """
+        pool_acquire_timeout: how long a command may wait for a connection
+          when the pool is full, then it raises TimeoutException.
+          None waits forever.
+
+        pool_fair: waiting commands get the released connections in FIFO
+          order. See MemcachedPool.
+
+        coalesce_gets: concurrent get/gets calls issued within
+          coalesce_window seconds (0: the same event loop iteration) are sent
+          as one multi-key command of up to coalesce_max_keys keys.
+          See GetCoalescer.
+
+        single_flight: a get/gets of a key already being fetched awaits the
+          request in flight instead of sending its own, all the callers share
+          the same result (and info dict). See SingleFlight.
+
+        near_cache: get/get_many are served from this in-process cache first,
+          the writes of this client update or invalidate its entries.
+          gets/gets_many always go to the server. See NearCache.
+
+        pipeline: share connections between concurrent commands, each
+          connection carries up to pipeline_max_inflight commands per round
+          trip instead of one. See MemcachedPipeline.
+
+        buffered_protocol: connections receive into a reusable buffer,
+          large values are received directly into their own buffer.
+          See BufferedReaderProtocol.
+
+        memoryview_values: retrieval commands return the values as
+          memoryviews instead of bytes, saving a copy of each value.
+
+        large_values: set/add/replace store the values larger than chunk_size
+          (up to large_value_length) as chunks of chunk_size bytes under
+          derived keys, with a manifest under the key. get/gets/get_many/
+          gets_many/get_into reassemble them into one buffer: a bytearray, or
+          a memoryview with memoryview_values. A value with a missing or
+          corrupted chunk is a miss. Bit 31 of the flags marks the manifests,
+          it is reserved. See ChunkManifest.
+
+        compressor: the values of set/add/replace/cas and the *_many storage
+          commands are compressed by it, get/gets/get_many/gets_many/get_into
+          decompress them. Bits 28-30 of the flags record the codec, they are
+          reserved. See Compressor.
+
+        serializer: the storage commands above take any value (str, int,
+          JSON, ...) converted to bytes by it, get/gets/get_many/gets_many
+          return the values converted back. Bits 24-27 of the flags tag the
+          type, they are reserved. See Serializer.
+
+        executor: a concurrent.futures thread or process pool, the
+          compression, decompression and deserialization of a value (or of
+          the values of a multi-key command) of executor_threshold bytes or
+          more run in it instead of on the event loop. Retrieved values are
+          measured as stored, compressed. The serialization of the values
+          to store stays on the event loop, see aiomemcached.offload.
+
+        metrics: records the latency of each command sent, the pool waits,
+          the traffic, the hits and misses of the retrievals. See Metrics.
+
+        slowlog: keeps the last commands slower than its threshold, with
+          their keys, sizes, pool wait and connection. See SlowLog.
+        """
         if uri is None:
             self._host = host
             self._port = port
@@ -89,12 +243,65 @@ class Client(object):
 
         self._timeout = timeout
         self._value_length = value_length
+        self._memoryview_values = memoryview_values
         self._pool = MemcachedPool(
             host=self._host,
             port=self._port,
             minsize=pool_minsize,
             maxsize=pool_maxsize,
             connect_timeout=connect_timeout,
+            connection_class=(
+                self._buffered_connection_class
+                if buffered_protocol
+                else self._connection_class
+            ),
+            acquire_timeout=pool_acquire_timeout,
+            fair=pool_fair,
+            metrics=metrics,
+        )
+        self._metrics = metrics
+        self._hooks = ()  # type: Tuple[CommandHook, ...]
+        self._slowlog = slowlog
+        if slowlog is not None:
+            self.add_hook(slowlog)
+
+        self._pipeline = pipeline
+        self._pipeline_max_inflight = pipeline_max_inflight
+        self._pipeline_maxsize = max(pool_maxsize, 1)
+        self._bulk_concurrency = max(pool_maxsize, 1)
+        self._pipeline_lock = asyncio.Lock()
+        self._pipelines = []  # type: List[MemcachedPipeline]
+
+        self._coalescer = None
+        if coalesce_gets:
+            self._coalescer = GetCoalescer(
+                self._retrieval_command,
+                window=coalesce_window,
+                max_keys=coalesce_max_keys,
+            )
+
+        self._single_flight = SingleFlight() if single_flight else None
+        self._recomputes = SingleFlight()  # get_or_set
+        self._near_cache = near_cache
+
+        if large_values and not 0 < chunk_size <= value_length:
+            raise ValidationException(
+                "chunk_size:[{}] must be positive and up to value_length".format(
+                    chunk_size
+                )
+            )
+        self._large_values = large_values
+        self._chunk_size = chunk_size
+        self._large_value_length = large_value_length
+        self._compressor = compressor
+        self._serializer = serializer
+        self._executor = executor
+        self._executor_threshold = executor_threshold
+        # memoryviews cannot be sent to a process
+        self._executor_pickles = isinstance(executor, ProcessPoolExecutor)
+        # retrieved values may need _decode
+        self._decode_values = (
+            large_values or compressor is not None or serializer is not None
         )
 
     @staticmethod
@@ -133,42 +340,377 @@ class Client(object):
 
         return
 
+    @staticmethod
+    def _validate_exptime(exptime: int) -> None:
+        if exptime < 0:
+            raise ValidationException(
+                "exptime:[{}] must be unsigned integer".format(exptime)
+            )
+
     def validate_value(self, value: bytes):
         if len(value) > self._value_length:
             raise ValidationException(
                 "A value up to {} bytes in length.".format(len(value))
             )
 
+    @property
+    def near_cache(self) -> Optional[NearCache]:
+        return self._near_cache
+
+    @property
+    def compressor(self) -> Optional[Compressor]:
+        return self._compressor
+
+    @property
+    def serializer(self) -> Optional[Serializer]:
+        return self._serializer
+
+    @property
+    def metrics(self) -> Optional[Metrics]:
+        return self._metrics
+
+    @property
+    def slowlog(self) -> Optional[SlowLog]:
+        return self._slowlog
+
+    def add_hook(self, hook: CommandHook) -> None:
+        """Registers hook, its callbacks are called around every command sent
+        from now on. See CommandHook.
+        """
+        self._hooks += (hook,)
+
+    def remove_hook(self, hook: CommandHook) -> None:
+        self._hooks = tuple(h for h in self._hooks if h is not hook)
+
+    def pool_stats(self) -> dict:
+        """Connection pool counters, see PoolStats. wait times are in seconds,
+        they only count the acquires which had to wait.
+        """
+        result = self._pool.stats.snapshot()
+        result.update(
+            size=self._pool.size(),
+            free=self._pool.free_size(),
+            waiters=self._pool.waiters(),
+        )
+        return result
+
     async def close(self):
-        """Closes the sockets if its open."""
+        """Closes the sockets if its open.
+
+        The get_or_set recomputations in flight, e.g. the background
+        refreshes of stale_ttl, are cancelled.
+        """
+        await self._recomputes.cancel()
+        if self._coalescer is not None:
+            self._coalescer.close()
+
+        for pipeline in self._pipelines:
+            pipeline.close()
+        self._pipelines.clear()
+
         await self._pool.clear()
 
-    @acquire
     async def _execute_raw_cmd(
         self,
-        conn: MemcachedConnection,
         cmd: bytes,
         one_line_response: bool = False,
         end_symbols: List[bytes] = None,
-    ) -> BytesIO:
+        read_response: Callable[[asyncio.StreamReader], Awaitable[Any]] = None,
+        noreply: bool = False,
+        keys: Sequence[bytes] = (),
+    ) -> Any:
+        """
+        read_response reads exactly one response from the stream and returns
+        it parsed. By default the response lines are read into a BytesIO,
+        up to a line in end_symbols (skip end_symbols if one_line_response
+        is True)
+
+        keys: the keys of cmd, for the hooks
+
+        noreply: cmd carries the noreply option, it is written and None is
+        returned without waiting. The error lines the server may still send
+        are skipped before the next response on the same connection.
+        """
+        if noreply:
+            read_response = None
+
+        else:
+            if read_response is None:
+                read_response = functools.partial(
+                    self._read_lines,
+                    one_line_response=one_line_response,
+                    end_symbols=end_symbols or list(),
+                )
+
+            read_response = functools.partial(self._read_response, read_response)
+
+        if self._hooks:
+            return await self._execute_hooked_cmd(cmd, read_response, keys)
+
+        if self._metrics is not None:
+            return await self._execute_measured_cmd(cmd, read_response)
+
+        if self._pipeline:
+            return await self._execute_pipelined_cmd(cmd, read_response)
+
+        return await self._execute_pooled_cmd(cmd, read_response)
+
+    async def _execute_measured_cmd(self, cmd: bytes, read_response) -> Any:
+        started = time.perf_counter()
+        try:
+            if self._pipeline:
+                return await self._execute_pipelined_cmd(cmd, read_response)
+
+            return await self._execute_pooled_cmd(cmd, read_response)
+
+        except TimeoutException:
+            self._metrics.timeouts += 1
+            raise
+
+        finally:
+            self._metrics.record(
+                self._command_name(cmd), time.perf_counter() - started, len(cmd)
+            )
+
+    async def _execute_hooked_cmd(
+        self, cmd: bytes, read_response, keys: Sequence[bytes]
+    ) -> Any:
+        hooks = self._hooks
+        name = self._command_name(cmd)
+        event = CommandEvent(name.decode(), keys, cmd, time.perf_counter())
+        if read_response is not None:
+            read_response = functools.partial(
+                self._read_hooked_response, event, hooks, read_response
+            )
+
+        for hook in hooks:
+            hook.on_start(event)
+
+        try:
+            if self._pipeline:
+                return await self._execute_pipelined_cmd(
+                    cmd, read_response, event=event, hooks=hooks
+                )
+
+            return await self._execute_pooled_cmd(
+                cmd, read_response, event=event, hooks=hooks
+            )
+
+        except BaseException as e:
+            event.exception = e
+            if self._metrics is not None and isinstance(e, TimeoutException):
+                self._metrics.timeouts += 1
+            raise
+
+        finally:
+            event.finished = time.perf_counter()
+            if self._metrics is not None:
+                self._metrics.record(name, event.finished - event.started, len(cmd))
+            for hook in hooks:
+                hook.on_complete(event)
+
+    @staticmethod
+    def _acquired(
+        event: CommandEvent, hooks: Tuple[CommandHook, ...], conn: MemcachedConnection
+    ) -> None:
+        event.acquired = time.perf_counter()
+        event.connection = conn
+        for hook in hooks:
+            hook.on_acquired(event)
+
+    @staticmethod
+    def _first_byte(event: CommandEvent, hooks: Tuple[CommandHook, ...]) -> None:
+        event.first_byte = time.perf_counter()
+        for hook in hooks:
+            hook.on_first_byte(event)
+
+    async def _read_hooked_response(
+        self,
+        event: CommandEvent,
+        hooks: Tuple[CommandHook, ...],
+        read_response,
+        reader: asyncio.StreamReader,
+        synced: bool = False,
+    ) -> Any:
+        """read_response, noting when its first byte is received and the bytes
+        received while reading it.
+        """
+        received = reader.bytes_received
+        if reader.buffered():
+            self._first_byte(event, hooks)
+        else:
+            reader.on_data = functools.partial(self._first_byte, event, hooks)
+
+        try:
+            return await read_response(reader, synced=synced)
+
+        finally:
+            reader.on_data = None
+            event.response_size = reader.bytes_received - received
+
+    @staticmethod
+    def _command_name(cmd: bytes) -> bytes:
+        """The first word of cmd, the command of a batch."""
+        name = _COMMAND_NAMES.get(cmd[:4])
+        if name is not None:
+            return name
+
+        end = cmd.find(b" ", 0, 16)
+        if end < 0:
+            end = cmd.find(b"\r", 0, 16)
+        return cmd[:end]
+
+    @acquire
+    async def _execute_pooled_cmd(
+        self,
+        conn: MemcachedConnection,
+        cmd: bytes,
+        read_response,
+        event: Optional[CommandEvent] = None,
+        hooks: Tuple[CommandHook, ...] = (),
+    ) -> Any:
+        if event is not None:
+            self._acquired(event, hooks, conn)
+
+        if read_response is None:
+            conn.write(cmd, noreply=True)
+            return None
+
+        synced = conn.write(cmd)
+        return await read_response(conn.reader, synced=synced)
+
+    async def _execute_pipelined_cmd(
+        self,
+        cmd: bytes,
+        read_response,
+        event: Optional[CommandEvent] = None,
+        hooks: Tuple[CommandHook, ...] = (),
+    ) -> Any:
+        pipeline = await self._get_pipeline()
+        if event is not None:
+            self._acquired(event, hooks, pipeline.conn)
+
+        try:
+            return await pipeline.execute(cmd, read_response)
+
+        except (ConnectionError, ConnectException):
+            if pipeline in self._pipelines:
+                self._pipelines.remove(pipeline)
+                await self._pool.dispose(pipeline.conn)
+            raise
+
+    async def _execute_many(
+        self,
+        raw_cmds: List[bytes],
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        concurrency: Optional[int] = None,
+        read_batch: Callable[..., Awaitable[list]] = None,
+        terminator: bytes = b"",
+        keys: Optional[List[bytes]] = None,
+    ) -> list:
+        """Sends commands in batches of batch_size, each batch is written at
+        once (followed by terminator) and its responses are read in order.
+        Up to concurrency (default: pool_maxsize) batches are in flight, each
+        on its own connection.
+
+        read_batch(reader, count) reads the responses of a batch of count
+        commands, by default one response line per command.
+
+        keys: the key of each command, for the hooks
+
+        Returns the responses of all the batches, in the order of raw_cmds.
+        """
+        if batch_size < 1:
+            raise ValidationException(
+                "batch_size:[{}] must be a positive integer".format(batch_size)
+            )
+
+        if read_batch is None:
+            read_batch = self._read_response_lines
+        semaphore = asyncio.Semaphore(concurrency or self._bulk_concurrency)
+
+        async def execute_batch(batch: List[bytes], batch_keys: List[bytes]) -> list:
+            async with semaphore:
+                return await self._execute_raw_cmd(
+                    cmd=b"".join(batch) + terminator,
+                    read_response=functools.partial(read_batch, count=len(batch)),
+                    keys=batch_keys,
+                )
+
+        results = await asyncio.gather(
+            *[
+                execute_batch(
+                    raw_cmds[i : i + batch_size],
+                    keys[i : i + batch_size] if keys is not None else (),
+                )
+                for i in range(0, len(raw_cmds), batch_size)
+            ]
+        )
+        return [response for responses in results for response in responses]
+
+    async def _get_pipeline(self) -> MemcachedPipeline:
+        """Returns the least loaded pipeline,
+        opens a new one while all of them are full and the pool is not.
         """
-        skip end_symbols if one_line_response is True
+        pipeline = min(self._pipelines, key=MemcachedPipeline.inflight, default=None)
+        if pipeline is not None and not pipeline.full() and not pipeline.closed:
+            return pipeline
+
+        async with self._pipeline_lock:
+            for pipeline in [p for p in self._pipelines if p.closed]:
+                self._pipelines.remove(pipeline)
+                await self._pool.dispose(pipeline.conn)
+
+            pipeline = min(
+                self._pipelines, key=MemcachedPipeline.inflight, default=None
+            )
+            if pipeline is None or (
+                pipeline.full() and len(self._pipelines) < self._pipeline_maxsize
+            ):
+                conn = await self._pool.acquire()
+                pipeline = MemcachedPipeline(
+                    conn, max_inflight=self._pipeline_max_inflight
+                )
+                self._pipelines.append(pipeline)
+
+        return pipeline
+
+    async def _read_response(
+        self, read_response, reader: asyncio.StreamReader, synced: bool = False
+    ) -> Any:
+        """synced: the response follows the error lines of noreply commands,
+        see MemcachedConnection.write
         """
-        if end_symbols is None:
-            end_symbols = list()
+        if synced:
+            read_response = functools.partial(
+                self._read_after_noreply_errors, read_response
+            )
+
+        try:
+            return await asyncio.wait_for(read_response(reader), timeout=self._timeout)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            raise ConnectException(e)
+        except asyncio.TimeoutError as e:
+            raise TimeoutException(e)  # TODO test
 
-        conn.writer.write(cmd)
+    @staticmethod
+    async def _read_after_noreply_errors(
+        read_response, reader: asyncio.StreamReader
+    ) -> Any:
+        await read_noreply_errors(reader)
+        return await read_response(reader)
 
+    @staticmethod
+    async def _read_lines(
+        reader: asyncio.StreamReader,
+        one_line_response: bool,
+        end_symbols: List[bytes],
+    ) -> BytesIO:
         response_stream = BytesIO()
         while True:
-            try:
-                line = await asyncio.wait_for(
-                    conn.reader.readline(), timeout=self._timeout
-                )
-            except ConnectionError as e:
-                raise ConnectException(e)
-            except asyncio.TimeoutError as e:
-                raise TimeoutException(e)  # TODO test
+            line = await reader.readline()
+            if not line:
+                raise ConnectException("connection closed by server")
 
             response_stream.write(line)
 
@@ -180,6 +722,30 @@ class Client(object):
         response_stream.seek(0)
         return response_stream
 
+    @staticmethod
+    async def _read_response_lines(
+        reader: asyncio.StreamReader, count: int
+    ) -> List[bytes]:
+        lines = []
+        for _ in range(count):
+            line = await reader.readline()
+            if not line:
+                raise ConnectException("connection closed by server")
+
+            lines.append(line)
+
+        return lines
+
+    def _key_written(self, key: bytes) -> None:
+        """key has been written by this client,
+        the retrievals started before do not count for later callers.
+        """
+        if self._single_flight is not None:
+            self._single_flight.forget((b"get", key))
+            self._single_flight.forget((b"gets", key))
+        if self._near_cache is not None:
+            self._near_cache.invalidate(key)
+
     async def _storage_command(
         self,
         cmd: bytes,
@@ -188,7 +754,8 @@ class Client(object):
         flags: int = 0,
         exptime: int = 0,
         cas: int = None,
-    ) -> bool:
+        noreply: bool = False,
+    ) -> Optional[bool]:
         """
         Storage commands
         ----------------
@@ -283,30 +850,39 @@ class Client(object):
                 "".format(flags, exptime)
             )
 
+        noreply_option = b" noreply" if noreply else b""
         if cas:
-            raw_cmd = b"cas %b %d %d %d %d\r\n%b\r\n" % (
+            raw_cmd = b"cas %b %d %d %d %d%b\r\n%b\r\n" % (
                 key,
                 flags,
                 exptime,
                 len(value),
                 cas,
+                noreply_option,
                 value,
             )
         else:
-            raw_cmd = b"%b %b %d %d %d\r\n%b\r\n" % (
+            raw_cmd = b"%b %b %d %d %d%b\r\n%b\r\n" % (
                 cmd,
                 key,
                 flags,
                 exptime,
                 len(value),
+                noreply_option,
                 value,
             )
 
         response_stream = await self._execute_raw_cmd(
-            cmd=raw_cmd, one_line_response=True
+            cmd=raw_cmd, one_line_response=True, noreply=noreply, keys=(key,)
         )
+        self._key_written(key)
+        if noreply:
+            return None
+
         response = response_stream.readline()
         if response == STORED:
+            if self._near_cache is not None and cmd in (b"set", b"cas"):
+                self._near_cache.update(key, value, flags=flags, exptime=exptime)
             return True
 
         elif response in (NOT_STORED, EXISTS, NOT_FOUND):
@@ -315,103 +891,427 @@ class Client(object):
 
         raise ResponseException(raw_cmd, response_stream.getvalue())
 
+    def _serialize(self, value: Any, flags: int) -> Tuple[bytes, int]:
+        reserved = 0
+        if self._large_values:
+            reserved |= CHUNKED_FLAG
+        if self._compressor is not None:
+            reserved |= CODEC_FLAGS
+        if self._serializer is not None:
+            reserved |= TYPE_FLAGS
+
+        if flags & reserved:
+            raise ValidationException(
+                "flags:[{}] bits 0x{:08x} are reserved".format(flags, reserved)
+            )
+
+        if self._serializer is not None:
+            return self._serializer.dumps(value, flags)
+        return value, flags
+
+    async def _encode(self, value: Any, flags: int) -> Tuple[bytes, int]:
+        """Returns the value to store and its flags, serialized and compressed
+        if enabled.
+        """
+        return (await self._encode_many([(value, flags)]))[0]
+
+    async def _encode_many(
+        self, items: List[Tuple[Any, int]]
+    ) -> List[Tuple[bytes, int]]:
+        """_encode for [(value, flags)], the values are serialized on the
+        event loop, then compressed together, in the executor when they add
+        up to executor_threshold bytes.
+        """
+        items = [self._serialize(value, flags) for value, flags in items]
+        if self._compressor is None:
+            return items
+
+        size = sum(len(value) for value, _ in items)
+        if self._offloaded(size) and self._executor_pickles:
+            items = [(self._picklable(value), flags) for value, flags in items]
+
+        items, records = await self._run_codec(
+            size, compress_values, self._compressor, items
+        )
+        for record in records:
+            self._compressor._record(record)
+        return items
+
+    def _offloaded(self, size: int) -> bool:
+        return self._executor is not None and size >= self._executor_threshold
+
+    @staticmethod
+    def _picklable(value):
+        return bytes(value) if isinstance(value, memoryview) else value
+
+    async def _run_codec(self, size: int, func, *args) -> Any:
+        """Runs func(*args), in the executor for size bytes or more."""
+        if not self._offloaded(size):
+            return func(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(func, *args)
+        )
+
+    async def _store(
+        self,
+        cmd: bytes,
+        key: bytes,
+        value: bytes,
+        flags: int = 0,
+        exptime: int = 0,
+        noreply: bool = False,
+    ) -> Optional[bool]:
+        """set, add or replace, chunks the large values when enabled."""
+        value, flags = await self._encode(value, flags)
+        return await self._store_encoded(cmd, key, value, flags, exptime, noreply)
+
+    async def _store_encoded(
+        self,
+        cmd: bytes,
+        key: bytes,
+        value: bytes,
+        flags: int,
+        exptime: int,
+        noreply: bool,
+    ) -> Optional[bool]:
+        if self._large_values and len(value) > self._chunk_size:
+            return await self._store_chunked(cmd, key, value, flags, exptime, noreply)
+
+        return await self._storage_command(
+            cmd=cmd,
+            key=key,
+            value=value,
+            flags=flags,
+            exptime=exptime,
+            noreply=noreply,
+        )
+
+    async def _store_chunked(
+        self,
+        cmd: bytes,
+        key: bytes,
+        value: bytes,
+        flags: int,
+        exptime: int,
+        noreply: bool,
+    ) -> Optional[bool]:
+        """Writes the chunks concurrently, then the manifest under key: readers
+        see either the previous value or the new one, complete.
+        """
+        self.validate_key(key)
+        if len(value) > self._large_value_length:
+            raise ValidationException(
+                "A large value up to {} bytes in length.".format(
+                    self._large_value_length
+                )
+            )
+
+        manifest = ChunkManifest.for_value(value, self._chunk_size)
+        size = self._chunk_size
+        view = memoryview(value).cast("B")
+        # the chunk keys are new for every write, add never overwrites
+        stored = await self._storage_many(
+            b"add",
+            [
+                (chunk_key, view[i * size : (i + 1) * size])
+                for i, chunk_key in enumerate(manifest.chunk_keys(key))
+            ],
+            exptime=exptime,
+            batch_size=1,
+            encode=False,
+        )
+        if not all(stored.values()):
+            return False
+
+        return await self._storage_command(
+            cmd=cmd,
+            key=key,
+            value=manifest.pack(),
+            flags=flags | CHUNKED_FLAG,
+            exptime=exptime,
+            noreply=noreply,
+        )
+
     async def set(
-        self, key: bytes, value: bytes, flags: int = 0, exptime: int = 0
-    ) -> bool:
+        self,
+        key: bytes,
+        value: bytes,
+        flags: int = 0,
+        exptime: int = 0,
+        noreply: bool = False,
+    ) -> Optional[bool]:
         """ "set" means "store this data"."""
-        return await self._storage_command(
-            cmd=b"set", key=key, value=value, flags=flags, exptime=exptime
+        return await self._store(
+            cmd=b"set",
+            key=key,
+            value=value,
+            flags=flags,
+            exptime=exptime,
+            noreply=noreply,
         )
 
     async def add(
-        self, key: bytes, value: bytes, flags: int = 0, exptime: int = 0
-    ) -> bool:
+        self,
+        key: bytes,
+        value: bytes,
+        flags: int = 0,
+        exptime: int = 0,
+        noreply: bool = False,
+    ) -> Optional[bool]:
         """
         "add" means "store this data, but only if the server *doesn't* already
         hold data for this key".
         """
-        return await self._storage_command(
-            cmd=b"add", key=key, value=value, flags=flags, exptime=exptime
+        return await self._store(
+            cmd=b"add",
+            key=key,
+            value=value,
+            flags=flags,
+            exptime=exptime,
+            noreply=noreply,
         )
 
     async def replace(
-        self, key: bytes, value: bytes, flags: int = 0, exptime: int = 0
-    ) -> bool:
+        self,
+        key: bytes,
+        value: bytes,
+        flags: int = 0,
+        exptime: int = 0,
+        noreply: bool = False,
+    ) -> Optional[bool]:
         """
         "replace" means "store this data, but only if the server *does*
         already hold data for this key".
         """
-        return await self._storage_command(
-            cmd=b"replace", key=key, value=value, flags=flags, exptime=exptime
+        return await self._store(
+            cmd=b"replace",
+            key=key,
+            value=value,
+            flags=flags,
+            exptime=exptime,
+            noreply=noreply,
         )
 
     async def append(
-        self, key: bytes, value: bytes, flags: int = 0, exptime: int = 0
-    ) -> bool:
+        self,
+        key: bytes,
+        value: bytes,
+        flags: int = 0,
+        exptime: int = 0,
+        noreply: bool = False,
+    ) -> Optional[bool]:
         """
         "append" means "add this data to an existing key after existing data".
         """
         return await self._storage_command(
-            cmd=b"append", key=key, value=value, flags=flags, exptime=exptime
+            cmd=b"append",
+            key=key,
+            value=value,
+            flags=flags,
+            exptime=exptime,
+            noreply=noreply,
         )
 
     async def prepend(
-        self, key: bytes, value: bytes, flags: int = 0, exptime: int = 0
-    ) -> bool:
+        self,
+        key: bytes,
+        value: bytes,
+        flags: int = 0,
+        exptime: int = 0,
+        noreply: bool = False,
+    ) -> Optional[bool]:
         """ "prepend" means
         "add this data to an existing key before existing data".
         """
         return await self._storage_command(
-            cmd=b"prepend", key=key, value=value, flags=flags, exptime=exptime
+            cmd=b"prepend",
+            key=key,
+            value=value,
+            flags=flags,
+            exptime=exptime,
+            noreply=noreply,
         )
 
     async def cas(
-        self, key: bytes, value: bytes, cas: int, flags: int = 0, exptime: int = 0
-    ) -> bool:
+        self,
+        key: bytes,
+        value: bytes,
+        cas: int,
+        flags: int = 0,
+        exptime: int = 0,
+        noreply: bool = False,
+    ) -> Optional[bool]:
         """
         "cas" is a check and set operation which means "store this data but
         only if no one else has updated since I last fetched it."
         """
+        value, flags = await self._encode(value, flags)
         return await self._storage_command(
-            cmd=b"cas", key=key, value=value, flags=flags, exptime=exptime, cas=cas
+            cmd=b"cas",
+            key=key,
+            value=value,
+            flags=flags,
+            exptime=exptime,
+            cas=cas,
+            noreply=noreply,
         )
 
-    async def _retrieval_command(
-        self, keys: List[bytes], with_cas: bool = False
-    ) -> (Dict[bytes, bytes], Dict[bytes, Dict[bytes, Optional[int]]]):
-        """
-        Retrieval command:
-        ------------------
+    async def _storage_many(
+        self,
+        cmd: bytes,
+        items,
+        flags: int = 0,
+        exptime: int = 0,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        concurrency: Optional[int] = None,
+        encode: bool = True,
+    ) -> Dict[bytes, bool]:
+        """encode: the values are compressed, see _encode"""
+        if isinstance(items, dict):
+            items = items.items()
 
-        The retrieval commands "get" and "gets" operate like this:
+        if flags < 0 or exptime < 0:
+            raise ValidationException(
+                "flags:[{}] and exptime:[{}] must be unsigned integer"
+                "".format(flags, exptime)
+            )
 
-        get <key>*\r\n
-        gets <key>*\r\n
+        items = list(items)
+        for key, _ in items:
+            self.validate_key(key)
 
-        - <key>* means one or more key strings separated by whitespace.
+        encoded = [(value, flags) for _, value in items]
+        if encode:
+            encoded = await self._encode_many(encoded)
 
-        After this command, the client expects zero or more items, each of
-        which is received as a text line followed by a data block. After all
-        the items have been transmitted, the server sends the string
+        keys, values, items_flags, raw_cmds = [], [], [], []
+        for (key, _), (value, item_flags) in zip(items, encoded):
+            self.validate_value(value)
 
-        "END\r\n"
+            keys.append(key)
+            values.append(value)
+            items_flags.append(item_flags)
+            raw_cmds.append(
+                b"%b %b %d %d %d\r\n%b\r\n"
+                % (cmd, key, item_flags, exptime, len(value), value)
+            )
 
-        to indicate the end of response.
+        responses = await self._execute_many(
+            raw_cmds, batch_size, concurrency, keys=keys
+        )
 
-        Each item sent by the server looks like this:
+        result = {}
+        error = None
+        for key, value, item_flags, raw_cmd, response in zip(
+            keys, values, items_flags, raw_cmds, responses
+        ):
+            self._key_written(key)
+            if response == STORED:
+                if self._near_cache is not None and cmd == b"set":
+                    self._near_cache.update(
+                        key, value, flags=item_flags, exptime=exptime
+                    )
+                result[key] = True
 
-        VALUE <key> <flags> <bytes> [<cas unique>]\r\n
-        <data block>\r\n
+            elif response in (NOT_STORED, EXISTS, NOT_FOUND):
+                result[key] = False
 
-        - <key> is the key for the item being sent
+            elif error is None:
+                # the other keys are still accounted for before raising
+                error = ResponseException(raw_cmd, response)
 
-        - <flags> is the flags value set by the storage command
+        if error is not None:
+            error.results = result
+            raise error
 
-        - <bytes> is the length of the data block to follow, *not* including
-          its delimiting \r\n
+        return result
 
-        - <cas unique> is a unique 64-bit integer that uniquely identifies
-          this specific item.
+    async def set_many(
+        self,
+        items: Iterable[Tuple[bytes, bytes]],
+        flags: int = 0,
+        exptime: int = 0,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        concurrency: Optional[int] = None,
+    ) -> Dict[bytes, bool]:
+        """Stores many items, a dict or (key, value) pairs, and returns
+        {key: stored}.
+
+        The commands are written batch_size at a time, up to concurrency
+        batches (default: pool_maxsize) are sent concurrently, each on its own
+        connection.
+
+        An unexpected response raises ResponseException once every key has
+        been accounted for, with the results of the other keys as its
+        results attribute.
+        """
+        return await self._storage_many(
+            b"set", items, flags, exptime, batch_size, concurrency
+        )
+
+    async def add_many(
+        self,
+        items: Iterable[Tuple[bytes, bytes]],
+        flags: int = 0,
+        exptime: int = 0,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        concurrency: Optional[int] = None,
+    ) -> Dict[bytes, bool]:
+        """add for many items, see set_many."""
+        return await self._storage_many(
+            b"add", items, flags, exptime, batch_size, concurrency
+        )
+
+    async def replace_many(
+        self,
+        items: Iterable[Tuple[bytes, bytes]],
+        flags: int = 0,
+        exptime: int = 0,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        concurrency: Optional[int] = None,
+    ) -> Dict[bytes, bool]:
+        """replace for many items, see set_many."""
+        return await self._storage_many(
+            b"replace", items, flags, exptime, batch_size, concurrency
+        )
+
+    async def _retrieval_command(
+        self, keys: List[bytes], with_cas: bool = False
+    ) -> (Dict[bytes, bytes], Dict[bytes, Dict[bytes, Optional[int]]]):
+        """
+        Retrieval command:
+        ------------------
+
+        The retrieval commands "get" and "gets" operate like this:
+
+        get <key>*\r\n
+        gets <key>*\r\n
+
+        - <key>* means one or more key strings separated by whitespace.
+
+        After this command, the client expects zero or more items, each of
+        which is received as a text line followed by a data block. After all
+        the items have been transmitted, the server sends the string
+
+        "END\r\n"
+
+        to indicate the end of response.
+
+        Each item sent by the server looks like this:
+
+        VALUE <key> <flags> <bytes> [<cas unique>]\r\n
+        <data block>\r\n
+
+        - <key> is the key for the item being sent
+
+        - <flags> is the flags value set by the storage command
+
+        - <bytes> is the length of the data block to follow, *not* including
+          its delimiting \r\n
+
+        - <cas unique> is a unique 64-bit integer that uniquely identifies
+          this specific item.
 
         - <data block> is the data for this item.
 
@@ -427,13 +1327,33 @@ class Client(object):
         cmd_format = b"gets %b\r\n" if with_cas else b"get %b\r\n"
         raw_cmd = cmd_format % b" ".join(keys)
 
-        response_stream = await self._execute_raw_cmd(
+        values, info = await self._execute_raw_cmd(
             cmd=raw_cmd,
-            end_symbols=[
-                END,
-            ],
+            read_response=functools.partial(
+                self._read_retrieval_response,
+                raw_cmd=raw_cmd,
+                keys_count=len(keys),
+                with_cas=with_cas,
+                as_memoryview=self._memoryview_values,
+            ),
+            keys=keys,
         )
+        if self._metrics is not None:
+            self._metrics.record_retrieval(len(keys), len(values))
+        return values, info
 
+    @staticmethod
+    async def _read_retrieval_response(
+        reader: asyncio.StreamReader,
+        raw_cmd: bytes,
+        keys_count: int,
+        with_cas: bool,
+        as_memoryview: bool = False,
+    ) -> (Dict[bytes, bytes], Dict[bytes, Dict[bytes, Optional[int]]]):
+        """The response is framed by the <bytes> of each item header: the data
+        block is read in one go, whatever it contains, and the result is built
+        while reading.
+        """
         values = {}
         info = {}
         # values = {
@@ -448,19 +1368,19 @@ class Client(object):
         #     ...
         # }
 
-        line = response_stream.readline()
-        while line != b"" and line != END:
+        line = await reader.readline()
+        while line != END:
             terms = line.split()
 
             try:
                 if terms[0] != b"VALUE":
-                    raise ResponseException(raw_cmd, response_stream.getvalue())
+                    raise ResponseException(raw_cmd, line)
 
                 key = terms[1]
                 if key in values:
                     raise ResponseException(
                         raw_cmd,
-                        response_stream.getvalue(),
+                        line,
                         ext_message="Duplicate results from server",
                     )
 
@@ -468,53 +1388,514 @@ class Client(object):
                 cas = int(terms[4]) if with_cas else None
                 data_len = int(terms[3])
 
-                data = response_stream.read(data_len + 2).rstrip(b"\r\n")
-                if len(data) != data_len:
-                    raise ValueError
+            except (IndexError, ValueError):
+                if not line:
+                    raise ConnectException("connection closed by server")
+                raise ResponseException(raw_cmd, line)
 
-            except ValueError:
-                raise ResponseException(raw_cmd, response_stream.getvalue())
+            # read the data block and its delimiter separately,
+            # slicing the delimiter off would copy the whole data block
+            if as_memoryview:
+                data = memoryview(bytearray(data_len))
+                await readinto(reader, data)
+            else:
+                data = await reader.readexactly(data_len)
+            if await reader.readexactly(2) != b"\r\n":
+                raise ResponseException(
+                    raw_cmd, line, ext_message="data block length mismatch"
+                )
 
             values[key] = data
             info[key] = {
                 "flags": flags,
                 "cas": cas,
             }
+            if len(values) > keys_count:
+                raise ResponseException(
+                    raw_cmd, line, ext_message="received too many responses"
+                )
 
-            line = response_stream.readline()
+            line = await reader.readline()
 
-        if len(values) > len(keys):
-            raise ResponseException(
-                raw_cmd,
-                response_stream.readline(),
-                ext_message="received too many responses",
+        return values, info
+
+    async def _get_one(
+        self, key: bytes, with_cas: bool
+    ) -> (Optional[bytes], Dict[bytes, Optional[int]]):
+        if self._near_cache is None or with_cas:
+            return await self._get_one_uncached(key, with_cas)
+
+        entry = self._near_cache.lookup(key)
+        if entry is not None:
+            return entry
+
+        generation = self._near_cache.generation
+        value, info = await self._get_one_uncached(key, with_cas)
+        self._near_cache.store(key, value, info, generation)
+        return value, info
+
+    async def _get_one_uncached(
+        self, key: bytes, with_cas: bool
+    ) -> (Optional[bytes], Dict[bytes, Optional[int]]):
+        if self._single_flight is not None:
+            return await self._single_flight.do(
+                (b"gets" if with_cas else b"get", key),
+                functools.partial(self._fetch_one, key, with_cas),
             )
+
+        return await self._fetch_one(key, with_cas)
+
+    async def _fetch_one(
+        self, key: bytes, with_cas: bool
+    ) -> (Optional[bytes], Dict[bytes, Optional[int]]):
+        if self._coalescer is not None:
+            self.validate_key(key)
+            return await self._coalescer.get(key, with_cas=with_cas)
+
+        keys = [
+            key,
+        ]
+        values, info = await self._retrieval_command(keys, with_cas=with_cas)
+        return values.get(key), info.get(key, dict())
+
+    def _is_chunked(self, info: Dict[bytes, Optional[int]]) -> bool:
+        return self._large_values and bool(info.get("flags", 0) & CHUNKED_FLAG)
+
+    async def _decode(
+        self, key: bytes, value, info: Dict[bytes, Optional[int]]
+    ) -> (Any, Dict[bytes, Optional[int]]):
+        """Reassembles, decompresses and deserializes a value retrieved with
+        info, as enabled. A value which cannot be is a miss.
+        """
+        values, info = await self._decode_many({key: value}, {key: info})
+        return values.get(key), info.get(key, dict())
+
+    async def _decode_codecs(
+        self,
+        values: Dict[bytes, Any],
+        info: Dict[bytes, Dict[bytes, Optional[int]]],
+    ) -> (Dict[bytes, Any], Dict[bytes, Dict[bytes, Optional[int]]]):
+        """Decompresses and deserializes the values, see decode_values."""
+        size = 0
+        if self._executor is not None:
+            size = sum(
+                len(values[key])
+                for key, item_info in info.items()
+                if item_info["flags"] & (CODEC_FLAGS | TYPE_FLAGS)
+            )
+            if self._offloaded(size) and self._executor_pickles:
+                values = {key: self._picklable(value) for key, value in values.items()}
+
+        values, info, records = await self._run_codec(
+            size, decode_values, self._compressor, self._serializer, values, info
+        )
+        for record in records:
+            self._compressor._record(record)
+
+        if self._memoryview_values and self._compressor is not None:
+            # decompressed
+            values = {
+                key: memoryview(value) if type(value) is bytes else value
+                for key, value in values.items()
+            }
         return values, info
 
+    async def _read_chunked(
+        self, key: bytes, manifest_value, buffer: Optional[memoryview] = None
+    ) -> Optional[memoryview]:
+        """Reads the chunks of a large value concurrently, each one straight
+        into its slice of buffer (a new one by default), returns the value.
+        None if the manifest cannot be read, a chunk is missing (evicted) or
+        the value does not match the checksum.
+        """
+        manifest = ChunkManifest.unpack(manifest_value)
+        if manifest is None or manifest.length > self._large_value_length:
+            return None
+
+        if buffer is None:
+            buffer = memoryview(bytearray(manifest.length))
+        elif manifest.length > len(buffer):
+            raise ValidationException(
+                "A value of {} bytes does not fit the {} bytes buffer".format(
+                    manifest.length, len(buffer)
+                )
+            )
+        else:
+            buffer = buffer[: manifest.length]
+
+        size = manifest.chunk_size
+
+        async def read_chunk(index: int, chunk_key: bytes) -> bool:
+            chunk = buffer[index * size : (index + 1) * size]
+            try:
+                data_len, _ = await self._get_into(chunk_key, chunk)
+            except ValidationException:
+                # larger than the manifest says
+                return False
+
+            return data_len == len(chunk)
+
+        results = await asyncio.gather(
+            *[
+                read_chunk(index, chunk_key)
+                for index, chunk_key in enumerate(manifest.chunk_keys(key))
+            ]
+        )
+        if not all(results) or not manifest.verify(buffer):
+            return None
+
+        return buffer
+
+    async def _get_chunked(
+        self, key: bytes, manifest_value, info: Dict[bytes, Optional[int]]
+    ) -> (Optional[bytes], Dict[bytes, Optional[int]]):
+        buffer = await self._read_chunked(key, manifest_value)
+        if buffer is None:
+            return None, dict()
+
+        # info may be shared with other callers, see SingleFlight
+        info = dict(info, flags=info["flags"] & ~CHUNKED_FLAG)
+        return buffer if self._memoryview_values else buffer.obj, info
+
+    async def _decode_many(
+        self,
+        values: Dict[bytes, bytes],
+        info: Dict[bytes, Dict[bytes, Optional[int]]],
+    ) -> (Dict[bytes, bytes], Dict[bytes, Dict[bytes, Optional[int]]]):
+        """_decode for the results of a multi-key retrieval, the values are
+        decoded in bulk.
+        """
+        chunked_keys = [
+            key for key, item_info in info.items() if self._is_chunked(item_info)
+        ]
+        if chunked_keys:
+            values, info = dict(values), dict(info)
+            results = await asyncio.gather(
+                *[
+                    self._get_chunked(key, values[key], info[key])
+                    for key in chunked_keys
+                ]
+            )
+            for key, (value, item_info) in zip(chunked_keys, results):
+                if value is None:
+                    del values[key]
+                    del info[key]
+                else:
+                    values[key], info[key] = value, item_info
+
+        if self._compressor is None and self._serializer is None:
+            return values, info
+
+        return await self._decode_codecs(values, info)
+
     async def get(
         self, key: bytes, default: bytes = None
     ) -> (bytes, Dict[bytes, Optional[int]]):
         """Gets a single value from the server."""
-        keys = [
-            key,
-        ]
-        values, info = await self._retrieval_command(keys)
-
-        return values.get(key, default), info.get(key, dict())
+        value, info = await self._get_one(key, with_cas=False)
+        if value is not None and self._decode_values:
+            value, info = await self._decode(key, value, info)
+        return default if value is None else value, info
 
     async def gets(
         self, key: bytes, default: bytes = None
     ) -> (bytes, Dict[bytes, Optional[int]]):
         """Gets a single value from the server together with the cas token."""
-        keys = [
-            key,
-        ]
-        values, info = await self._retrieval_command(keys, with_cas=True)
-        return values.get(key, default), info.get(key, dict())
+        value, info = await self._get_one(key, with_cas=True)
+        if value is not None and self._decode_values:
+            value, info = await self._decode(key, value, info)
+        return default if value is None else value, info
+
+    async def get_into(
+        self, key: bytes, buffer
+    ) -> (Optional[int], Dict[bytes, Optional[int]]):
+        """Gets a single value from the server into a caller-supplied writable
+        buffer (bytearray, memoryview, mmap, ...) and returns its length,
+        None if the key is not found.
+
+        With buffered_protocol the value is received from the socket straight
+        into the buffer.
+
+        The value is decompressed, not deserialized: the type bits are kept
+        in the flags, see Serializer.loads.
+        """
+        buffer = memoryview(buffer).cast("B")
+        data_len, info = await self._get_into(key, buffer)
+        if data_len is None:
+            return data_len, info
+
+        if self._is_chunked(info):
+            value = await self._read_chunked(key, bytes(buffer[:data_len]), buffer)
+            if value is None:
+                return None, dict()
+
+            data_len = len(value)
+            info = dict(info, flags=info["flags"] & ~CHUNKED_FLAG)
+
+        if self._compressor is not None and info["flags"] & CODEC_FLAGS:
+            values, infos, records = await self._run_codec(
+                data_len,
+                decode_values,
+                self._compressor,
+                None,
+                {key: bytes(buffer[:data_len])},
+                {key: info},
+            )
+            for record in records:
+                self._compressor._record(record)
+            if key not in values:
+                return None, dict()
 
-    async def get_many(
-        self, keys: List[bytes]
-    ) -> (  # TODO default?!
+            value, info = values[key], infos[key]
+
+            if len(value) > len(buffer):
+                raise ValidationException(
+                    "A value of {} bytes does not fit the {} bytes buffer".format(
+                        len(value), len(buffer)
+                    )
+                )
+            data_len = len(value)
+            buffer[:data_len] = value
+
+        return data_len, info
+
+    async def _get_into(
+        self, key: bytes, buffer: memoryview
+    ) -> (Optional[int], Dict[bytes, Optional[int]]):
+        self.validate_key(key)
+
+        raw_cmd = b"get %b\r\n" % key
+        data_len, info = await self._execute_raw_cmd(
+            cmd=raw_cmd,
+            read_response=functools.partial(
+                self._read_retrieval_into, raw_cmd=raw_cmd, buffer=buffer
+            ),
+            keys=(key,),
+        )
+        if self._metrics is not None:
+            self._metrics.record_retrieval(1, data_len is not None)
+        if data_len is not None and data_len > len(buffer):
+            raise ValidationException(
+                "A value of {} bytes does not fit the {} bytes buffer".format(
+                    data_len, len(buffer)
+                )
+            )
+
+        return data_len, info
+
+    @staticmethod
+    async def _read_retrieval_into(
+        reader: asyncio.StreamReader, raw_cmd: bytes, buffer: memoryview
+    ) -> (Optional[int], Dict[bytes, Optional[int]]):
+        """Reads a single item response into buffer. A value larger than
+        buffer is skipped, the caller gets its length and decides.
+        """
+        line = await reader.readline()
+        if line == END:
+            return None, dict()
+
+        terms = line.split()
+        try:
+            if terms[0] != b"VALUE":
+                raise ResponseException(raw_cmd, line)
+
+            flags = int(terms[2])
+            data_len = int(terms[3])
+
+        except (IndexError, ValueError):
+            if not line:
+                raise ConnectException("connection closed by server")
+            raise ResponseException(raw_cmd, line)
+
+        if data_len <= len(buffer):
+            await readinto(reader, buffer[:data_len])
+        else:
+            await reader.readexactly(data_len)
+
+        if await reader.readexactly(2) != b"\r\n":
+            raise ResponseException(
+                raw_cmd, line, ext_message="data block length mismatch"
+            )
+        line = await reader.readline()
+        if line != END:
+            raise ResponseException(raw_cmd, line)
+
+        return data_len, {"flags": flags, "cas": None}
+
+    async def get_stream(
+        self, key: bytes, chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE
+    ) -> Optional[ValueStream]:
+        """Gets a single value as a stream of data chunks of up to chunk_size
+        bytes, received from the socket as they are consumed, None if the key
+        is not found. The memory used is bounded by chunk_size, not by the
+        length of the value.
+
+        The stream holds a connection of the pool until it has been read to
+        the end or closed, see ValueStream. With pipeline, the pooled
+        connections may all be held by the pipelines: the stream opens a
+        connection of its own, closed after use.
+
+        The hooks, the metrics and the slowlog see the command up to the item
+        line, the data block is read at the pace of the consumer.
+
+        Compressed and serialized values are streamed as stored, the codec and
+        type bits are kept in the flags of the stream info: see
+        Compressor.decompress and Serializer.loads.
+        """
+        if chunk_size < 1:
+            raise ValidationException(
+                "chunk_size:[{}] must be a positive integer".format(chunk_size)
+            )
+
+        stream = await self._open_stream(key, chunk_size)
+        if stream is None or not self._is_chunked(stream.info):
+            return stream
+
+        manifest_value = b"".join([chunk async for chunk in stream])
+        manifest = ChunkManifest.unpack(manifest_value)
+        if manifest is None:
+            return None
+
+        info = dict(stream.info, flags=stream.info["flags"] & ~CHUNKED_FLAG)
+        return ChunkedValueStream(
+            manifest.length,
+            info,
+            chunk_size,
+            manifest,
+            manifest.chunk_keys(key),
+            self._open_stream,
+        )
+
+    async def _open_stream(self, key: bytes, chunk_size: int) -> Optional[ValueStream]:
+        self.validate_key(key)
+
+        raw_cmd = self._stream_cmd(key)
+        read_head = functools.partial(
+            self._read_response,
+            functools.partial(self._read_stream_head, raw_cmd=raw_cmd),
+        )
+        if self._hooks or self._metrics is not None:
+            conn, head = await self._open_hooked_stream(key, raw_cmd, read_head)
+        else:
+            conn, head = await self._open_stream_conn(raw_cmd, read_head)
+
+        if head is None:
+            await self._release_stream_conn(conn, True)
+            return None
+
+        data_len, info = head
+        return ValueStream(
+            data_len,
+            info,
+            chunk_size,
+            read=functools.partial(self._read_response, reader=conn.reader),
+            read_trailer=functools.partial(self._read_stream_trailer, raw_cmd=raw_cmd),
+            release=functools.partial(self._release_stream_conn, conn),
+        )
+
+    async def _open_stream_conn(
+        self,
+        raw_cmd: bytes,
+        read_head,
+        event: Optional[CommandEvent] = None,
+        hooks: Tuple[CommandHook, ...] = (),
+    ) -> Tuple[MemcachedConnection, Any]:
+        """Writes raw_cmd on the connection the stream holds, returns it and
+        the head of the response.
+        """
+        if self._pipeline:
+            # the pipelines may hold every pooled connection for good
+            conn = await self._pool.open_unpooled()
+        else:
+            conn = await self._pool.acquire()
+        if event is not None:
+            self._acquired(event, hooks, conn)
+
+        try:
+            synced = conn.write(raw_cmd)
+            return conn, await read_head(conn.reader, synced=synced)
+
+        except BaseException:
+            await self._release_stream_conn(conn, False)
+            raise
+
+    async def _open_hooked_stream(
+        self, key: bytes, raw_cmd: bytes, read_head
+    ) -> Tuple[MemcachedConnection, Any]:
+        hooks = self._hooks
+        name = self._command_name(raw_cmd)
+        event = CommandEvent(name.decode(), (key,), raw_cmd, time.perf_counter())
+        if hooks:
+            read_head = functools.partial(
+                self._read_hooked_response, event, hooks, read_head
+            )
+
+        for hook in hooks:
+            hook.on_start(event)
+
+        try:
+            return await self._open_stream_conn(raw_cmd, read_head, event, hooks)
+
+        except BaseException as e:
+            event.exception = e
+            if self._metrics is not None and isinstance(e, TimeoutException):
+                self._metrics.timeouts += 1
+            raise
+
+        finally:
+            event.finished = time.perf_counter()
+            if self._metrics is not None:
+                self._metrics.record(name, event.finished - event.started, len(raw_cmd))
+            for hook in hooks:
+                hook.on_complete(event)
+
+    async def _release_stream_conn(
+        self, conn: MemcachedConnection, reusable: bool
+    ) -> None:
+        if reusable and not self._pipeline:
+            await self._pool.release(conn)
+        else:
+            await self._pool.dispose(conn)
+
+    @staticmethod
+    def _stream_cmd(key: bytes) -> bytes:
+        return b"get %b\r\n" % key
+
+    @staticmethod
+    async def _read_stream_head(
+        reader: asyncio.StreamReader, raw_cmd: bytes
+    ) -> Optional[Tuple[int, Dict[bytes, Optional[int]]]]:
+        """Reads the item line, returns the length of the data block and the
+        info, None if the key is not found.
+        """
+        line = await reader.readline()
+        if line == END:
+            return None
+
+        terms = line.split()
+        try:
+            if terms[0] != b"VALUE":
+                raise ResponseException(raw_cmd, line)
+
+            return int(terms[3]), {"flags": int(terms[2]), "cas": None}
+
+        except (IndexError, ValueError):
+            if not line:
+                raise ConnectException("connection closed by server")
+            raise ResponseException(raw_cmd, line)
+
+    @staticmethod
+    async def _read_stream_trailer(reader: asyncio.StreamReader, raw_cmd: bytes):
+        if await reader.readexactly(2) != b"\r\n":
+            raise ResponseException(
+                raw_cmd, b"", ext_message="data block length mismatch"
+            )
+
+        line = await reader.readline()
+        if line != END:
+            raise ResponseException(raw_cmd, line)
+
+    async def get_many(self, keys: List[bytes]) -> (  # TODO default?!
         Dict[bytes, bytes],
         Dict[bytes, Dict[bytes, Optional[int]]],
     ):
@@ -525,7 +1906,41 @@ class Client(object):
 
         keys = list(set(keys))  # ignore duplicate keys error
 
-        values, info = await self._retrieval_command(keys)
+        if self._near_cache is not None:
+            values, info = await self._get_many_cached(keys)
+        else:
+            values, info = await self._retrieval_command(keys)
+
+        if self._decode_values:
+            values, info = await self._decode_many(values, info)
+        return values, info
+
+    async def _get_many_cached(
+        self, keys: List[bytes]
+    ) -> (Dict[bytes, bytes], Dict[bytes, Dict[bytes, Optional[int]]]):
+        values = {}
+        info = {}
+        missing_keys = []
+        for key in keys:
+            entry = self._near_cache.lookup(key)
+            if entry is None:
+                missing_keys.append(key)
+            elif entry[0] is not None:
+                values[key], info[key] = entry
+
+        if missing_keys:
+            generation = self._near_cache.generation
+            fetched_values, fetched_info = await self._retrieval_command(missing_keys)
+            for key in missing_keys:
+                self._near_cache.store(
+                    key,
+                    fetched_values.get(key),
+                    fetched_info.get(key, dict()),
+                    generation,
+                )
+            values.update(fetched_values)
+            info.update(fetched_info)
+
         return values, info
 
     async def gets_many(
@@ -541,6 +1956,8 @@ class Client(object):
         keys = list(set(keys))  # ignore duplicate keys error
 
         values, info = await self._retrieval_command(keys, with_cas=True)
+        if self._decode_values:
+            values, info = await self._decode_many(values, info)
         return values, info
 
     async def multi_get(self, *args):
@@ -554,7 +1971,210 @@ class Client(object):
         values, _ = await self.get_many(keys)
         return tuple(values.get(key) for key in keys)
 
-    async def delete(self, key: bytes) -> bool:
+    async def get_or_set(
+        self,
+        key: bytes,
+        loader: Callable[[], Any],
+        ttl: int,
+        flags: int = 0,
+        beta: float = DEFAULT_XFETCH_BETA,
+        stale_ttl: int = 0,
+    ) -> Any:
+        """Cache-aside: the value of key, or on a miss the result of loader()
+        (a function or a coroutine function) stored for ttl seconds.
+
+        The value is stored in an envelope with the time loader took and its
+        expiry (see xfetch): before the expiry, a caller recomputes it ahead
+        of time with a probability growing as the expiry approaches, so
+        that one caller refreshes a hot key while the others keep getting
+        the cached value. beta > 1 favours earlier recomputations, 0
+        disables them.
+
+        stale_ttl: the item is kept stale_ttl seconds past its expiry, in
+          which it is returned stale while a background task recomputes it.
+          The early recomputations run in the background too. A failed
+          background recomputation is dropped, the next caller retries.
+
+        The recomputations of a key by this client are shared (see
+        SingleFlight). The keys must only be written and read with
+        get_or_set, their values carry the envelope.
+        """
+        recompute = functools.partial(
+            self._recompute, key, loader, ttl, flags, stale_ttl
+        )
+        cached = await self._get_enveloped(key)
+        if cached is None:
+            return await self._recomputes.do(key, recompute)
+
+        value, delta, expiry = cached
+        now = time.time()
+        if now < expiry and not (beta and should_recompute(delta, expiry, beta, now)):
+            return value
+
+        if not stale_ttl:
+            return await self._recomputes.do(key, recompute)
+
+        if key not in self._recomputes:
+            self._recomputes.start(key, recompute)
+        return value
+
+    async def _get_enveloped(self, key: bytes) -> Optional[Tuple[Any, float, float]]:
+        """(value, delta, expiry) of a get_or_set key, None on a miss."""
+        value, info = await self._get_one(key, with_cas=False)
+        if value is not None and self._is_chunked(info):
+            value, info = await self._get_chunked(key, value, info)
+        if value is None:
+            return None
+
+        envelope = unpack_envelope(value)
+        if envelope is None:
+            return None
+
+        delta, expiry, value = envelope
+        if self._compressor is not None or self._serializer is not None:
+            values, _ = await self._decode_codecs({key: value}, {key: info})
+            value = values.get(key)
+            if value is None:
+                return None
+
+        return value, delta, expiry
+
+    async def _recompute(
+        self,
+        key: bytes,
+        loader: Callable[[], Any],
+        ttl: int,
+        flags: int,
+        stale_ttl: int,
+    ) -> Any:
+        started = time.perf_counter()
+        value = loader()
+        if inspect.isawaitable(value):
+            value = await value
+        delta = time.perf_counter() - started
+
+        encoded, encoded_flags = await self._encode(value, flags)
+        await self._store_encoded(
+            b"set",
+            key,
+            pack_envelope(encoded, delta, time.time() + ttl),
+            encoded_flags,
+            ttl + stale_ttl,
+            False,
+        )
+        return value
+
+    async def get_with_lease(
+        self,
+        key: bytes,
+        lease_ttl: int = DEFAULT_LEASE_TTL,
+        wait: float = DEFAULT_LEASE_WAIT,
+        serve_stale: bool = True,
+        meta: Optional[bool] = None,
+    ) -> Tuple[Any, Optional[Lease]]:
+        """Gets a value, the first caller missing it (cluster-wide) gets a
+        lease to recompute it, the others wait for it: returns
+        (value, None) on a hit, (None, lease) to the winner, which passes
+        lease to set_with_lease with the new value.
+
+        The others retry with a bounded exponential backoff for up to wait
+        seconds, then get (None, None). A lease expires after lease_ttl
+        seconds, the next caller wins a new one.
+
+        meta: with the meta protocol (the default, BinaryClient: add), the
+          lease is a vivified item (mg N flag) and its cas. An item
+          invalidated with meta_delete(invalidate=True) is stale: the winner
+          gets (stale value, lease) and, with serve_stale, the others get
+          (stale value, None) instead of waiting. Values set with the lease
+          are not chunked.
+          Without, the lease is a random token added to key + b":lease"
+          (see lease_key) for lease_ttl seconds.
+        """
+        if meta is None:
+            meta = self._lease_meta
+
+        deadline = time.monotonic() + wait
+        attempt = 0
+        while True:
+            if meta:
+                value, lease, stale = await self._meta_lease(key, lease_ttl)
+            else:
+                value, lease, stale = await self._add_lease(key, lease_ttl)
+
+            if lease is not None or (value is not None and (serve_stale or not stale)):
+                return value, lease
+
+            delay = backoff(attempt)
+            if time.monotonic() + delay > deadline:
+                return None, None
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _meta_lease(
+        self, key: bytes, lease_ttl: int
+    ) -> Tuple[Any, Optional[Lease], bool]:
+        """(value, lease, stale): W win, Z the win of another caller, X stale"""
+        response = await self.meta_get(key, (b"v", b"c", b"f", b"N%d" % lease_ttl))
+        flags = response.flags
+        stale = b"X" in flags
+        lease = None
+        if b"W" in flags:
+            lease = Lease(key, int(flags[b"c"]), meta=True)
+
+        vivified = b"W" in flags or b"Z" in flags
+        if response.status != b"VA" or (vivified and not stale):
+            # missed, or the value is the empty item vivified for the winner
+            return None, lease, stale
+
+        value, info = response.value, {"flags": int(flags.get(b"f", 0)), "cas": None}
+        if self._decode_values:
+            value, _ = await self._decode(key, value, info)
+        return value, lease, stale
+
+    async def _add_lease(
+        self, key: bytes, lease_ttl: int
+    ) -> Tuple[Any, Optional[Lease], bool]:
+        value, _ = await self.get(key)
+        if value is not None:
+            return value, None, False
+
+        token = os.urandom(8).hex().encode()
+        if not await self.add(lease_key(key), token, exptime=lease_ttl):
+            return None, None, False
+
+        # the previous winner may have set the value and released its lease
+        # between the get and the add
+        value, _ = await self.get(key)
+        if value is not None:
+            await self.delete(lease_key(key))
+            return value, None, False
+        return None, Lease(key, token, meta=False), False
+
+    async def set_with_lease(
+        self, key: bytes, value: Any, lease: Lease, flags: int = 0, exptime: int = 0
+    ) -> bool:
+        """Stores the value recomputed with lease, from get_with_lease, and
+        returns whether it has been stored.
+
+        meta protocol: it is stored if the lease is still held (the item cas
+        is unchanged). add: it is always stored, then the lease released
+        unless it has expired and been won by another caller since.
+        """
+        if lease.meta:
+            value, flags = await self._encode(value, flags)
+            response = await self.meta_set(
+                key, value, flags=flags, exptime=exptime, cas=lease.token
+            )
+            return response.status == b"HD"
+
+        stored = await self.set(key, value, flags=flags, exptime=exptime)
+        token, _ = await self.get(lease_key(key))
+        if token == lease.token:
+            await self.delete(lease_key(key))
+        return stored
+
+    async def delete(self, key: bytes, noreply: bool = False) -> Optional[bool]:
         """
         Deletion
         --------
@@ -582,10 +2202,14 @@ class Client(object):
         # validate key
         self.validate_key(key)
 
-        raw_cmd = b"delete %b\r\n" % key
+        raw_cmd = b"delete %b%b\r\n" % (key, b" noreply" if noreply else b"")
         response_stream = await self._execute_raw_cmd(
-            cmd=raw_cmd, one_line_response=True
+            cmd=raw_cmd, one_line_response=True, noreply=noreply, keys=(key,)
         )
+        self._key_written(key)
+        if noreply:
+            return None
+
         response = response_stream.readline()
         if response == DELETED:
             return True
@@ -596,7 +2220,59 @@ class Client(object):
 
         raise ResponseException(raw_cmd, response_stream.getvalue())
 
-    async def _incr_decr(self, cmd: bytes, key: bytes, value: int) -> Optional[int]:
+    async def delete_many(
+        self,
+        keys: Iterable[bytes],
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        concurrency: Optional[int] = None,
+    ) -> Dict[bytes, bool]:
+        """Deletes many keys and returns {key: deleted}, see set_many."""
+        keys = list(keys)
+        [self.validate_key(key) for key in keys]
+
+        raw_cmds = [b"delete %b\r\n" % key for key in keys]
+        responses = await self._execute_many(
+            raw_cmds, batch_size, concurrency, keys=keys
+        )
+
+        return self._bulk_results(keys, raw_cmds, responses, DELETED)
+
+    def _bulk_results(
+        self,
+        keys: List[bytes],
+        raw_cmds: List[bytes],
+        responses: List[bytes],
+        success: bytes,
+    ) -> Dict[bytes, bool]:
+        """{key: response is success} of delete_many or touch_many, NOT_FOUND
+        is False.
+
+        An unexpected response raises ResponseException once every key has
+        been accounted for, with the results of the other keys as its
+        results attribute.
+        """
+        result = {}
+        error = None
+        for key, raw_cmd, response in zip(keys, raw_cmds, responses):
+            self._key_written(key)
+            if response == success:
+                result[key] = True
+
+            elif response == NOT_FOUND:
+                result[key] = False
+
+            elif error is None:
+                error = ResponseException(raw_cmd, response)
+
+        if error is not None:
+            error.results = result
+            raise error
+
+        return result
+
+    async def _incr_decr(
+        self, cmd: bytes, key: bytes, value: int, noreply: bool = False
+    ) -> Optional[int]:
         """
         Increment/Decrement
         -------------------
@@ -651,10 +2327,19 @@ class Client(object):
                 "value:[{}]  must be unsigned integer".format(value)
             )
 
-        raw_cmd = b"%b %b %d\r\n" % (cmd, key, value)
+        raw_cmd = b"%b %b %d%b\r\n" % (
+            cmd,
+            key,
+            value,
+            b" noreply" if noreply else b"",
+        )
         response_stream = await self._execute_raw_cmd(
-            cmd=raw_cmd, one_line_response=True
+            cmd=raw_cmd, one_line_response=True, noreply=noreply, keys=(key,)
         )
+        self._key_written(key)
+        if noreply:
+            return None
+
         response = response_stream.readline()
 
         try:
@@ -670,7 +2355,7 @@ class Client(object):
         return new_value
 
     async def incr(
-        self, key: bytes, value: int = 1, increment: int = None
+        self, key: bytes, value: int = 1, increment: int = None, noreply: bool = False
     ) -> Optional[int]:
         if increment:
             warnings.warn(
@@ -679,10 +2364,10 @@ class Client(object):
                 DeprecationWarning,
             )
             value = increment
-        return await self._incr_decr(cmd=b"incr", key=key, value=value)
+        return await self._incr_decr(cmd=b"incr", key=key, value=value, noreply=noreply)
 
     async def decr(
-        self, key: bytes, value: int = 1, decrement: int = None
+        self, key: bytes, value: int = 1, decrement: int = None, noreply: bool = False
     ) -> Optional[int]:
         if decrement:
             warnings.warn(
@@ -691,9 +2376,11 @@ class Client(object):
                 DeprecationWarning,
             )
             value = decrement
-        return await self._incr_decr(cmd=b"decr", key=key, value=value)
+        return await self._incr_decr(cmd=b"decr", key=key, value=value, noreply=noreply)
 
-    async def touch(self, key: bytes, exptime: int) -> bool:
+    async def touch(
+        self, key: bytes, exptime: int, noreply: bool = False
+    ) -> Optional[bool]:
         """
         Touch
         -----
@@ -723,11 +2410,20 @@ class Client(object):
         """
         # validate key
         self.validate_key(key)
+        self._validate_exptime(exptime)
 
-        raw_cmd = b"touch %b %d\r\n" % (key, exptime)
+        raw_cmd = b"touch %b %d%b\r\n" % (
+            key,
+            exptime,
+            b" noreply" if noreply else b"",
+        )
         response_stream = await self._execute_raw_cmd(
-            cmd=raw_cmd, one_line_response=True
+            cmd=raw_cmd, one_line_response=True, noreply=noreply, keys=(key,)
         )
+        self._key_written(key)
+        if noreply:
+            return None
+
         response = response_stream.readline()
 
         if response == TOUCHED:
@@ -739,6 +2435,25 @@ class Client(object):
 
         raise ResponseException(raw_cmd, response_stream.getvalue())
 
+    async def touch_many(
+        self,
+        keys: Iterable[bytes],
+        exptime: int,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        concurrency: Optional[int] = None,
+    ) -> Dict[bytes, bool]:
+        """Touches many keys and returns {key: touched}, see set_many."""
+        keys = list(keys)
+        [self.validate_key(key) for key in keys]
+        self._validate_exptime(exptime)
+
+        raw_cmds = [b"touch %b %d\r\n" % (key, exptime) for key in keys]
+        responses = await self._execute_many(
+            raw_cmds, batch_size, concurrency, keys=keys
+        )
+
+        return self._bulk_results(keys, raw_cmds, responses, TOUCHED)
+
     async def stats(self, args: bytes = None) -> dict:
         """
         Statistics
@@ -837,9 +2552,263 @@ class Client(object):
         response_stream = await self._execute_raw_cmd(
             cmd=raw_cmd, one_line_response=True
         )
+        if self._near_cache is not None:
+            self._near_cache.clear()
         response = response_stream.readline()
 
         if not response.startswith(OK):
             raise ResponseException(raw_cmd, response_stream.getvalue())
 
         return True
+
+    async def _meta_command(
+        self,
+        cmd: bytes,
+        key: bytes,
+        meta_flags: Iterable[bytes],
+        value: Optional[bytes] = None,
+    ) -> MetaResponse:
+        raw_cmd = build_meta_cmd(cmd, key, meta_flags, value)
+        return await self._execute_raw_cmd(
+            cmd=raw_cmd,
+            read_response=functools.partial(read_meta_response, raw_cmd=raw_cmd),
+            keys=(key,),
+        )
+
+    async def meta_get(
+        self, key: bytes, meta_flags: Iterable[bytes] = (b"v", b"f")
+    ) -> MetaResponse:
+        """
+        Meta Get
+        --------
+
+        mg <key> <flags>*\r\n
+
+        The flags select what is returned, the most common ones:
+
+        - v: return item value in <data block>
+        - c: return item cas token
+        - f: return client flags token
+        - t: return item TTL remaining in seconds (-1 for unlimited)
+        - k: return key as a token
+        - s: return item size token
+        - T(token): update remaining TTL
+        - N(token): vivify on miss, takes TTL as a argument
+        - R(token): if remaining TTL is less than token, win for recache
+
+        The response is "VA <size> <flags>*\r\n<data block>\r\n" with the v
+        flag, "HD <flags>*\r\n" without, or "EN\r\n" on a miss.
+
+        Keys which are not valid text keys are sent base64 encoded.
+        """
+        return await self._meta_command(b"mg", key, meta_flags)
+
+    async def meta_set(
+        self,
+        key: bytes,
+        value: bytes,
+        flags: int = 0,
+        exptime: int = 0,
+        cas: Optional[int] = None,
+        mode: Optional[bytes] = None,
+        meta_flags: Iterable[bytes] = (),
+    ) -> MetaResponse:
+        """
+        Meta Set
+        --------
+
+        ms <key> <datalen> <flags>*\r\n
+        <data block>\r\n
+
+        flags, exptime and cas are sent as the F, T and C flags. mode (M flag)
+        is one of b"S" (set, the default), b"E" (add), b"A" (append),
+        b"P" (prepend) or b"R" (replace).
+
+        The response is "HD" (stored), "NS" (not stored), "EX" (cas mismatch)
+        or "NF" (not found, for cas).
+        """
+        self.validate_value(value)
+        meta_flags = self._meta_storage_flags(flags, exptime, cas, mode, meta_flags)
+
+        response = await self._meta_command(b"ms", key, meta_flags, value)
+        self._key_written(key)
+        return response
+
+    @staticmethod
+    def _meta_storage_flags(
+        flags: int,
+        exptime: int,
+        cas: Optional[int],
+        mode: Optional[bytes],
+        meta_flags: Iterable[bytes],
+    ) -> List[bytes]:
+        if flags < 0 or exptime < 0:
+            raise ValidationException(
+                "flags:[{}] and exptime:[{}] must be unsigned integer"
+                "".format(flags, exptime)
+            )
+
+        meta_flags = list(meta_flags)
+        if flags:
+            meta_flags.append(b"F%d" % flags)
+        if exptime:
+            meta_flags.append(b"T%d" % exptime)
+        if cas:
+            meta_flags.append(b"C%d" % cas)
+        if mode:
+            meta_flags.append(b"M%b" % mode)
+
+        return meta_flags
+
+    async def meta_delete(
+        self,
+        key: bytes,
+        cas: Optional[int] = None,
+        invalidate: bool = False,
+        meta_flags: Iterable[bytes] = (),
+    ) -> MetaResponse:
+        """
+        Meta Delete
+        -----------
+
+        md <key> <flags>*\r\n
+
+        With invalidate (I flag) the item is marked stale instead of being
+        deleted, the next meta_get wins the right to recache it.
+
+        The response is "HD" (deleted), "NF" (not found) or "EX" (cas
+        mismatch).
+        """
+        meta_flags = list(meta_flags)
+        if cas:
+            meta_flags.append(b"C%d" % cas)
+        if invalidate:
+            meta_flags.append(b"I")
+
+        response = await self._meta_command(b"md", key, meta_flags)
+        self._key_written(key)
+        return response
+
+    async def meta_arithmetic(
+        self,
+        key: bytes,
+        delta: int = 1,
+        decr: bool = False,
+        initial: Optional[int] = None,
+        initial_exptime: int = 0,
+        meta_flags: Iterable[bytes] = (b"v",),
+    ) -> MetaResponse:
+        """
+        Meta Arithmetic
+        ---------------
+
+        ma <key> <flags>*\r\n
+
+        Increments (decrements with decr) the item by delta. With initial, a
+        missing item is created with this value and initial_exptime
+        (J and N flags) instead of failing with "NF".
+
+        With the v flag the response is "VA" and the new value.
+        """
+        if delta < 0 or not isinstance(delta, int):
+            raise ValidationException(
+                "delta:[{}]  must be unsigned integer".format(delta)
+            )
+
+        meta_flags = list(meta_flags)
+        meta_flags.append(b"D%d" % delta)
+        if decr:
+            meta_flags.append(b"MD")
+        if initial is not None:
+            meta_flags.extend([b"J%d" % initial, b"N%d" % initial_exptime])
+
+        response = await self._meta_command(b"ma", key, meta_flags)
+        self._key_written(key)
+        return response
+
+    async def meta_get_many(
+        self,
+        keys: Iterable[bytes],
+        meta_flags: Iterable[bytes] = (b"v", b"f"),
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        concurrency: Optional[int] = None,
+    ) -> Dict[bytes, MetaResponse]:
+        """Gets many keys with quiet meta gets and returns {key: response} for
+        the hits only.
+
+        Each batch of batch_size mg is followed by an mn, the server only
+        answers the hits and the MN. The responses are matched to their keys
+        by opaque (O) tokens, meta_flags must not contain q or O.
+        """
+        keys = list(dict.fromkeys(keys))
+        meta_flags = list(meta_flags)
+        raw_cmds = [
+            build_meta_cmd(b"mg", key, meta_flags + [b"q", b"O%d" % i])
+            for i, key in enumerate(keys)
+        ]
+
+        responses = await self._execute_many(
+            raw_cmds,
+            batch_size,
+            concurrency,
+            read_batch=read_meta_batch,
+            terminator=META_NOOP,
+            keys=keys,
+        )
+        return {self._meta_opaque_key(keys, r): r for r in responses}
+
+    async def meta_set_many(
+        self,
+        items: Iterable[Tuple[bytes, bytes]],
+        flags: int = 0,
+        exptime: int = 0,
+        mode: Optional[bytes] = None,
+        meta_flags: Iterable[bytes] = (),
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        concurrency: Optional[int] = None,
+    ) -> Dict[bytes, bool]:
+        """Stores many items, a dict or (key, value) pairs, with quiet meta sets
+        and returns {key: stored}. The server only answers the failures,
+        see meta_get_many.
+        """
+        if isinstance(items, dict):
+            items = items.items()
+
+        meta_flags = self._meta_storage_flags(flags, exptime, None, mode, meta_flags)
+
+        keys, raw_cmds = [], []
+        for key, value in items:
+            self.validate_value(value)
+            raw_cmds.append(
+                build_meta_cmd(
+                    b"ms", key, meta_flags + [b"q", b"O%d" % len(keys)], value
+                )
+            )
+            keys.append(key)
+
+        responses = await self._execute_many(
+            raw_cmds,
+            batch_size,
+            concurrency,
+            read_batch=read_meta_batch,
+            terminator=META_NOOP,
+            keys=keys,
+        )
+
+        result = dict.fromkeys(keys, True)
+        for response in responses:
+            result[self._meta_opaque_key(keys, response)] = False
+        for key in keys:
+            self._key_written(key)
+
+        return result
+
+    @staticmethod
+    def _meta_opaque_key(keys: List[bytes], response: MetaResponse) -> bytes:
+        try:
+            return keys[int(response.opaque)]
+
+        except (TypeError, ValueError, IndexError):
+            raise ResponseException(
+                META_NOOP, response, ext_message="unexpected opaque token"
+            )
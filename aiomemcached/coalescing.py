@@ -0,0 +1,105 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .constants import DEFAULT_COALESCE_MAX_KEYS
+from .exceptions import ConnectException
+
+__all__ = ["GetCoalescer"]
+
+RetrievalFunc = Callable[[List[bytes], bool], Awaitable[tuple]]
+
+
+class GetCoalescer:
+    """Coalesces the single key retrievals of concurrent coroutines.
+
+    Keys requested within window seconds (0: within the current event loop
+    iteration) are fetched with one multi-key get (or gets), each caller
+    gets the result of its own key. A batch is sent early once it holds
+    max_keys distinct keys.
+    """
+
+    def __init__(
+        self,
+        retrieve: RetrievalFunc,
+        window: float = 0,
+        max_keys: int = DEFAULT_COALESCE_MAX_KEYS,
+    ):
+        """
+        retrieve: async (keys, with_cas) -> (values, info),
+          as Client._retrieval_command
+        """
+        self._retrieve = retrieve
+        self._window = window
+        self._max_keys = max_keys
+
+        # with_cas -> {key: [future, ...]}
+        self._batches = {False: {}, True: {}}
+        self._timers = {}  # with_cas -> asyncio.Handle
+        self._tasks = set()
+
+    async def get(
+        self, key: bytes, with_cas: bool = False
+    ) -> (Optional[bytes], Dict[bytes, Optional[int]]):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch = self._batches[with_cas]
+        batch.setdefault(key, []).append(future)
+
+        if len(batch) >= self._max_keys:
+            self._flush(with_cas)
+
+        elif with_cas not in self._timers:
+            if self._window:
+                self._timers[with_cas] = loop.call_later(
+                    self._window, self._flush, with_cas
+                )
+            else:
+                self._timers[with_cas] = loop.call_soon(self._flush, with_cas)
+
+        return await future
+
+    def _flush(self, with_cas: bool) -> None:
+        timer = self._timers.pop(with_cas, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._batches[with_cas]
+        if not batch:
+            return
+
+        self._batches[with_cas] = {}
+        task = asyncio.ensure_future(self._fetch(batch, with_cas))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch: Dict[bytes, list], with_cas: bool) -> None:
+        try:
+            values, info = await self._retrieve(list(batch), with_cas)
+
+        except BaseException as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return
+
+        for key, futures in batch.items():
+            result = values.get(key), info.get(key, dict())
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
+
+    def close(self) -> None:
+        """Fails the batches not sent yet."""
+        for with_cas in list(self._timers):
+            self._timers.pop(with_cas).cancel()
+
+        for with_cas, batch in list(self._batches.items()):
+            self._batches[with_cas] = {}
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(ConnectException("client closed"))
@@ -0,0 +1,209 @@
+import bz2
+import lzma
+import time
+import zlib
+from typing import Callable, Dict, Optional, Tuple
+
+from .constants import DEFAULT_COMPRESS_THRESHOLD
+from .exceptions import ValidationException
+
+__all__ = ["Compressor", "CODEC_FLAGS"]
+
+# flags bits 28-30 hold the codec id of a compressed value, 0: not compressed
+_CODEC_SHIFT = 28
+CODEC_FLAGS = 0b111 << _CODEC_SHIFT
+
+
+class _Codec:
+    __slots__ = ("name", "codec_id", "compress", "decompress")
+
+    def __init__(
+        self,
+        name: str,
+        codec_id: int,
+        compress: Callable[[bytes, Optional[int]], bytes],
+        decompress: Callable[[bytes], bytes],
+    ):
+        self.name = name
+        self.codec_id = codec_id
+        self.compress = compress
+        self.decompress = decompress
+
+
+def _zlib_compress(data: bytes, level: Optional[int]) -> bytes:
+    return zlib.compress(data, -1 if level is None else level)
+
+
+def _bz2_compress(data: bytes, level: Optional[int]) -> bytes:
+    return bz2.compress(data, 9 if level is None else level)
+
+
+def _lzma_compress(data: bytes, level: Optional[int]) -> bytes:
+    return lzma.compress(data, preset=level)
+
+
+_CODECS = {
+    codec.name: codec
+    for codec in (
+        _Codec("zlib", 1, _zlib_compress, zlib.decompress),
+        _Codec("bz2", 2, _bz2_compress, bz2.decompress),
+        _Codec("lzma", 3, _lzma_compress, lzma.decompress),
+    )
+}
+_CODECS_BY_ID = {codec.codec_id: codec for codec in _CODECS.values()}
+
+# the kinds of work records, see Compressor._record
+_COMPRESS = 0
+_DECOMPRESS = 1
+
+
+class CompressionStats:
+    """Counters of a codec, times are in seconds of CPU time of the calling
+    thread.
+    """
+
+    __slots__ = (
+        "compressions",
+        "skipped",
+        "bytes_in",
+        "bytes_out",
+        "compress_time",
+        "decompressions",
+        "decompress_time",
+        "errors",
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.compressions = 0  # values stored compressed
+        self.skipped = 0  # values stored as is, compression did not help
+        self.bytes_in = 0  # length of the values stored compressed
+        self.bytes_out = 0  # length of their compressed data
+        self.compress_time = 0.0  # skipped values included
+        self.decompressions = 0
+        self.decompress_time = 0.0
+        self.errors = 0  # values which could not be decompressed
+
+    def snapshot(self) -> dict:
+        result = {name: getattr(self, name) for name in self.__slots__}
+        result["bytes_saved"] = self.bytes_in - self.bytes_out
+        result["ratio"] = self.bytes_in / self.bytes_out if self.bytes_out else 0.0
+        return result
+
+
+class Compressor:
+    """Compresses the values of Client storage commands, the codec is
+    recorded in bits 28-30 of the flags, and decompresses them on retrieval.
+
+    codec: "zlib", "bz2" or "lzma", used for the values written. The values
+      written with any of them are decompressed.
+    threshold: the values shorter than this are stored as is, so are the
+      values which do not get shorter
+    levels: the compression level (the preset for lzma) of each codec,
+      {"zlib": 1, ...}, the default of the codec otherwise
+    """
+
+    def __init__(
+        self,
+        codec: str = "zlib",
+        threshold: int = DEFAULT_COMPRESS_THRESHOLD,
+        levels: Optional[Dict[str, int]] = None,
+    ):
+        levels = levels or {}
+        for name in [codec] + list(levels):
+            if name not in _CODECS:
+                raise ValidationException(
+                    "codec:[{}] must be one of {}".format(name, ", ".join(_CODECS))
+                )
+
+        self._codec = _CODECS[codec]
+        self._threshold = threshold
+        self._levels = levels
+        self._stats = {name: CompressionStats() for name in _CODECS}
+
+    @property
+    def codec(self) -> str:
+        return self._codec.name
+
+    def compress(self, value: bytes, flags: int) -> Tuple[bytes, int]:
+        """Returns the value to store and its flags."""
+        value, flags, record = self._compress(value, flags)
+        self._record(record)
+        return value, flags
+
+    def decompress(self, value: bytes, flags: int) -> Optional[bytes]:
+        """Returns the value stored with flags decompressed, None if it cannot
+        be (unknown codec, corrupted data).
+        """
+        value, record = self._decompress(value, flags)
+        self._record(record)
+        return value
+
+    # _compress and _decompress leave the stats alone, they may run in another
+    # process: they return a record of the work done for _record
+
+    def _compress(self, value: bytes, flags: int) -> (bytes, int, Optional[tuple]):
+        if len(value) < self._threshold:
+            return value, flags, None
+
+        codec = self._codec
+        started = time.thread_time()
+        compressed = codec.compress(value, self._levels.get(codec.name))
+        elapsed = time.thread_time() - started
+
+        if len(compressed) >= len(value):
+            return value, flags, (_COMPRESS, codec.name, elapsed, len(value), None)
+
+        return (
+            compressed,
+            flags | codec.codec_id << _CODEC_SHIFT,
+            (_COMPRESS, codec.name, elapsed, len(value), len(compressed)),
+        )
+
+    def _decompress(
+        self, value: bytes, flags: int
+    ) -> (Optional[bytes], Optional[tuple]):
+        codec = _CODECS_BY_ID.get((flags & CODEC_FLAGS) >> _CODEC_SHIFT)
+        if codec is None:
+            return None, None
+
+        started = time.thread_time()
+        try:
+            value = codec.decompress(value)
+        except (zlib.error, lzma.LZMAError, OSError, EOFError, ValueError):
+            value = None
+        elapsed = time.thread_time() - started
+
+        return value, (_DECOMPRESS, codec.name, elapsed, value is not None, None)
+
+    def _record(self, record: Optional[tuple]) -> None:
+        if record is None:
+            return
+
+        kind, name, elapsed, first, second = record
+        stats = self._stats[name]
+        if kind == _COMPRESS:
+            stats.compress_time += elapsed
+            if second is None:
+                stats.skipped += 1
+            else:
+                stats.compressions += 1
+                stats.bytes_in += first
+                stats.bytes_out += second
+
+        else:
+            stats.decompress_time += elapsed
+            if first:
+                stats.decompressions += 1
+            else:
+                stats.errors += 1
+
+    def stats(self) -> Dict[str, dict]:
+        """{codec name: CompressionStats snapshot}"""
+        return {name: stats.snapshot() for name, stats in self._stats.items()}
+
+    def reset_stats(self) -> None:
+        for stats in self._stats.values():
+            stats.reset()
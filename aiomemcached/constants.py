@@ -5,6 +5,23 @@ DEFAULT_POOL_MAXSIZE = 5
 DEFAULT_TIMEOUT = 1
 DEFAULT_MAX_KEY_LENGTH = 250
 DEFAULT_MAX_VALUE_LENGTH = 1024 * 1024  # 1 megabyte
+DEFAULT_PIPELINE_MAX_INFLIGHT = 64
+DEFAULT_READ_BUFFER_SIZE = 256 * 1024
+DEFAULT_COALESCE_MAX_KEYS = 100
+DEFAULT_BULK_BATCH_SIZE = 100
+DEFAULT_NEAR_CACHE_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_NEAR_CACHE_TTL = 1
+# leaves room for the item header and key within the server item size
+DEFAULT_CHUNK_SIZE = DEFAULT_MAX_VALUE_LENGTH - 4 * 1024
+DEFAULT_MAX_LARGE_VALUE_LENGTH = 64 * 1024 * 1024
+DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+DEFAULT_COMPRESS_THRESHOLD = 1024
+DEFAULT_EXECUTOR_THRESHOLD = 256 * 1024
+DEFAULT_SLOWLOG_THRESHOLD = 0.01  # seconds
+DEFAULT_SLOWLOG_MAXLEN = 128
+DEFAULT_XFETCH_BETA = 1.0
+DEFAULT_LEASE_TTL = 10  # seconds
+DEFAULT_LEASE_WAIT = 1.0  # seconds
 
 STORED = b"STORED\r\n"
 NOT_STORED = b"NOT_STORED\r\n"
@@ -16,3 +33,8 @@ TOUCHED = b"TOUCHED\r\n"
 END = b"END\r\n"
 VERSION = b"VERSION"
 OK = b"OK\r\n"
+
+# meta protocol
+META_VA = b"VA"
+META_STATUSES = (META_VA, b"HD", b"EN", b"NF", b"NS", b"EX", b"MN")
+META_NOOP = b"mn\r\n"
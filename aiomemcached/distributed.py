@@ -0,0 +1,390 @@
+import asyncio
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .client import Client
+from .constants import (
+    DEFAULT_POOL_MINSIZE,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_TIMEOUT,
+    DEFAULT_MAX_VALUE_LENGTH,
+    DEFAULT_PIPELINE_MAX_INFLIGHT,
+    DEFAULT_BULK_BATCH_SIZE,
+    DEFAULT_XFETCH_BETA,
+    DEFAULT_LEASE_TTL,
+    DEFAULT_LEASE_WAIT,
+)
+from .ketama import KetamaRing
+from .lease import Lease
+
+__all__ = ["DistributedClient"]
+
+
+class DistributedClient(object):
+    """memcached client for a cluster of servers.
+
+    Keys are sharded over the servers with a ketama compatible consistent
+    hashing ring, every server gets its own Client (and MemcachedPool).
+    Multi-key retrievals are split by server and run concurrently.
+
+    Usage::
+
+        client = DistributedClient(
+            [
+                "memcached://10.0.0.1:11211",
+                ("memcached://10.0.0.2:11211", 2),  # twice the keys
+            ]
+        )
+    """
+
+    def __init__(
+        self,
+        servers: Iterable[Union[str, Tuple[str, int]]],
+        pool_minsize: int = DEFAULT_POOL_MINSIZE,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        timeout: int = DEFAULT_TIMEOUT,
+        connect_timeout: int = DEFAULT_TIMEOUT,
+        value_length: int = DEFAULT_MAX_VALUE_LENGTH,
+        pipeline: bool = False,
+        pipeline_max_inflight: int = DEFAULT_PIPELINE_MAX_INFLIGHT,
+    ):
+        """
+        servers: memcached:// URIs, or (URI, weight) pairs, the default
+          weight is 1
+        """
+        weights = {}
+        self._clients = {}  # type: Dict[str, Client]
+        for server in servers:
+            if isinstance(server, str):
+                uri, weight = server, 1
+            else:
+                uri, weight = server
+
+            host, port = Client.uri_parser(uri)
+            node = "{}:{}".format(host, port)
+            weights[node] = weight
+            self._clients[node] = Client(
+                host=host,
+                port=port,
+                pool_minsize=pool_minsize,
+                pool_maxsize=pool_maxsize,
+                timeout=timeout,
+                connect_timeout=connect_timeout,
+                value_length=value_length,
+                pipeline=pipeline,
+                pipeline_max_inflight=pipeline_max_inflight,
+            )
+
+        self._ring = KetamaRing(weights)
+
+    @property
+    def clients(self) -> Dict[str, Client]:
+        """{"host:port": Client}"""
+        return self._clients
+
+    def get_client(self, key: bytes) -> Client:
+        """Returns the Client of the server owning key."""
+        return self._clients[self._ring.get_node(key)]
+
+    def _split_keys(self, keys: Iterable[bytes]) -> Dict[Client, List[bytes]]:
+        result = {}
+        for key in keys:
+            result.setdefault(self.get_client(key), []).append(key)
+
+        return result
+
+    def _split_items(
+        self, items: Iterable[Tuple[bytes, bytes]]
+    ) -> Dict[Client, List[Tuple[bytes, bytes]]]:
+        if isinstance(items, dict):
+            items = items.items()
+
+        result = {}
+        for key, value in items:
+            result.setdefault(self.get_client(key), []).append((key, value))
+
+        return result
+
+    async def close(self):
+        """Closes the sockets of every server."""
+        await asyncio.gather(*[client.close() for client in self._clients.values()])
+
+    async def set(
+        self,
+        key: bytes,
+        value: bytes,
+        flags: int = 0,
+        exptime: int = 0,
+        noreply: bool = False,
+    ) -> Optional[bool]:
+        return await self.get_client(key).set(
+            key, value, flags=flags, exptime=exptime, noreply=noreply
+        )
+
+    async def add(
+        self,
+        key: bytes,
+        value: bytes,
+        flags: int = 0,
+        exptime: int = 0,
+        noreply: bool = False,
+    ) -> Optional[bool]:
+        return await self.get_client(key).add(
+            key, value, flags=flags, exptime=exptime, noreply=noreply
+        )
+
+    async def replace(
+        self,
+        key: bytes,
+        value: bytes,
+        flags: int = 0,
+        exptime: int = 0,
+        noreply: bool = False,
+    ) -> Optional[bool]:
+        return await self.get_client(key).replace(
+            key, value, flags=flags, exptime=exptime, noreply=noreply
+        )
+
+    async def append(
+        self,
+        key: bytes,
+        value: bytes,
+        flags: int = 0,
+        exptime: int = 0,
+        noreply: bool = False,
+    ) -> Optional[bool]:
+        return await self.get_client(key).append(
+            key, value, flags=flags, exptime=exptime, noreply=noreply
+        )
+
+    async def prepend(
+        self,
+        key: bytes,
+        value: bytes,
+        flags: int = 0,
+        exptime: int = 0,
+        noreply: bool = False,
+    ) -> Optional[bool]:
+        return await self.get_client(key).prepend(
+            key, value, flags=flags, exptime=exptime, noreply=noreply
+        )
+
+    async def cas(
+        self,
+        key: bytes,
+        value: bytes,
+        cas: int,
+        flags: int = 0,
+        exptime: int = 0,
+        noreply: bool = False,
+    ) -> Optional[bool]:
+        return await self.get_client(key).cas(
+            key, value, cas, flags=flags, exptime=exptime, noreply=noreply
+        )
+
+    async def _storage_many(
+        self,
+        cmd: str,
+        items: Iterable[Tuple[bytes, bytes]],
+        flags: int,
+        exptime: int,
+        batch_size: int,
+    ) -> Dict[bytes, bool]:
+        splits = self._split_items(items)
+        results = await asyncio.gather(
+            *[
+                getattr(client, cmd)(
+                    items, flags=flags, exptime=exptime, batch_size=batch_size
+                )
+                for client, items in splits.items()
+            ]
+        )
+
+        result = {}
+        for node_result in results:
+            result.update(node_result)
+
+        return result
+
+    async def set_many(
+        self,
+        items: Iterable[Tuple[bytes, bytes]],
+        flags: int = 0,
+        exptime: int = 0,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> Dict[bytes, bool]:
+        """Stores many items and returns {key: stored},
+        the servers are written concurrently.
+        """
+        return await self._storage_many("set_many", items, flags, exptime, batch_size)
+
+    async def add_many(
+        self,
+        items: Iterable[Tuple[bytes, bytes]],
+        flags: int = 0,
+        exptime: int = 0,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> Dict[bytes, bool]:
+        return await self._storage_many("add_many", items, flags, exptime, batch_size)
+
+    async def replace_many(
+        self,
+        items: Iterable[Tuple[bytes, bytes]],
+        flags: int = 0,
+        exptime: int = 0,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> Dict[bytes, bool]:
+        return await self._storage_many(
+            "replace_many", items, flags, exptime, batch_size
+        )
+
+    async def get(
+        self, key: bytes, default: bytes = None
+    ) -> (bytes, Dict[bytes, Optional[int]]):
+        return await self.get_client(key).get(key, default=default)
+
+    async def gets(
+        self, key: bytes, default: bytes = None
+    ) -> (bytes, Dict[bytes, Optional[int]]):
+        return await self.get_client(key).gets(key, default=default)
+
+    async def get_or_set(
+        self,
+        key: bytes,
+        loader: Callable[[], Any],
+        ttl: int,
+        flags: int = 0,
+        beta: float = DEFAULT_XFETCH_BETA,
+        stale_ttl: int = 0,
+    ) -> Any:
+        return await self.get_client(key).get_or_set(
+            key, loader, ttl, flags=flags, beta=beta, stale_ttl=stale_ttl
+        )
+
+    async def get_with_lease(
+        self,
+        key: bytes,
+        lease_ttl: int = DEFAULT_LEASE_TTL,
+        wait: float = DEFAULT_LEASE_WAIT,
+        serve_stale: bool = True,
+        meta: Optional[bool] = None,
+    ) -> Tuple[Any, Optional[Lease]]:
+        return await self.get_client(key).get_with_lease(
+            key, lease_ttl=lease_ttl, wait=wait, serve_stale=serve_stale, meta=meta
+        )
+
+    async def set_with_lease(
+        self, key: bytes, value: Any, lease: Lease, flags: int = 0, exptime: int = 0
+    ) -> bool:
+        return await self.get_client(key).set_with_lease(
+            key, value, lease, flags=flags, exptime=exptime
+        )
+
+    async def _retrieval_many(
+        self, keys: List[bytes], with_cas: bool
+    ) -> (Dict[bytes, bytes], Dict[bytes, Dict[bytes, Optional[int]]]):
+        splits = self._split_keys(set(keys))
+        results = await asyncio.gather(
+            *[
+                client.gets_many(keys) if with_cas else client.get_many(keys)
+                for client, keys in splits.items()
+            ]
+        )
+
+        values, info = {}, {}
+        for node_values, node_info in results:
+            values.update(node_values)
+            info.update(node_info)
+
+        return values, info
+
+    async def get_many(
+        self, keys: List[bytes]
+    ) -> (Dict[bytes, bytes], Dict[bytes, Dict[bytes, Optional[int]]]):
+        """Takes a list of keys and returns a list of values,
+        one concurrent request per server.
+        """
+        return await self._retrieval_many(keys, with_cas=False)
+
+    async def gets_many(
+        self, keys: List[bytes]
+    ) -> (Dict[bytes, bytes], Dict[bytes, Dict[bytes, Optional[int]]]):
+        """Takes a list of keys and returns a list of values
+        together with the cas token, one concurrent request per server.
+        """
+        return await self._retrieval_many(keys, with_cas=True)
+
+    async def delete(self, key: bytes, noreply: bool = False) -> Optional[bool]:
+        return await self.get_client(key).delete(key, noreply=noreply)
+
+    async def delete_many(
+        self, keys: Iterable[bytes], batch_size: int = DEFAULT_BULK_BATCH_SIZE
+    ) -> Dict[bytes, bool]:
+        splits = self._split_keys(keys)
+        results = await asyncio.gather(
+            *[
+                client.delete_many(keys, batch_size=batch_size)
+                for client, keys in splits.items()
+            ]
+        )
+
+        result = {}
+        for node_result in results:
+            result.update(node_result)
+
+        return result
+
+    async def touch_many(
+        self,
+        keys: Iterable[bytes],
+        exptime: int,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> Dict[bytes, bool]:
+        splits = self._split_keys(keys)
+        results = await asyncio.gather(
+            *[
+                client.touch_many(keys, exptime, batch_size=batch_size)
+                for client, keys in splits.items()
+            ]
+        )
+
+        result = {}
+        for node_result in results:
+            result.update(node_result)
+
+        return result
+
+    async def incr(
+        self, key: bytes, value: int = 1, noreply: bool = False
+    ) -> Optional[int]:
+        return await self.get_client(key).incr(key, value, noreply=noreply)
+
+    async def decr(
+        self, key: bytes, value: int = 1, noreply: bool = False
+    ) -> Optional[int]:
+        return await self.get_client(key).decr(key, value, noreply=noreply)
+
+    async def touch(
+        self, key: bytes, exptime: int, noreply: bool = False
+    ) -> Optional[bool]:
+        return await self.get_client(key).touch(key, exptime, noreply=noreply)
+
+    async def stats(self, args: bytes = None) -> Dict[str, dict]:
+        """{"host:port": stats}"""
+        nodes = list(self._clients)
+        results = await asyncio.gather(
+            *[self._clients[node].stats(args) for node in nodes]
+        )
+        return dict(zip(nodes, results))
+
+    async def version(self) -> Dict[str, bytes]:
+        """{"host:port": version}"""
+        nodes = list(self._clients)
+        results = await asyncio.gather(
+            *[self._clients[node].version() for node in nodes]
+        )
+        return dict(zip(nodes, results))
+
+    async def flush_all(self) -> bool:
+        """Invalidates all existing items on every server."""
+        await asyncio.gather(*[client.flush_all() for client in self._clients.values()])
+        return True
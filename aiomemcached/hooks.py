@@ -0,0 +1,94 @@
+from typing import Optional, Sequence
+
+__all__ = ["CommandHook", "CommandEvent"]
+
+
+class CommandEvent:
+    """A command sent by a Client, passed to the CommandHook callbacks.
+
+    command: the command as sent to the server, "get", "set", "mg", ... (a
+      get_many is a get, see Metrics)
+    keys: its keys, the keys of the whole batch for bulk writes
+    request, request_size: the bytes written (a batch for bulk commands),
+      their length
+    response_size: the bytes received while reading the response, None for
+      noreply commands or until completion
+    connection: the MemcachedConnection used, once acquired
+    started, acquired, first_byte, finished: time.perf_counter() of each
+      step, None until it is reached (no first_byte for noreply commands)
+    exception: what the command raised, on completion
+    context: a dict free for the hooks' own use, a tracing span, ...
+    """
+
+    __slots__ = (
+        "command",
+        "keys",
+        "request",
+        "request_size",
+        "response_size",
+        "connection",
+        "started",
+        "acquired",
+        "first_byte",
+        "finished",
+        "exception",
+        "context",
+    )
+
+    def __init__(
+        self, command: str, keys: Sequence[bytes], request: bytes, started: float
+    ):
+        self.command = command
+        self.keys = keys
+        self.request = request
+        self.request_size = len(request)
+        self.response_size = None
+        self.connection = None
+        self.started = started
+        self.acquired = None
+        self.first_byte = None
+        self.finished = None
+        self.exception = None
+        self.context = {}
+
+    def __repr__(self) -> str:
+        return "<CommandEvent {} keys={} {}B/{}B>".format(
+            self.command, len(self.keys), self.request_size, self.response_size
+        )
+
+    @property
+    def pool_wait(self) -> Optional[float]:
+        """Seconds waited for a connection (or a pipeline slot)."""
+        if self.acquired is None:
+            return None
+        return self.acquired - self.started
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        if self.finished is None:
+            return None
+        return self.finished - self.started
+
+
+class CommandHook:
+    """Callbacks around the commands of a Client, see Client.add_hook.
+    These ones do nothing, override the ones needed.
+
+    They are called synchronously, on_first_byte from the protocol callback
+    receiving the data: they should be quick and must not raise, the
+    exception of a hook propagates to the command (or its connection).
+    """
+
+    def on_start(self, event: CommandEvent) -> None:
+        """Before the command waits for a connection."""
+
+    def on_acquired(self, event: CommandEvent) -> None:
+        """The command has a connection, it is about to be written."""
+
+    def on_first_byte(self, event: CommandEvent) -> None:
+        """The first bytes of the response have been received."""
+
+    def on_complete(self, event: CommandEvent) -> None:
+        """The response has been read (or written, for noreply commands), or
+        the command failed with event.exception.
+        """
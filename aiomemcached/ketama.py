@@ -0,0 +1,69 @@
+import struct
+from array import array
+from bisect import bisect_left
+from hashlib import md5
+from typing import Dict
+
+from .exceptions import ValidationException
+
+__all__ = ["KetamaRing"]
+
+# libketama: 40 md5 digests per server (each one gives 4 points) for an
+# average weighted server
+_DIGESTS_PER_SERVER = 40
+
+
+def _float32(value: float) -> float:
+    """value rounded to a C float"""
+    return struct.unpack("f", struct.pack("f", value))[0]
+
+
+class KetamaRing:
+    """Consistent hashing continuum, compatible with libketama.
+
+    Every node is placed on a 32-bit circle at points derived from
+    md5(b"<node>-<n>"), the number of points is proportional to the node
+    weight. A key belongs to the first point at or after the
+    little-endian 32 bits of md5(key), wrapping around the circle.
+
+    The continuum is stored as a sorted array of points, looked up with bisect.
+    """
+
+    def __init__(self, nodes: Dict[str, int]):
+        """nodes: {node name: weight}, the name is usually "host:port"."""
+        if not nodes:
+            raise ValidationException("KetamaRing needs at least one node")
+
+        self.nodes = dict(nodes)
+
+        total_weight = sum(self.nodes.values())
+        continuum = []
+        for node, weight in self.nodes.items():
+            # the same float arithmetic as libketama, to get the same points:
+            # pct is a C float, floorf(pct * 40.0 * (float)numservers)
+            pct = _float32(float(weight) / float(total_weight))
+            digests = int(_float32(pct * _DIGESTS_PER_SERVER * len(self.nodes)))
+
+            for n in range(digests):
+                digest = md5("{}-{}".format(node, n).encode()).digest()
+                for h in range(4):
+                    point = int.from_bytes(digest[h * 4 : h * 4 + 4], "little")
+                    continuum.append((point, node))
+
+        if not continuum:
+            raise ValidationException("KetamaRing needs at least one weighted node")
+
+        continuum.sort()
+        self._points = array("L", [point for point, _ in continuum])
+        self._nodes = [node for _, node in continuum]
+
+    @staticmethod
+    def hash(key: bytes) -> int:
+        return int.from_bytes(md5(key).digest()[:4], "little")
+
+    def get_node(self, key: bytes) -> str:
+        index = bisect_left(self._points, self.hash(key))
+        if index == len(self._points):
+            index = 0
+
+        return self._nodes[index]
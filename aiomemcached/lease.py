@@ -0,0 +1,41 @@
+import random
+from typing import Union
+
+__all__ = ["Lease"]
+
+# the waits of the callers which did not get the lease, doubled from
+# _BACKOFF_MIN up to _BACKOFF_MAX seconds, with jitter
+_BACKOFF_MIN = 0.005
+_BACKOFF_MAX = 0.1
+
+
+class Lease:
+    """The right to recompute the value of key, see Client.get_with_lease:
+    pass it to Client.set_with_lease with the new value.
+
+    token: the cas of the item won with the meta protocol (meta True), or
+      the random token stored in the lease key with add
+    """
+
+    __slots__ = ("key", "token", "meta")
+
+    def __init__(self, key: bytes, token: Union[int, bytes], meta: bool):
+        self.key = key
+        self.token = token
+        self.meta = meta
+
+    def __repr__(self) -> str:
+        return "<Lease {!r} {} {!r}>".format(
+            self.key, "meta" if self.meta else "add", self.token
+        )
+
+
+def lease_key(key: bytes) -> bytes:
+    """The key holding the lease of key, with add."""
+    return key + b":lease"
+
+
+def backoff(attempt: int) -> float:
+    """Seconds to wait before the attempt-th retry (from 0)."""
+    delay = min(_BACKOFF_MIN * 2**attempt, _BACKOFF_MAX)
+    return delay * (0.5 + random.random() / 2)
@@ -0,0 +1,470 @@
+"""Load generator: drives a Client with a production-like workload and
+reports the throughput, errors, timeouts and latency percentiles::
+
+    python -m aiomemcached.loadgen --uri memcached://127.0.0.1:11211 \\
+        --qps 20000 --workers 64 --duration 30 --read-ratio 0.9 \\
+        --keys 100000 --distribution zipf --value-sizes 100:8,2000:2
+
+Open loop: with --qps the requests are sent at a fixed (or Poisson) rate
+whatever the response times, each in its own task, up to --workers in
+flight. Their latency runs from the time they were scheduled, the queueing
+behind slow responses included (no coordinated omission). Without --qps
+every worker sends its next request as soon as the previous one completes
+(closed loop).
+
+python -m benchmarks.server, from the repository, starts a local stand-in
+server to run it against.
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import random
+import sys
+from typing import List, Optional
+
+from .client import Client
+from .exceptions import ClientException, TimeoutException
+from .metrics import LatencyHistogram, Metrics
+
+__all__ = ["KeyDistribution", "ValueSizes", "LoadGenerator", "LoadReport"]
+
+
+class KeyDistribution:
+    """The popularity of count keys, prefix + index: uniform, or zipf with
+    the key of rank r drawn with a weight of 1 / r ** zipf_s.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        zipf_s: Optional[float] = None,
+        prefix: bytes = b"loadgen:",
+        rng: Optional[random.Random] = None,
+    ):
+        if count < 1:
+            raise ValueError("count must be positive")
+
+        self.count = count
+        self.zipf_s = zipf_s
+        self.prefix = prefix
+        self._rng = rng or random.Random()
+        self._cumulative = None  # zipf weights, summed
+        if zipf_s is not None:
+            self._cumulative = list(
+                itertools.accumulate(1 / rank**zipf_s for rank in range(1, count + 1))
+            )
+
+    def index(self) -> int:
+        if self._cumulative is None:
+            return self._rng.randrange(self.count)
+
+        return bisect.bisect(
+            self._cumulative, self._rng.random() * self._cumulative[-1]
+        )
+
+    def key(self, index: Optional[int] = None) -> bytes:
+        return b"%s%d" % (self.prefix, self.index() if index is None else index)
+
+
+class ValueSizes:
+    """Value sizes, from a spec:
+
+    "100": all 100 bytes
+    "100-10000": uniform between 100 and 10000 bytes
+    "100:8,2000:2": weighted, 80% of 100 bytes and 20% of 2000 bytes
+    """
+
+    def __init__(self, spec: str, rng: Optional[random.Random] = None):
+        self.spec = spec
+        self._rng = rng or random.Random()
+        self._range = None  # (low, high)
+        self._sizes = []  # type: List[int]
+        self._cumulative = []  # type: List[float]
+        try:
+            if "-" in spec:
+                low, high = spec.split("-")
+                self._range = int(low), int(high)
+                self.max = self._range[1]
+            else:
+                total = 0.0
+                for choice in spec.split(","):
+                    size, _, weight = choice.partition(":")
+                    total += float(weight or 1)
+                    self._sizes.append(int(size))
+                    self._cumulative.append(total)
+                self.max = max(self._sizes)
+        except ValueError:
+            raise ValueError("invalid value sizes: {!r}".format(spec))
+
+    def size(self) -> int:
+        if self._range is not None:
+            return self._rng.randint(*self._range)
+        if len(self._sizes) == 1:
+            return self._sizes[0]
+
+        index = bisect.bisect(
+            self._cumulative, self._rng.random() * self._cumulative[-1]
+        )
+        return self._sizes[index]
+
+
+class LoadReport:
+    """The outcome of a LoadGenerator run, times are in seconds.
+
+    elapsed: the measured period, the warmup excluded
+    completed: the requests completed in it, gets and sets by name in ops
+    errors: {exception name: count} of the failed requests, timeouts apart
+    latency: LatencyHistogram of the completed requests, from their
+      scheduled time; by operation in op_latency
+    lag: LatencyHistogram of the delays between the scheduled time of the
+      requests and their sending: the generator did not keep up when high
+    pool_wait, client_metrics: the client Metrics pool_wait and snapshot,
+      when the client has metrics
+    """
+
+    def __init__(self, target_qps: float, workers: int):
+        self.target_qps = target_qps
+        self.workers = workers
+        self.elapsed = 0.0
+        self.completed = 0
+        self.ops = {"get": 0, "set": 0}
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+        self.errors = {}  # {exception name: count}
+        self.latency = LatencyHistogram()
+        self.op_latency = {"get": LatencyHistogram(), "set": LatencyHistogram()}
+        self.lag = LatencyHistogram()
+        self.pool_wait = None  # type: Optional[LatencyHistogram]
+        self.client_metrics = None  # type: Optional[dict]
+
+    @property
+    def throughput(self) -> float:
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "target_qps": self.target_qps,
+            "workers": self.workers,
+            "elapsed": self.elapsed,
+            "completed": self.completed,
+            "throughput": self.throughput,
+            "ops": dict(self.ops),
+            "hits": self.hits,
+            "misses": self.misses,
+            "timeouts": self.timeouts,
+            "errors": dict(self.errors),
+            "latency": self.latency.snapshot(),
+            "op_latency": {
+                name: histogram.snapshot()
+                for name, histogram in self.op_latency.items()
+            },
+            "lag": self.lag.snapshot(),
+            "client": self.client_metrics,
+        }
+
+    def format(self) -> str:
+        lines = [
+            "throughput {:.0f} ops/s ({} target), {} requests in {:.2f}s".format(
+                self.throughput,
+                "{:.0f}/s".format(self.target_qps) if self.target_qps else "no",
+                self.completed,
+                self.elapsed,
+            ),
+            "gets {} ({} hits, {} misses), sets {}".format(
+                self.ops["get"], self.hits, self.misses, self.ops["set"]
+            ),
+            "timeouts {}, errors {}".format(
+                self.timeouts,
+                ", ".join(
+                    "{} {}".format(name, count) for name, count in self.errors.items()
+                )
+                or 0,
+            ),
+            "{:<10} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+                "latency", "p50 ms", "p90 ms", "p99 ms", "p99.9 ms", "max ms"
+            ),
+        ]
+        rows = [("all", self.latency)]
+        rows.extend(sorted(self.op_latency.items()))
+        rows.append(("send lag", self.lag))
+        if self.pool_wait is not None:
+            rows.append(("pool wait", self.pool_wait))
+
+        for name, histogram in rows:
+            lines.append(
+                "{:<10} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+                    name,
+                    histogram.quantile(0.5) * 1000,
+                    histogram.quantile(0.9) * 1000,
+                    histogram.quantile(0.99) * 1000,
+                    histogram.quantile(0.999) * 1000,
+                    histogram.max * 1000,
+                )
+            )
+
+        return "\n".join(lines)
+
+
+class LoadGenerator:
+    """Sends gets (a read_ratio of the requests) and sets of keys drawn from
+    keys, the values sized by value_sizes, up to workers at a time.
+
+    qps: the target rate, each request is sent at its scheduled time in a
+      task of its own, unless workers requests are already in flight;
+      0 for a closed loop of workers tasks
+    arrival: "uniform" intervals between the requests, or "poisson"
+    fill_misses: a get miss is followed by a set of the key, cache-aside
+    warmup: seconds run before the measured duration
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        keys: KeyDistribution,
+        value_sizes: ValueSizes,
+        read_ratio: float = 0.9,
+        qps: float = 0,
+        workers: int = 16,
+        duration: float = 10,
+        warmup: float = 0,
+        arrival: str = "uniform",
+        fill_misses: bool = False,
+        rng: Optional[random.Random] = None,
+    ):
+        if arrival not in ("uniform", "poisson"):
+            raise ValueError("arrival must be uniform or poisson")
+        if workers < 1:
+            raise ValueError("workers must be positive")
+
+        self._client = client
+        self._keys = keys
+        self._value_sizes = value_sizes
+        self._read_ratio = read_ratio
+        self._qps = qps
+        self._workers = workers
+        self._duration = duration
+        self._warmup = warmup
+        self._poisson = arrival == "poisson"
+        self._fill_misses = fill_misses
+        self._rng = rng or random.Random()
+        self._payload = b"x" * value_sizes.max
+
+    def _value(self) -> bytes:
+        return self._payload[: self._value_sizes.size()]
+
+    async def prefill(self, batch_size: int = 1000) -> None:
+        """Sets all the keys."""
+        for start in range(0, self._keys.count, batch_size):
+            end = min(start + batch_size, self._keys.count)
+            await self._client.set_many(
+                {self._keys.key(index): self._value() for index in range(start, end)}
+            )
+
+    async def run(self) -> LoadReport:
+        loop = asyncio.get_running_loop()
+        report = LoadReport(self._qps, self._workers)
+        started = loop.time()
+        measured = started + self._warmup
+        end = measured + self._duration
+        metrics = self._client.metrics
+        if metrics is not None and self._warmup:
+            loop.call_at(measured, metrics.reset)
+
+        if self._qps:
+            await self._open_loop(report, started, measured, end)
+        else:
+            await asyncio.gather(
+                *[self._worker(report, measured, end) for _ in range(self._workers)]
+            )
+
+        report.elapsed = loop.time() - measured
+        if metrics is not None:
+            report.pool_wait = metrics.pool_wait
+            report.client_metrics = metrics.snapshot()
+        return report
+
+    async def _open_loop(
+        self, report: LoadReport, started: float, measured: float, end: float
+    ) -> None:
+        """Sends each request at its scheduled time, in its own task: a slow
+        response does not delay the next ones, unless workers requests are
+        in flight.
+        """
+        loop = asyncio.get_running_loop()
+        interval = 1 / self._qps
+        semaphore = asyncio.Semaphore(self._workers)
+        tasks = set()
+        scheduled = started
+        while scheduled < end:
+            now = loop.time()
+            if scheduled > now:
+                await asyncio.sleep(scheduled - now)
+
+            await semaphore.acquire()
+            task = asyncio.ensure_future(
+                self._send(
+                    semaphore, report if scheduled >= measured else None, scheduled
+                )
+            )
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            if self._poisson:
+                scheduled += self._rng.expovariate(self._qps)
+            else:
+                scheduled += interval
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def _send(
+        self,
+        semaphore: asyncio.Semaphore,
+        report: Optional[LoadReport],
+        scheduled: float,
+    ) -> None:
+        try:
+            await self._request(report, scheduled, asyncio.get_running_loop().time())
+        finally:
+            semaphore.release()
+
+    async def _worker(self, report: LoadReport, measured: float, end: float) -> None:
+        """closed loop"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        while now < end:
+            await self._request(report if now >= measured else None, now, now)
+            now = loop.time()
+
+    async def _request(
+        self, report: Optional[LoadReport], scheduled: float, sent: float
+    ) -> None:
+        """report: None during the warmup"""
+        key = self._keys.key()
+        read = self._rng.random() < self._read_ratio
+        if report is not None:
+            report.lag.record(sent - scheduled)
+
+        try:
+            if read:
+                value, _ = await self._client.get(key)
+                if value is None and self._fill_misses:
+                    await self._client.set(key, self._value())
+            else:
+                await self._client.set(key, self._value())
+
+        except TimeoutException:
+            if report is not None:
+                report.timeouts += 1
+            return
+
+        except (ClientException, OSError) as e:
+            if report is not None:
+                name = type(e).__name__
+                report.errors[name] = report.errors.get(name, 0) + 1
+            return
+
+        if report is None:
+            return
+
+        elapsed = asyncio.get_running_loop().time() - scheduled
+        op = "get" if read else "set"
+        report.completed += 1
+        report.ops[op] += 1
+        report.latency.record(elapsed)
+        report.op_latency[op].record(elapsed)
+        if read:
+            if value is None:
+                report.misses += 1
+            else:
+                report.hits += 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m aiomemcached.loadgen", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--uri", default="memcached://127.0.0.1:11211")
+    parser.add_argument("--qps", type=float, default=0, help="0: closed loop")
+    parser.add_argument("--arrival", choices=("uniform", "poisson"), default="uniform")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=16,
+        help="with --qps: the requests in flight at most, else: closed loop tasks",
+    )
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--warmup", type=float, default=1, help="seconds")
+    parser.add_argument("--read-ratio", type=float, default=0.9)
+    parser.add_argument("--keys", type=int, default=10000)
+    parser.add_argument("--key-prefix", default="loadgen:")
+    parser.add_argument("--distribution", choices=("uniform", "zipf"), default="zipf")
+    parser.add_argument("--zipf-s", type=float, default=0.99)
+    parser.add_argument(
+        "--value-sizes", default="100", help='"100", "100-1000" or "100:8,2000:2"'
+    )
+    parser.add_argument("--prefill", action="store_true", help="set all the keys")
+    parser.add_argument(
+        "--fill-misses", action="store_true", help="set the keys missed by a get"
+    )
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=1, help="seconds")
+    parser.add_argument("--pipeline", action="store_true")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    try:
+        keys = KeyDistribution(
+            args.keys,
+            zipf_s=args.zipf_s if args.distribution == "zipf" else None,
+            prefix=args.key_prefix.encode(),
+            rng=rng,
+        )
+        value_sizes = ValueSizes(args.value_sizes, rng=rng)
+    except ValueError as e:
+        parser.error(str(e))
+
+    async def run() -> LoadReport:
+        client = Client(
+            uri=args.uri,
+            pool_minsize=1,
+            pool_maxsize=args.pool_size,
+            timeout=args.timeout,
+            pipeline=args.pipeline,
+            metrics=Metrics(),
+        )
+        generator = LoadGenerator(
+            client,
+            keys,
+            value_sizes,
+            read_ratio=args.read_ratio,
+            qps=args.qps,
+            workers=args.workers,
+            duration=args.duration,
+            warmup=args.warmup,
+            arrival=args.arrival,
+            fill_misses=args.fill_misses,
+            rng=rng,
+        )
+        try:
+            if args.prefill:
+                await generator.prefill()
+            return await generator.run()
+        finally:
+            await client.close()
+
+    report = asyncio.run(run())
+    if args.json:
+        print(json.dumps(report.as_dict(), indent=2))
+    else:
+        print(report.format())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
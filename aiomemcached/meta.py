@@ -0,0 +1,205 @@
+import asyncio
+import base64
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .constants import DEFAULT_MAX_KEY_LENGTH, META_NOOP, META_STATUSES, META_VA
+from .exceptions import ConnectException, ResponseException, ValidationException
+
+"""
+Ref:
+- https://github.com/memcached/memcached/wiki/MetaCommands
+- https://github.com/memcached/memcached/blob/master/doc/protocol.txt
+"""
+
+__all__ = ["MetaResponse"]
+
+# fullmatch: $ would also match before a trailing newline
+_TEXT_KEY_RE = re.compile(b"[^\x00-\x20\x7f]{1,%d}" % DEFAULT_MAX_KEY_LENGTH)
+_META_FLAG_RE = re.compile(b"[a-zA-Z][^\x00-\x20\x7f]*")
+
+
+class MetaResponse:
+    """The response to a meta command.
+
+    status: b"VA" (value follows), b"HD" (success, no value), b"EN" (miss),
+      b"NF" (not found), b"NS" (not stored) or b"EX" (cas mismatch)
+    value: the data block, when the v flag has been sent
+    flags: the returned flags, {b"c": b"1234", b"t": b"-1", b"W": b"", ...}
+    """
+
+    __slots__ = ("status", "value", "flags")
+
+    def __init__(
+        self,
+        status: bytes,
+        value: Optional[bytes] = None,
+        flags: Optional[Dict[bytes, bytes]] = None,
+    ):
+        self.status = status
+        self.value = value
+        self.flags = flags or {}
+
+    def __repr__(self) -> str:
+        return "<MetaResponse {} value={!r} flags={}>".format(
+            self.status, self.value, self.flags
+        )
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MetaResponse):
+            return NotImplemented
+
+        return (self.status, self.value, self.flags) == (
+            other.status,
+            other.value,
+            other.flags,
+        )
+
+    @property
+    def ok(self) -> bool:
+        """Hit for mg, stored/deleted/updated for ms/md/ma."""
+        return self.status in (META_VA, b"HD")
+
+    def _int_flag(self, flag: bytes) -> Optional[int]:
+        value = self.flags.get(flag)
+        return None if value is None else int(value)
+
+    @property
+    def cas(self) -> Optional[int]:
+        return self._int_flag(b"c")
+
+    @property
+    def client_flags(self) -> Optional[int]:
+        return self._int_flag(b"f")
+
+    @property
+    def ttl(self) -> Optional[int]:
+        """Remaining seconds, -1 for an item which never expires."""
+        return self._int_flag(b"t")
+
+    @property
+    def size(self) -> Optional[int]:
+        return self._int_flag(b"s")
+
+    @property
+    def key(self) -> Optional[bytes]:
+        key = self.flags.get(b"k")
+        if key is not None and b"b" in self.flags:
+            key = base64.b64decode(key)
+        return key
+
+    @property
+    def opaque(self) -> Optional[bytes]:
+        return self.flags.get(b"O")
+
+    @property
+    def win(self) -> bool:
+        """This client has won the right to recache the item."""
+        return b"W" in self.flags
+
+    @property
+    def stale(self) -> bool:
+        """The item has been invalidated, its value is stale."""
+        return b"X" in self.flags
+
+    @property
+    def win_sent(self) -> bool:
+        """Another client has already won the right to recache the item."""
+        return b"Z" in self.flags
+
+
+def meta_key(key: bytes) -> Tuple[bytes, bool]:
+    """Returns the key as sent on the wire, and whether it is base64 encoded:
+    the keys which are not valid text keys (binary, spaces, ...) are.
+    """
+    if not isinstance(key, bytes):
+        raise ValidationException("key must be bytes:{}".format(key))
+
+    if _TEXT_KEY_RE.fullmatch(key):
+        return key, False
+
+    encoded = base64.b64encode(key)
+    if not key or len(encoded) > DEFAULT_MAX_KEY_LENGTH:
+        raise ValidationException(
+            "A key (up to {} bytes base64 encoded):{}".format(
+                DEFAULT_MAX_KEY_LENGTH, key
+            )
+        )
+    return encoded, True
+
+
+def build_meta_cmd(
+    cmd: bytes,
+    key: bytes,
+    meta_flags: Iterable[bytes],
+    value: Optional[bytes] = None,
+) -> bytes:
+    """<cmd> <key> [<datalen>] <flags>*\r\n[<data block>\r\n]"""
+    wire_key, is_base64 = meta_key(key)
+
+    tokens = [cmd, wire_key]
+    if value is not None:
+        tokens.append(b"%d" % len(value))
+    if is_base64:
+        tokens.append(b"b")
+
+    for flag in meta_flags:
+        if not isinstance(flag, bytes) or not _META_FLAG_RE.fullmatch(flag):
+            raise ValidationException("invalid meta flag:{}".format(flag))
+        tokens.append(flag)
+
+    raw_cmd = b" ".join(tokens) + b"\r\n"
+    if value is not None:
+        raw_cmd += value + b"\r\n"
+    return raw_cmd
+
+
+async def read_meta_response(
+    reader: asyncio.StreamReader, raw_cmd: bytes
+) -> MetaResponse:
+    """Reads one response line, and its data block for VA."""
+    line = await reader.readline()
+    if not line:
+        raise ConnectException("connection closed by server")
+
+    terms = line.split()
+    if not terms or terms[0] not in META_STATUSES:
+        raise ResponseException(raw_cmd, line)
+
+    status = terms[0]
+    flags_start = 1
+    value = None
+    if status == META_VA:
+        try:
+            data_len = int(terms[1])
+        except (IndexError, ValueError):
+            raise ResponseException(raw_cmd, line)
+
+        flags_start = 2
+        value = await reader.readexactly(data_len)
+        if await reader.readexactly(2) != b"\r\n":
+            raise ResponseException(
+                raw_cmd, line, ext_message="data block length mismatch"
+            )
+
+    flags = {term[:1]: term[1:] for term in terms[flags_start:]}
+    return MetaResponse(status, value, flags)
+
+
+async def read_meta_batch(
+    reader: asyncio.StreamReader, count: int
+) -> List[MetaResponse]:
+    """Reads the responses of count quiet meta commands, up to the MN of their
+    trailing mn command.
+    """
+    responses = []
+    while True:
+        response = await read_meta_response(reader, META_NOOP)
+        if response.status == b"MN":
+            return responses
+
+        responses.append(response)
+        if len(responses) > count:
+            raise ResponseException(
+                META_NOOP, response, ext_message="received too many responses"
+            )
@@ -0,0 +1,153 @@
+from typing import List, Tuple
+
+__all__ = ["Metrics", "LatencyHistogram"]
+
+# 4 buckets per power of two microseconds: 0-1us, 1-2us, ... 7-8us, 8-10us,
+# 10-12us, ... up to about 70 minutes, the last bucket takes the rest
+_SUB_BUCKETS = 4
+_BUCKETS = 128
+
+
+def _bucket_bounds(index: int) -> (int, int):
+    """The microseconds [lower, upper) of a bucket."""
+    if index < 2 * _SUB_BUCKETS:
+        return index, index + 1
+
+    shift = index // _SUB_BUCKETS - 1
+    mantissa = index % _SUB_BUCKETS + _SUB_BUCKETS
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class LatencyHistogram:
+    """Counts latencies in log-scaled buckets, each one 25% wide at most.
+    Recording is a few integer operations, the quantiles are estimated from
+    the buckets (their upper bound) on snapshot.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed: float) -> None:
+        """elapsed: seconds"""
+        us = int(elapsed * 1000000)
+        if us < 2 * _SUB_BUCKETS:
+            index = us
+        else:
+            # the 3 leading bits: the power of two, then the sub bucket
+            shift = us.bit_length() - 3
+            index = (shift << 2) + (us >> shift)
+            if index >= _BUCKETS:
+                index = _BUCKETS - 1
+
+        self.counts[index] += 1
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def quantile(self, q: float) -> float:
+        """The latency (seconds) below which a fraction q of the recorded
+        ones are, up to the bucket width.
+        """
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(_bucket_bounds(index)[1] / 1000000, self.max)
+
+        return self.max
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """[(upper bound in seconds, count)] of the non-empty buckets"""
+        return [
+            (_bucket_bounds(index)[1] / 1000000, count)
+            for index, count in enumerate(self.counts)
+            if count
+        ]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "p999": self.quantile(0.999),
+            "buckets": self.buckets(),
+        }
+
+
+class Metrics:
+    """Client counters, see Client(metrics=...). Times are in seconds.
+
+    commands: {command name: LatencyHistogram}, the commands as sent to the
+      server (get, gets, set, delete, incr, mg, ...): a get_many is a get,
+      a bulk write batch counts once. The latency runs from the pool acquire
+      (or the pipeline slot) to the parsed response.
+    pool_wait: LatencyHistogram of the pool acquires, 0 when a connection
+      was free
+    bytes_sent, bytes_received: the traffic of the client connections
+    hits, misses: the keys of the retrieval commands found or not
+    connects, disposes: connections opened, closed on errors
+    timeouts: commands which raised TimeoutException, acquires included
+
+    The same Metrics may be shared by many clients, its counters add up.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.commands = {}  # {command name: LatencyHistogram}
+        self.pool_wait = LatencyHistogram()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.hits = 0
+        self.misses = 0
+        self.connects = 0
+        self.disposes = 0
+        self.timeouts = 0
+
+    def record(self, command: bytes, elapsed: float, sent: int) -> None:
+        """A command of sent bytes took elapsed seconds."""
+        histogram = self.commands.get(command)
+        if histogram is None:
+            histogram = self.commands[command] = LatencyHistogram()
+
+        histogram.record(elapsed)
+        self.bytes_sent += sent
+
+    def record_retrieval(self, keys: int, hits: int) -> None:
+        self.hits += hits
+        self.misses += keys - hits
+
+    def snapshot(self) -> dict:
+        return {
+            "commands": {
+                name.decode(): histogram.snapshot()
+                for name, histogram in self.commands.items()
+            },
+            "pool_wait": self.pool_wait.snapshot(),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / (self.hits + self.misses) if self.hits else 0.0),
+            "connects": self.connects,
+            "disposes": self.disposes,
+            "timeouts": self.timeouts,
+        }
@@ -0,0 +1,163 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .constants import (
+    DEFAULT_NEAR_CACHE_MAX_BYTES,
+    DEFAULT_NEAR_CACHE_TTL,
+)
+
+__all__ = ["NearCache"]
+
+# rough per entry overhead: the OrderedDict node, the entry tuple, info dict
+_ENTRY_OVERHEAD = 200
+
+
+class NearCache:
+    """In-process LRU cache in front of Client.get/get_many.
+
+    Holds at most max_bytes of keys and values. An entry lives ttl seconds at
+    most, whatever its memcached exptime, so values written by other
+    processes are seen after ttl seconds at worst. With negative_ttl, misses
+    are cached too, for negative_ttl seconds.
+
+    The writes of the owning Client update (set, cas) or invalidate the
+    entries of their keys.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_NEAR_CACHE_MAX_BYTES,
+        ttl: float = DEFAULT_NEAR_CACHE_TTL,
+        negative_ttl: float = 0,
+    ):
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+
+        # key -> (value, info, expire_at, size), least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        # bumped on every write, a fetch which overlaps a write is not cached
+        self.generation = 0
+
+        self.reset_stats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_ratio": (
+                (self.hits + self.negative_hits) / lookups if lookups else 0.0
+            ),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def lookup(
+        self, key: bytes
+    ) -> Optional[Tuple[Optional[bytes], Dict[bytes, Optional[int]]]]:
+        """Returns (value, info), (None, {}) for a cached miss,
+        None if key is not cached.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, info, expire_at, _ = entry
+        if expire_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if value is None:
+            self.negative_hits += 1
+            return None, dict()
+
+        self.hits += 1
+        return value, dict(info)
+
+    def store(
+        self,
+        key: bytes,
+        value: Optional[bytes],
+        info: Dict[bytes, Optional[int]],
+        generation: int,
+    ) -> None:
+        """Caches the result of a fetch started at generation,
+        value None is a miss.
+        """
+        if generation != self.generation:
+            return
+
+        if value is None:
+            if self._negative_ttl > 0:
+                self._put(key, None, None, self._negative_ttl)
+            return
+
+        self._put(key, value, dict(info), self._ttl)
+
+    def update(
+        self, key: bytes, value: bytes, flags: int = 0, exptime: int = 0
+    ) -> None:
+        """key has just been stored with value by the owning client."""
+        self.generation += 1
+
+        ttl = self._ttl
+        if 0 < exptime <= 60 * 60 * 24 * 30:
+            # relative exptime, an absolute unix time is left to ttl
+            ttl = min(ttl, exptime)
+
+        self._put(key, value, {"flags": flags, "cas": None}, ttl)
+
+    def invalidate(self, key: bytes) -> None:
+        self.generation += 1
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+        self._bytes = 0
+
+    def _put(self, key: bytes, value, info, ttl: float) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+        size = len(key) + _ENTRY_OVERHEAD
+        if value is not None:
+            size += len(value)
+        if size > self._max_bytes:
+            return
+
+        self._entries[key] = (value, info, time.monotonic() + ttl, size)
+        self._bytes += size
+        while self._bytes > self._max_bytes:
+            _, (_, _, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def _remove(self, key: bytes) -> None:
+        _, _, _, size = self._entries.pop(key)
+        self._bytes -= size
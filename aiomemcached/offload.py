@@ -0,0 +1,69 @@
+"""
+The codec work of a Client, run on the event loop or in its executor.
+
+These functions do not share state with the client: with a process pool
+their arguments are pickled to the worker, they return the records of the
+compression work for Compressor._record.
+
+The serialization of the values to store is deliberately left on the event
+loop, only their compression is offloaded. The size of an object is only
+known once serialized, and offloading it would not help: pickle and json
+hold the GIL while they run in a thread, and a process pool would pickle
+the object to send it to the worker anyway.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .compression import CODEC_FLAGS, Compressor
+from .serialization import Serializer
+
+__all__ = []
+
+
+def compress_values(
+    compressor: Compressor, items: List[Tuple[bytes, int]]
+) -> (List[Tuple[bytes, int]], List[tuple]):
+    """Compresses [(value, flags)], returns them with their new flags."""
+    results = []
+    records = []
+    for value, flags in items:
+        value, flags, record = compressor._compress(value, flags)
+        results.append((value, flags))
+        if record is not None:
+            records.append(record)
+
+    return results, records
+
+
+def decode_values(
+    compressor: Optional[Compressor],
+    serializer: Optional[Serializer],
+    values: Dict[bytes, Any],
+    info: Dict[bytes, Dict[bytes, Optional[int]]],
+) -> (Dict[bytes, Any], Dict[bytes, Dict[bytes, Optional[int]]], List[tuple]):
+    """Decompresses and deserializes the values of a retrieval, the values
+    which cannot be are left out. Returns new dicts.
+    """
+    records = []
+    if compressor is not None:
+        values, info = dict(values), dict(info)
+        for key, item_info in list(info.items()):
+            flags = item_info["flags"]
+            if not flags & CODEC_FLAGS:
+                continue
+
+            value, record = compressor._decompress(values[key], flags)
+            if record is not None:
+                records.append(record)
+
+            if value is None:
+                del values[key]
+                del info[key]
+            else:
+                values[key] = value
+                info[key] = dict(item_info, flags=flags & ~CODEC_FLAGS)
+
+    if serializer is not None:
+        values, info = serializer.loads_many(values, info)
+
+    return values, info, records
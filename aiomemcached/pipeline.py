@@ -0,0 +1,134 @@
+import asyncio
+import functools
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+from .constants import DEFAULT_PIPELINE_MAX_INFLIGHT
+from .exceptions import ConnectException
+from .pool import MemcachedConnection
+
+__all__ = ["MemcachedPipeline"]
+
+
+class MemcachedPipeline:
+    """Pipelines many commands over a single MemcachedConnection.
+
+    Commands are written back to back as soon as they are submitted, without
+    waiting for the replies of the previous ones. memcached answers the
+    commands of a connection in order, so a single dispatcher task reads the
+    responses and hands them to the waiting coroutines in FIFO order.
+
+    At most max_inflight commands are written but not yet answered, further
+    submitters wait for a free slot.
+
+    Any error while reading a response leaves the connection in an unknown
+    state, the pipeline is closed and every pending command fails.
+    """
+
+    def __init__(
+        self,
+        conn: MemcachedConnection,
+        max_inflight: int = DEFAULT_PIPELINE_MAX_INFLIGHT,
+    ):
+        self.conn = conn
+
+        self._max_inflight = max_inflight
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._waiters = deque()
+        self._dispatcher = None
+        self._exception = None
+
+    @property
+    def closed(self) -> bool:
+        return self._exception is not None
+
+    def inflight(self) -> int:
+        return len(self._waiters)
+
+    def full(self) -> bool:
+        return len(self._waiters) >= self._max_inflight
+
+    async def execute(
+        self,
+        cmd: bytes,
+        read_response: Optional[Callable[..., Awaitable[Any]]] = None,
+    ) -> Any:
+        """Writes cmd and waits for its response.
+        read_response reads exactly one response from the stream, it is called
+        by the dispatcher once all the previous responses have been read.
+        It is called with synced=True when the response follows the error
+        lines of noreply commands, see MemcachedConnection.write.
+
+        Without read_response, cmd is a noreply command: it is written and
+        None is returned right away.
+        """
+        if read_response is None:
+            if self._exception is not None:
+                raise ConnectException(self._exception)
+
+            self.conn.write(cmd, noreply=True)
+            return None
+
+        await self._slots.acquire()
+        if self._exception is not None:
+            self._slots.release()
+            raise ConnectException(self._exception)
+
+        future = asyncio.get_running_loop().create_future()
+        if self.conn.write(cmd):
+            read_response = functools.partial(read_response, synced=True)
+        self._waiters.append((future, read_response))
+
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+        # a cancelled waiter keeps its place in the queue, the dispatcher still
+        # reads and drops its response to keep the stream in sync
+        return await future
+
+    async def _dispatch(self) -> None:
+        try:
+            while self._waiters:
+                future, read_response = self._waiters[0]
+                try:
+                    result = await read_response(self.conn.reader)
+
+                except asyncio.CancelledError:
+                    self._abort(ConnectException("pipeline dispatcher cancelled"))
+                    raise
+
+                except Exception as e:
+                    self._abort(e)
+                    return
+
+                self._waiters.popleft()
+                self._slots.release()
+                if not future.done():
+                    future.set_result(result)
+
+        finally:
+            self._dispatcher = None
+
+    def _abort(self, exc: Exception) -> None:
+        """exc goes to the waiter whose response failed,
+        the others get a ConnectException.
+        """
+        if self._exception is None:
+            self._exception = exc
+
+        while self._waiters:
+            future, _ = self._waiters.popleft()
+            self._slots.release()
+            if not future.done():
+                future.set_exception(exc)
+
+            if not isinstance(exc, ConnectException):
+                exc = ConnectException(exc)
+
+    def close(self) -> None:
+        """Fails the pending commands and stops the dispatcher.
+        The connection itself is left to its owner (usually the pool).
+        """
+        self._abort(ConnectException("pipeline closed"))
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
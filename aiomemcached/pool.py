@@ -1,25 +1,154 @@
 import asyncio
 from asyncio.streams import StreamReader, StreamWriter
 from collections import deque
+from typing import List, Optional, Type
 
-from .constants import DEFAULT_POOL_MAXSIZE, DEFAULT_POOL_MINSIZE, DEFAULT_TIMEOUT
-from .exceptions import ConnectException
+from .constants import (
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_POOL_MINSIZE,
+    DEFAULT_TIMEOUT,
+    VERSION,
+)
+from .exceptions import ConnectException, TimeoutException
+from .metrics import Metrics
 
-__all__ = ["MemcachedPool", "MemcachedConnection"]
+__all__ = ["MemcachedPool", "MemcachedConnection", "PoolStats"]
+
+
+class CountingStreamReader(asyncio.StreamReader):
+    """Counts the bytes received, adds them to metrics if set.
+    on_data, if set, is called once when the next data is received.
+    """
+
+    metrics = None  # type: Optional[Metrics]
+    on_data = None
+    bytes_received = 0
+
+    def feed_data(self, data: bytes) -> None:
+        self.bytes_received += len(data)
+        if self.metrics is not None:
+            self.metrics.bytes_received += len(data)
+        if self.on_data is not None:
+            on_data, self.on_data = self.on_data, None
+            on_data()
+        super().feed_data(data)
+
+    def buffered(self) -> int:
+        """The number of bytes received but not read yet."""
+        return len(self._buffer)
 
 
 class MemcachedConnection:
+    # sent ahead of the first replied command after noreply ones
+    noreply_sync_cmd = b"version\r\n"
+
     def __init__(self, reader: StreamReader, writer: StreamWriter):
         self.in_use = False
         self.reader = reader
         self.writer = writer
+        # noreply commands have been written since the last replied one
+        self.noreply_pending = False
+
+    @classmethod
+    async def open(cls, host: str, port: int) -> "MemcachedConnection":
+        # asyncio.open_connection, with a CountingStreamReader
+        loop = asyncio.get_running_loop()
+        reader = CountingStreamReader(loop=loop)
+        protocol = asyncio.StreamReaderProtocol(reader, loop=loop)
+        transport, _ = await loop.create_connection(lambda: protocol, host, port)
+        writer = StreamWriter(transport, protocol, reader, loop)
+        return cls(reader, writer)
 
     async def close(self):
         self.reader.feed_eof()
         self.writer.close()
 
+    def write(self, cmd: bytes, noreply: bool = False) -> bool:
+        """Writes cmd, noreply if no response is expected.
+
+        memcached still answers a malformed noreply command with an error
+        line. So the first replied command written after noreply ones is
+        preceded by a version command, returns True in that case: the caller
+        must skip everything up to the VERSION line (see read_noreply_errors)
+        before reading the response of cmd.
+        """
+        if noreply:
+            self.noreply_pending = True
+            self.writer.write(cmd)
+            return False
+
+        if self.noreply_pending:
+            self.noreply_pending = False
+            self.writer.write(self.noreply_sync_cmd + cmd)
+            return True
+
+        self.writer.write(cmd)
+        return False
+
+
+async def read_noreply_errors(reader: StreamReader) -> List[bytes]:
+    """Reads the responses up to the VERSION line sent by
+    MemcachedConnection.write, returns the error lines of noreply commands.
+    """
+    errors = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectException("connection closed by server")
+
+        if line.startswith(VERSION):
+            return errors
+
+        errors.append(line)
+
+
+class PoolStats:
+    """Counters of a MemcachedPool, wait times are in seconds."""
+
+    __slots__ = (
+        "acquires",
+        "waits",
+        "wait_time",
+        "max_wait_time",
+        "timeouts",
+        "connects",
+        "connect_errors",
+        "disposes",
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.acquires = 0  # successful acquires
+        self.waits = 0  # acquires which had to wait for a connection
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.connect_errors = 0
+        self.disposes = 0
+
+    def snapshot(self) -> dict:
+        result = {name: getattr(self, name) for name in self.__slots__}
+        result["mean_wait_time"] = self.wait_time / self.waits if self.waits else 0.0
+        return result
+
 
 class MemcachedPool:
+    """A pool of at most maxsize connections.
+
+    Idle connections are kept on a stack, the most recently used one is
+    reused first. When all the connections are busy and the pool is full,
+    acquire waits in a FIFO queue and is woken up as soon as a connection is
+    released or disposed.
+
+    fair: released connections are handed over to the longest waiting
+    acquire, newcomers never overtake waiters. Otherwise a released
+    connection goes back to the stack and may be taken by a newcomer first,
+    which saves a wake-up round trip through the event loop.
+    """
+
     def __init__(
         self,
         host: str,
@@ -27,77 +156,218 @@ class MemcachedPool:
         minsize: int = DEFAULT_POOL_MINSIZE,
         maxsize: int = DEFAULT_POOL_MAXSIZE,
         connect_timeout: int = DEFAULT_TIMEOUT,
+        connection_class: Type[MemcachedConnection] = MemcachedConnection,
+        acquire_timeout: Optional[float] = None,
+        fair: bool = True,
+        metrics: Optional[Metrics] = None,
     ):
+        """metrics: counts the traffic of the connections, their opening and
+        disposal, and the acquire waits, see Metrics.
+        """
         self._host = host
         self._port = port
         self._connect_timeout = connect_timeout
+        self._connection_class = connection_class
+        self._acquire_timeout = acquire_timeout
+        self._fair = fair
 
-        self._pool = deque()
+        self._pool = deque()  # all the open connections
+        self._free = []  # idle connections, a stack
+        self._waiters = deque()
+        self._opening = 0
         self._pool_minsize = minsize
         self._pool_maxsize = maxsize
-        self._pool_lock = asyncio.Lock()
+
+        self.stats = PoolStats()
+        self._metrics = metrics
 
     def size(self) -> int:
         return len(self._pool)
 
-    async def _create_new_connection(self) -> MemcachedConnection:
-        while self.size() >= self._pool_maxsize:
-            await asyncio.sleep(1)
+    def free_size(self) -> int:
+        return len(self._free)
+
+    def waiters(self) -> int:
+        return len(self._waiters)
 
+    async def _create_new_connection(self) -> MemcachedConnection:
         try:
-            reader, writer = await asyncio.wait_for(
-                asyncio.open_connection(self._host, self._port),
+            conn = await asyncio.wait_for(
+                self._connection_class.open(self._host, self._port),
                 timeout=self._connect_timeout,
             )
-        except (ConnectionError, TimeoutError, OSError) as e:
+        except (ConnectionError, TimeoutError, OSError, asyncio.TimeoutError) as e:
+            self.stats.connect_errors += 1
             raise ConnectException(e)
 
-        return MemcachedConnection(reader, writer)
+        self.stats.connects += 1
+        if self._metrics is not None:
+            self._metrics.connects += 1
+            conn.reader.metrics = self._metrics
+        return conn
+
+    async def _open(self) -> MemcachedConnection:
+        self._opening += 1
+        try:
+            conn = await self._create_new_connection()
+
+        except BaseException:
+            self._opening -= 1
+            # the slot is free again
+            self._wakeup()
+            raise
+
+        self._opening -= 1
+        conn.in_use = True
+        self._pool.append(conn)
+        return conn
+
+    def _pop_free(self) -> Optional[MemcachedConnection]:
+        while self._free:
+            conn = self._free.pop()
+            if conn.writer.is_closing():
+                # closed by the server while idle
+                self._pool.remove(conn)
+                self._disposed()
+                continue
+
+            conn.in_use = True
+            return conn
+
+        return None
+
+    def _disposed(self) -> None:
+        self.stats.disposes += 1
+        if self._metrics is not None:
+            self._metrics.disposes += 1
+
+    def _wakeup(self, conn: MemcachedConnection = None) -> bool:
+        """Wakes up the first waiter, handing it conn if given,
+        otherwise it retries to get a connection.
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(conn)
+                return True
+
+        return False
+
+    def _push_free(self, conn: MemcachedConnection) -> None:
+        if self._fair and self._wakeup(conn):
+            return
+
+        conn.in_use = False
+        self._free.append(conn)
+        if not self._fair:
+            self._wakeup()
+
+    async def _wait(
+        self, deadline: Optional[float], retry: bool
+    ) -> Optional[MemcachedConnection]:
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        if retry:
+            # woken up already, keep the place in the queue
+            self._waiters.appendleft(waiter)
+        else:
+            self._waiters.append(waiter)
+
+        timeout = None if deadline is None else max(deadline - loop.time(), 0)
+        try:
+            return await asyncio.wait_for(waiter, timeout=timeout)
+
+        except BaseException as e:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+            elif waiter.done() and not waiter.cancelled():
+                # woken up right before giving up, pass it on
+                conn = waiter.result()
+                if conn is None:
+                    self._wakeup()
+                else:
+                    self._push_free(conn)
+
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats.timeouts += 1
+                raise TimeoutException(
+                    "no free connection within {}s".format(self._acquire_timeout)
+                )
+            raise
 
     async def acquire(self) -> MemcachedConnection:
         """Acquires a not in used connection from pool.
-        Creates new connection if needed.
+        Creates new connection if needed, waits for one when the pool is full.
         """
-        try:
-            conn = self._pool[0]
-            if conn.in_use:
-                raise IndexError
+        conn = None
+        if not self._fair or not self._waiters:
+            conn = self._pop_free()
+            if conn is None and self.size() + self._opening < self._pool_maxsize:
+                conn = await self._open()
 
-            conn.in_use = True
-            self._pool.rotate(-1)
+        if conn is not None:
+            self.stats.acquires += 1
+            if self._metrics is not None:
+                self._metrics.pool_wait.record(0.0)
             return conn
 
-        except IndexError:
-            pass
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = (
+            None if self._acquire_timeout is None else started + self._acquire_timeout
+        )
+
+        retry = False
+        while conn is None:
+            conn = await self._wait(deadline, retry)
+            if conn is None:
+                retry = True
+                conn = self._pop_free()
+                if conn is None and self.size() + self._opening < self._pool_maxsize:
+                    conn = await self._open()
+
+        wait_time = loop.time() - started
+        self.stats.acquires += 1
+        self.stats.waits += 1
+        self.stats.wait_time += wait_time
+        if wait_time > self.stats.max_wait_time:
+            self.stats.max_wait_time = wait_time
+        if self._metrics is not None:
+            self._metrics.pool_wait.record(wait_time)
 
-        conn = await self._create_new_connection()
-        conn.in_use = True
-        self._pool.append(conn)
         return conn
 
+    async def open_unpooled(self) -> MemcachedConnection:
+        """Opens a connection outside of the pool, for a caller which cannot
+        wait for a pooled one. release leaves it open, dispose closes it.
+        """
+        return await self._create_new_connection()
+
     async def release(self, conn: MemcachedConnection) -> None:
         """Returns used connection back into pool.
-        When pool size > minsize the connection will be dropped.
+        When pool size > minsize and nobody waits the connection will be dropped.
         """
-        await self._pool_lock.acquire()
-        try:
-            if conn not in self._pool:
-                return
+        if conn not in self._pool:
+            return
 
-            if self.size() > self._pool_minsize:
-                await conn.close()
-                self._pool.remove(conn)
-
-            else:
-                conn.in_use = False
+        if self._waiters or self.size() <= self._pool_minsize:
+            self._push_free(conn)
+            return
 
-        finally:
-            self._pool_lock.release()
+        self._pool.remove(conn)
+        await conn.close()
 
     async def dispose(self, conn: MemcachedConnection) -> None:
         """Closes and disposes of the connection."""
         if conn in self._pool:
             self._pool.remove(conn)
+            if conn in self._free:
+                self._free.remove(conn)
+
+            self._disposed()
+            # the slot is free again
+            self._wakeup()
 
         try:
             await conn.close()
@@ -107,7 +377,15 @@ class MemcachedPool:
     async def clear(self) -> None:
         """Clear pool connections.
         Close and remove all free connections.
+        The acquires waiting for a connection retry, to open new ones.
         """
+        self._free.clear()
+        freed = 0
         while self._pool:
             conn = self._pool.pop()
+            freed += 1
             await conn.close()
+
+        for _ in range(freed):
+            if not self._wakeup():
+                break
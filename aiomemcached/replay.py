@@ -0,0 +1,624 @@
+"""Traffic capture and replay.
+
+A TrafficRecorder added to a client (Client.add_hook) writes the commands
+it sends to a compact binary log: when, the command, its keys, the sizes
+of its values (the values too with record_values), how long it took.
+A Replayer sends them again through another client, at their original
+pace, faster, or as fast as possible, and compares the latencies::
+
+    python -m aiomemcached.replay traffic.log --uri memcached://host:11211 \\
+        --speed 2 --concurrency 64
+
+The commands are replayed through the Client API: the storage commands
+with their recorded values, or values of the recorded sizes, flags and
+exptime 0, a cas as a set; incr/decr by 1. The commands without keys
+(stats, version, flush_all) are skipped.
+"""
+
+import argparse
+import asyncio
+import json
+import struct
+import sys
+import time
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Union
+
+from .binary import _HEADER, REQUEST_MAGIC, BinaryClient
+from .client import Client
+from .exceptions import ClientException, TimeoutException
+from .hooks import CommandEvent, CommandHook
+from .metrics import LatencyHistogram
+
+__all__ = ["TrafficRecorder", "TrafficRecord", "read_records", "Replayer"]
+
+_MAGIC = b"AMCR"
+_VERSION = 1
+# magic, version, time.time() of the recording start
+_FILE_HEADER = struct.Struct("<4sBd")
+# seconds since the start, elapsed, flags, command length, key count,
+# value count
+_RECORD = struct.Struct("<ddBBHH")
+_KEY_LENGTH = struct.Struct("<H")
+_VALUE_LENGTH = struct.Struct("<I")
+
+_HAS_VALUES = 1
+_NOREPLY = 2
+_FAILED = 4
+
+_STORAGE_COMMANDS = (b"set", b"add", b"replace", b"append", b"prepend", b"cas")
+
+
+def request_values(request: bytes) -> List[memoryview]:
+    """The data blocks of the commands of a request, text, meta (ms) or
+    binary.
+    """
+    view = memoryview(request)
+    values = []
+    pos = 0
+    if request[:1] == bytes((REQUEST_MAGIC,)):
+        while pos + _HEADER.size <= len(request):
+            _, _, key_length, extras_length, _, _, body_length, _, _ = (
+                _HEADER.unpack_from(request, pos)
+            )
+            start = pos + _HEADER.size + extras_length + key_length
+            pos += _HEADER.size + body_length
+            if pos > start:
+                values.append(view[start:pos])
+        return values
+
+    while True:
+        end = request.find(b"\r\n", pos)
+        if end < 0:
+            return values
+
+        terms = request[pos:end].split(b" ", 5)
+        if terms[0] in _STORAGE_COMMANDS:
+            length = int(terms[4])
+        elif terms[0] == b"ms":
+            length = int(terms[2])
+        else:
+            pos = end + 2
+            continue
+
+        values.append(view[end + 2 : end + 2 + length])
+        pos = end + 4 + length
+
+
+class TrafficRecord:
+    """A recorded command, see TrafficRecorder. Times are in seconds.
+
+    time: since the start of the recording
+    elapsed: how long the command took
+    command: "get", "set", "mg", ... see CommandEvent
+    keys, value_sizes: its keys and the sizes of its values
+    values: the values, when recorded, None otherwise
+    noreply: sent without waiting for a reply
+    failed: it raised an exception
+    """
+
+    __slots__ = (
+        "time",
+        "elapsed",
+        "command",
+        "keys",
+        "value_sizes",
+        "values",
+        "noreply",
+        "failed",
+    )
+
+    def __init__(
+        self,
+        time: float,
+        elapsed: float,
+        command: str,
+        keys: List[bytes],
+        value_sizes: List[int],
+        values: Optional[List[bytes]] = None,
+        noreply: bool = False,
+        failed: bool = False,
+    ):
+        self.time = time
+        self.elapsed = elapsed
+        self.command = command
+        self.keys = keys
+        self.value_sizes = value_sizes
+        self.values = values
+        self.noreply = noreply
+        self.failed = failed
+
+    def __repr__(self) -> str:
+        return "<TrafficRecord {:.6f} {} keys={} values={}>".format(
+            self.time, self.command, len(self.keys), self.value_sizes
+        )
+
+
+class TrafficRecorder(CommandHook):
+    """Writes the commands of the clients it is added to (Client.add_hook)
+    to file, a path or a binary file object, see read_records.
+
+    record_values: the values are written too, not only their sizes
+    max_bytes: the recording stops at this size, the commands which did not
+      fit are counted in dropped
+
+    The records are written as the commands complete, through the file
+    buffer: close (or flush) the recorder to get them all on disk.
+    """
+
+    def __init__(
+        self,
+        file: Union[str, BinaryIO],
+        record_values: bool = False,
+        max_bytes: Optional[int] = None,
+    ):
+        if isinstance(file, str):
+            self._file = open(file, "wb")
+            self._owned = True
+        else:
+            self._file = file
+            self._owned = False
+
+        self._record_values = record_values
+        self._max_bytes = max_bytes
+        self._started = time.perf_counter()
+        self._file.write(_FILE_HEADER.pack(_MAGIC, _VERSION, time.time()))
+        self.size = _FILE_HEADER.size
+        self.records = 0
+        self.dropped = 0
+
+    def __enter__(self) -> "TrafficRecorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def on_complete(self, event: CommandEvent) -> None:
+        if self._file is None:
+            return
+
+        command = event.command.encode()
+        values = request_values(event.request)
+        flags = _HAS_VALUES if self._record_values else 0
+        if event.exception is not None:
+            flags |= _FAILED
+        elif event.response_size is None:
+            flags |= _NOREPLY
+
+        parts = [
+            _RECORD.pack(
+                event.started - self._started,
+                event.finished - event.started,
+                flags,
+                len(command),
+                len(event.keys),
+                len(values),
+            ),
+            command,
+        ]
+        for key in event.keys:
+            parts.append(_KEY_LENGTH.pack(len(key)))
+            parts.append(key)
+        for value in values:
+            parts.append(_VALUE_LENGTH.pack(len(value)))
+            if self._record_values:
+                parts.append(value)
+
+        record = b"".join(parts)
+        if self._max_bytes is not None and self.size + len(record) > self._max_bytes:
+            self.dropped += 1
+            return
+
+        self._file.write(record)
+        self.size += len(record)
+        self.records += 1
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        """Stops the recording, closes the file when opened from a path."""
+        if self._file is None:
+            return
+
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+        self._file = None
+
+
+def _read_exactly(file: BinaryIO, size: int) -> bytes:
+    data = file.read(size)
+    if len(data) < size:
+        raise ValueError("truncated traffic recording")
+    return data
+
+
+def read_records(file: Union[str, BinaryIO]) -> Iterator[TrafficRecord]:
+    """The records written by a TrafficRecorder, read lazily from file, a
+    path or a binary file object. Raises ValueError on a file which is not
+    a recording.
+    """
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            yield from read_records(f)
+        return
+
+    magic, version, _ = _FILE_HEADER.unpack(_read_exactly(file, _FILE_HEADER.size))
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("not a traffic recording")
+
+    while True:
+        header = file.read(_RECORD.size)
+        if not header:
+            return
+
+        if len(header) < _RECORD.size:
+            raise ValueError("truncated traffic recording")
+        started, elapsed, flags, command_length, key_count, value_count = (
+            _RECORD.unpack(header)
+        )
+        command = _read_exactly(file, command_length).decode()
+        keys = []
+        for _ in range(key_count):
+            (length,) = _KEY_LENGTH.unpack(_read_exactly(file, _KEY_LENGTH.size))
+            keys.append(_read_exactly(file, length))
+
+        sizes = []
+        values = [] if flags & _HAS_VALUES else None
+        for _ in range(value_count):
+            (size,) = _VALUE_LENGTH.unpack(_read_exactly(file, _VALUE_LENGTH.size))
+            sizes.append(size)
+            if values is not None:
+                values.append(_read_exactly(file, size))
+
+        yield TrafficRecord(
+            started,
+            elapsed,
+            command,
+            keys,
+            sizes,
+            values,
+            noreply=bool(flags & _NOREPLY),
+            failed=bool(flags & _FAILED),
+        )
+
+
+def _values(record: TrafficRecord) -> List[bytes]:
+    if record.values is not None:
+        return record.values
+    return [b"x" * size for size in record.value_sizes]
+
+
+async def _replay_get(client: Client, record: TrafficRecord) -> None:
+    if len(record.keys) == 1:
+        await client.get(record.keys[0])
+    else:
+        await client.get_many(record.keys)
+
+
+async def _replay_gets(client: Client, record: TrafficRecord) -> None:
+    if len(record.keys) == 1:
+        await client.gets(record.keys[0])
+    else:
+        await client.gets_many(record.keys)
+
+
+async def _replay_storage(client: Client, record: TrafficRecord) -> None:
+    command = "set" if record.command == "cas" else record.command
+    values = _values(record)
+    if len(record.keys) == 1:
+        await getattr(client, command)(
+            record.keys[0], values[0] if values else b"", noreply=record.noreply
+        )
+    elif command in ("set", "add", "replace"):
+        await getattr(client, command + "_many")(zip(record.keys, values))
+    else:
+        await asyncio.gather(
+            *[
+                getattr(client, command)(key, value)
+                for key, value in zip(record.keys, values)
+            ]
+        )
+
+
+async def _replay_delete(client: Client, record: TrafficRecord) -> None:
+    if len(record.keys) == 1:
+        await client.delete(record.keys[0], noreply=record.noreply)
+    else:
+        await client.delete_many(record.keys)
+
+
+async def _replay_incr_decr(client: Client, record: TrafficRecord) -> None:
+    method = client.incr if record.command == "incr" else client.decr
+    for key in record.keys:
+        await method(key, noreply=record.noreply)
+
+
+async def _replay_touch(client: Client, record: TrafficRecord) -> None:
+    if len(record.keys) == 1:
+        await client.touch(record.keys[0], 0, noreply=record.noreply)
+    else:
+        await client.touch_many(record.keys, 0)
+
+
+async def _replay_meta_get(client: Client, record: TrafficRecord) -> None:
+    if len(record.keys) == 1:
+        await client.meta_get(record.keys[0])
+    else:
+        await client.meta_get_many(record.keys)
+
+
+async def _replay_meta_set(client: Client, record: TrafficRecord) -> None:
+    values = _values(record)
+    if len(record.keys) == 1:
+        await client.meta_set(record.keys[0], values[0] if values else b"")
+    else:
+        await client.meta_set_many(zip(record.keys, values))
+
+
+async def _replay_meta_delete(client: Client, record: TrafficRecord) -> None:
+    for key in record.keys:
+        await client.meta_delete(key)
+
+
+async def _replay_meta_arithmetic(client: Client, record: TrafficRecord) -> None:
+    for key in record.keys:
+        await client.meta_arithmetic(key)
+
+
+_REPLAYS = {
+    "get": _replay_get,
+    "gets": _replay_gets,
+    "set": _replay_storage,
+    "add": _replay_storage,
+    "replace": _replay_storage,
+    "append": _replay_storage,
+    "prepend": _replay_storage,
+    "cas": _replay_storage,
+    "delete": _replay_delete,
+    "incr": _replay_incr_decr,
+    "decr": _replay_incr_decr,
+    "touch": _replay_touch,
+    "mg": _replay_meta_get,
+    "ms": _replay_meta_set,
+    "md": _replay_meta_delete,
+    "ma": _replay_meta_arithmetic,
+}
+
+
+class ReplayReport:
+    """The outcome of a Replayer run, times are in seconds.
+
+    original, replayed: {command: LatencyHistogram} of the recorded and
+      replayed latencies, of the commands which completed both times
+    lag: LatencyHistogram of the delays between the time of the commands
+      in the recording (scaled by the speed) and their replay
+    skipped: {command: count} of the commands not replayed
+    uncompared: the commands failed in the recording, replayed without
+      error: their latencies are not compared
+    errors: {exception name: count} of the failed replays, timeouts apart
+    """
+
+    def __init__(self, speed: float, concurrency: int):
+        self.speed = speed
+        self.concurrency = concurrency
+        self.elapsed = 0.0
+        self.completed = 0
+        self.timeouts = 0
+        self.uncompared = 0
+        self.errors = {}  # {exception name: count}
+        self.skipped = {}  # {command: count}
+        self.original = {}  # {command: LatencyHistogram}
+        self.replayed = {}  # {command: LatencyHistogram}
+        self.lag = LatencyHistogram()
+
+    def record(self, command: str, original: float, replayed: float) -> None:
+        if command not in self.original:
+            self.original[command] = LatencyHistogram()
+            self.replayed[command] = LatencyHistogram()
+
+        self.original[command].record(original)
+        self.replayed[command].record(replayed)
+        self.completed += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "speed": self.speed,
+            "concurrency": self.concurrency,
+            "elapsed": self.elapsed,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "uncompared": self.uncompared,
+            "errors": dict(self.errors),
+            "skipped": dict(self.skipped),
+            "commands": {
+                command: {
+                    "original": self.original[command].snapshot(),
+                    "replayed": self.replayed[command].snapshot(),
+                }
+                for command in self.original
+            },
+            "lag": self.lag.snapshot(),
+        }
+
+    def format(self) -> str:
+        lines = [
+            "{} commands replayed in {:.2f}s ({}), {} uncompared, {} timeouts, "
+            "{} errors, {} skipped".format(
+                self.completed,
+                self.elapsed,
+                "speed x{:g}".format(self.speed) if self.speed else "unpaced",
+                self.uncompared,
+                self.timeouts,
+                sum(self.errors.values()),
+                sum(self.skipped.values()),
+            ),
+            "{:<10} {:>8} {:>10} {:>10} {:>8} {:>10} {:>10} {:>8}".format(
+                "command",
+                "count",
+                "p50 ms",
+                "replay",
+                "",
+                "p99 ms",
+                "replay",
+                "",
+            ),
+        ]
+        for command in sorted(self.original):
+            original = self.original[command]
+            replayed = self.replayed[command]
+            row = [command, original.count]
+            for q in (0.5, 0.99):
+                before, after = original.quantile(q), replayed.quantile(q)
+                row.extend(
+                    (before * 1000, after * 1000, after / before - 1 if before else 0)
+                )
+            lines.append(
+                "{:<10} {:>8} {:>10.3f} {:>10.3f} {:>+8.1%} "
+                "{:>10.3f} {:>10.3f} {:>+8.1%}".format(*row)
+            )
+
+        return "\n".join(lines)
+
+
+class Replayer:
+    """Replays records (see read_records) through client.
+
+    speed: 1 replays the commands at their recorded pace, 2 twice as fast,
+      ...; 0 sends them as fast as the concurrency allows
+    concurrency: the commands in flight at most, a command due when it is
+      reached waits for one to complete (and lags)
+    The failed commands of the recording are replayed, not compared.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        records: Iterable[TrafficRecord],
+        speed: float = 1.0,
+        concurrency: int = 64,
+    ):
+        if speed < 0:
+            raise ValueError("speed must not be negative")
+        if concurrency < 1:
+            raise ValueError("concurrency must be positive")
+
+        self._client = client
+        self._records = records
+        self._speed = speed
+        self._concurrency = concurrency
+
+    async def run(self) -> ReplayReport:
+        loop = asyncio.get_running_loop()
+        report = ReplayReport(self._speed, self._concurrency)
+        semaphore = asyncio.Semaphore(self._concurrency)
+        tasks = set()
+        started = loop.time()
+        first = None
+        for record in self._records:
+            replay = _REPLAYS.get(record.command)
+            if replay is None or not record.keys:
+                report.skipped[record.command] = (
+                    report.skipped.get(record.command, 0) + 1
+                )
+                continue
+
+            if first is None:
+                first = record.time
+            scheduled = loop.time()
+            if self._speed:
+                scheduled = started + (record.time - first) / self._speed
+                delay = scheduled - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            await semaphore.acquire()
+            report.lag.record(max(loop.time() - scheduled, 0.0))
+            task = loop.create_task(self._replay(report, semaphore, replay, record))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        report.elapsed = loop.time() - started
+        return report
+
+    async def _replay(
+        self,
+        report: ReplayReport,
+        semaphore: asyncio.Semaphore,
+        replay,
+        record: TrafficRecord,
+    ) -> None:
+        started = time.perf_counter()
+        try:
+            await replay(self._client, record)
+
+        except TimeoutException:
+            report.timeouts += 1
+            return
+
+        except (ClientException, OSError) as e:
+            name = type(e).__name__
+            report.errors[name] = report.errors.get(name, 0) + 1
+            return
+
+        finally:
+            semaphore.release()
+
+        if record.failed:
+            report.uncompared += 1
+        else:
+            report.record(record.command, record.elapsed, time.perf_counter() - started)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m aiomemcached.replay",
+        description="Replays a traffic recording, see TrafficRecorder.",
+    )
+    parser.add_argument("recording")
+    parser.add_argument("--uri", default="memcached://127.0.0.1:11211")
+    parser.add_argument("--binary", action="store_true", help="BinaryClient")
+    parser.add_argument(
+        "--speed", type=float, default=1, help="2: twice as fast, 0: unpaced"
+    )
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=1, help="seconds")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    async def run() -> ReplayReport:
+        client = (BinaryClient if args.binary else Client)(
+            uri=args.uri,
+            pool_minsize=1,
+            pool_maxsize=args.pool_size,
+            timeout=args.timeout,
+        )
+        try:
+            return await Replayer(
+                client,
+                read_records(args.recording),
+                speed=args.speed,
+                concurrency=args.concurrency,
+            ).run()
+        finally:
+            await client.close()
+
+    try:
+        report = asyncio.run(run())
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    if args.json:
+        print(json.dumps(report.as_dict(), indent=2))
+    else:
+        print(report.format())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import json
+import pickle
+from typing import Any, Dict, Optional, Tuple
+
+from .exceptions import ValidationException
+
+__all__ = ["Serializer", "TYPE_FLAGS"]
+
+# flags bits 24-27 hold the type tag of a serialized value, 0: bytes
+_TYPE_SHIFT = 24
+TYPE_FLAGS = 0b1111 << _TYPE_SHIFT
+
+_STR = 1 << _TYPE_SHIFT
+_INT = 2 << _TYPE_SHIFT
+_JSON = 3 << _TYPE_SHIFT
+_PICKLE = 4 << _TYPE_SHIFT
+
+
+class Serializer:
+    """Converts the values of Client storage commands to bytes, the type is
+    tagged in bits 24-27 of the flags, and back on retrieval.
+
+    bytes are stored as is, str as utf-8, int as its decimal digits (incr and
+    decr work on it). The other values are stored as JSON, or pickled with
+    use_pickle=True: only then are pickled values loaded, unpickling data
+    from a shared cache runs arbitrary code if others can write to it.
+    """
+
+    def __init__(
+        self,
+        use_pickle: bool = False,
+        pickle_protocol: int = pickle.HIGHEST_PROTOCOL,
+    ):
+        self._pickle = use_pickle
+        self._pickle_protocol = pickle_protocol
+
+    def dumps(self, value: Any, flags: int) -> Tuple[bytes, int]:
+        """Returns the value to store and its flags."""
+        value_type = type(value)
+        if value_type is bytes:
+            return value, flags
+        if value_type is str:
+            return value.encode(), flags | _STR
+        if value_type is int:
+            return b"%d" % value, flags | _INT
+
+        return self._dumps(value, flags)
+
+    def _dumps(self, value: Any, flags: int) -> Tuple[bytes, int]:
+        if isinstance(value, (bytearray, memoryview)):
+            return value, flags
+
+        if self._pickle:
+            return pickle.dumps(value, self._pickle_protocol), flags | _PICKLE
+
+        try:
+            return json.dumps(value, separators=(",", ":")).encode(), flags | _JSON
+        except (TypeError, ValueError) as e:
+            raise ValidationException(
+                "value of type {} is not JSON serializable: {}".format(
+                    type(value).__name__, e
+                )
+            )
+
+    def loads(self, value, flags: int) -> Any:
+        """Returns the value stored with flags, raises ValueError if it cannot
+        be loaded.
+        """
+        tag = flags & TYPE_FLAGS
+        if not tag:
+            return value
+        if tag == _STR:
+            return str(value, "utf-8")
+        if tag == _INT:
+            return int(bytes(value))
+
+        return self._loads(value, tag)
+
+    def _loads(self, value, tag: int) -> Any:
+        if tag == _JSON:
+            return json.loads(bytes(value))
+
+        if tag == _PICKLE and self._pickle:
+            try:
+                return pickle.loads(value)
+            except Exception as e:
+                raise ValueError("unpickling failed: {}".format(e))
+
+        raise ValueError("unknown or refused type tag: 0x{:08x}".format(tag))
+
+    def loads_many(
+        self,
+        values: Dict[bytes, Any],
+        info: Dict[bytes, Dict[bytes, Optional[int]]],
+    ) -> (Dict[bytes, Any], Dict[bytes, Dict[bytes, Optional[int]]]):
+        """loads for the results of a multi-key retrieval, the values which
+        cannot be loaded are left out. Returns new dicts.
+        """
+        result_values = {}
+        result_info = {}
+        for key, value in values.items():
+            item_info = info[key]
+            flags = item_info["flags"]
+            tag = flags & TYPE_FLAGS
+            if tag:
+                try:
+                    if tag == _STR:
+                        value = str(value, "utf-8")
+                    elif tag == _INT:
+                        value = int(bytes(value))
+                    else:
+                        value = self._loads(value, tag)
+                except ValueError:
+                    continue
+
+                item_info = dict(item_info, flags=flags & ~TYPE_FLAGS)
+
+            result_values[key] = value
+            result_info[key] = item_info
+
+        return result_values, result_info
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+__all__ = ["SingleFlight"]
+
+
+class SingleFlight:
+    """Deduplicates identical concurrent calls.
+
+    The first caller of a key starts the call in its own task, the callers
+    arriving while it is in flight await the same task. Every caller gets
+    the result, or the exception, of that one call.
+
+    A cancelled caller does not cancel the shared call, the others still get
+    its result.
+    """
+
+    def __init__(self):
+        self._calls = {}  # key -> asyncio.Task
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        return await asyncio.shield(self.start(key, func))
+
+    def start(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """The call of key in flight, or a new one: do without awaiting it."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+
+        return task
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+        if not task.cancelled():
+            # retrieved, even if every caller has been cancelled
+            task.exception()
+
+    async def cancel(self) -> None:
+        """Cancels the calls in flight and waits for them to finish,
+        their callers get CancelledError.
+        """
+        tasks = list(self._calls.values())
+        self._calls.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def forget(self, key: Hashable) -> None:
+        """The next caller of key starts a new call, instead of joining the one
+        in flight (e.g. the key has been written since it started).
+        """
+        self._calls.pop(key, None)
@@ -0,0 +1,113 @@
+import time
+from collections import deque
+from typing import List, Optional
+
+from .constants import DEFAULT_SLOWLOG_MAXLEN, DEFAULT_SLOWLOG_THRESHOLD
+from .hooks import CommandEvent, CommandHook
+
+__all__ = ["SlowLog", "SlowLogEntry"]
+
+
+class SlowLogEntry:
+    """A command which took threshold seconds or more, see SlowLog.
+
+    time: when it completed, time.time()
+    command: "get", "set", ... see CommandEvent
+    keys: its first keys, truncated, key_count: the number of keys
+    request_size, response_size: bytes written and received
+    elapsed, pool_wait, first_byte: seconds from the start of the command
+      to its end, to the connection acquired, to the first byte received
+    connection: "local address:port" of the connection used
+    exception: repr of the exception raised, if any
+    """
+
+    __slots__ = (
+        "time",
+        "command",
+        "keys",
+        "key_count",
+        "request_size",
+        "response_size",
+        "elapsed",
+        "pool_wait",
+        "first_byte",
+        "connection",
+        "exception",
+    )
+
+    def __init__(self, event: CommandEvent, max_keys: int, key_length: int):
+        self.time = time.time()
+        self.command = event.command
+        self.keys = [key[:key_length] for key in event.keys[:max_keys]]
+        self.key_count = len(event.keys)
+        self.request_size = event.request_size
+        self.response_size = event.response_size
+        self.elapsed = event.elapsed
+        self.pool_wait = event.pool_wait
+        self.first_byte = (
+            None if event.first_byte is None else event.first_byte - event.started
+        )
+        self.connection = _connection_name(event)
+        self.exception = None if event.exception is None else repr(event.exception)
+
+    def __repr__(self) -> str:
+        return "<SlowLogEntry {} {:.6f}s keys={}>".format(
+            self.command, self.elapsed, self.key_count
+        )
+
+    def as_dict(self) -> dict:
+        result = {name: getattr(self, name) for name in self.__slots__}
+        result["keys"] = [key.decode("utf-8", "replace") for key in self.keys]
+        return result
+
+
+def _connection_name(event: CommandEvent) -> Optional[str]:
+    if event.connection is None:
+        return None
+
+    sockname = event.connection.writer.get_extra_info("sockname")
+    if not sockname:
+        return None
+    return "{}:{}".format(*sockname[:2])
+
+
+class SlowLog(CommandHook):
+    """Keeps the last maxlen commands which took threshold seconds or more,
+    with their first max_keys keys truncated to key_length bytes.
+
+    Client(slowlog=SlowLog(...)) registers it as a hook of the client (see
+    Client.add_hook), it can be shared by many clients.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_SLOWLOG_THRESHOLD,
+        maxlen: int = DEFAULT_SLOWLOG_MAXLEN,
+        max_keys: int = 4,
+        key_length: int = 64,
+    ):
+        self.threshold = threshold
+        self._max_keys = max_keys
+        self._key_length = key_length
+        self._entries = deque(maxlen=maxlen)
+        self.total = 0  # slow commands seen, the dropped entries included
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def on_complete(self, event: CommandEvent) -> None:
+        if event.finished - event.started >= self.threshold:
+            self.total += 1
+            self._entries.append(SlowLogEntry(event, self._max_keys, self._key_length))
+
+    def entries(self) -> List[SlowLogEntry]:
+        """The entries, oldest first."""
+        return list(self._entries)
+
+    def dump(self) -> List[dict]:
+        """The entries as dicts (str keys), ready for JSON."""
+        return [entry.as_dict() for entry in self._entries]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.total = 0
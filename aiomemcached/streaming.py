@@ -0,0 +1,201 @@
+import asyncio
+import inspect
+import zlib
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .chunking import ChunkManifest
+from .exceptions import ResponseException, ValidationException
+
+__all__ = ["ValueStream"]
+
+
+class ValueStream:
+    """A value received chunk by chunk as it is consumed, see Client.get_stream.
+
+    length: the length of the whole value
+    info: {"flags": ..., "cas": None}
+
+    Iterate it to the end (or write_to/readinto), or close it: until then it
+    holds its connection. Closing a stream before its end disposes of the
+    connection. Use it as an async context manager::
+
+        stream = await client.get_stream(key)
+        if stream is not None:
+            async with stream:
+                async for chunk in stream:
+                    ...
+    """
+
+    def __init__(
+        self,
+        length: int,
+        info: Dict[bytes, Optional[int]],
+        chunk_size: int,
+        read: Callable[..., Awaitable[Any]] = None,
+        read_trailer: Callable[[asyncio.StreamReader], Awaitable[None]] = None,
+        release: Callable[[bool], Awaitable[None]] = None,
+    ):
+        """
+        read(read_response) runs read_response(reader) on the connection, with
+        the client timeout.
+        read_trailer reads what follows the data block, then release(True)
+        returns the connection, release(False) disposes of it.
+        """
+        self.length = length
+        self.info = info
+        self._chunk_size = chunk_size
+        self._remaining = length
+
+        self._read = read
+        self._read_trailer = read_trailer
+        self._release = release
+        self._closed = False
+
+    def __aiter__(self) -> "ValueStream":
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self._closed:
+            raise StopAsyncIteration
+
+        if not self._remaining:
+            try:
+                await self._read(self._read_trailer)
+            except BaseException:
+                await self.aclose()
+                raise
+
+            self._closed = True
+            await self._release(True)
+            raise StopAsyncIteration
+
+        size = min(self._chunk_size, self._remaining)
+        try:
+            chunk = await self._read(lambda reader: reader.readexactly(size))
+        except BaseException:
+            await self.aclose()
+            raise
+
+        self._remaining -= size
+        return chunk
+
+    async def aclose(self) -> None:
+        if not self._closed:
+            self._closed = True
+            await self._release(False)
+
+    async def __aenter__(self) -> "ValueStream":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def write_to(self, file) -> int:
+        """Writes the rest of the value to file, an object with a write method
+        (a coroutine function too), returns the number of bytes written.
+        """
+        written = 0
+        async for chunk in self:
+            result = file.write(chunk)
+            if inspect.isawaitable(result):
+                await result
+            written += len(chunk)
+
+        return written
+
+    async def readinto(self, buffer) -> int:
+        """Reads the rest of the value into a writable buffer, returns the
+        number of bytes read.
+        """
+        buffer = memoryview(buffer).cast("B")
+        if self._remaining > len(buffer):
+            await self.aclose()
+            raise ValidationException(
+                "A value of {} bytes does not fit the {} bytes buffer".format(
+                    self._remaining, len(buffer)
+                )
+            )
+
+        position = 0
+        async for chunk in self:
+            buffer[position : position + len(chunk)] = chunk
+            position += len(chunk)
+
+        return position
+
+
+class ChunkedValueStream(ValueStream):
+    """Streams a large value (see ChunkManifest) chunk after chunk, each one
+    through its own ValueStream.
+
+    The chunks are only known to be complete and consistent as they are
+    read: a missing chunk or a checksum mismatch raises ResponseException,
+    after some of the value may have been consumed already.
+    """
+
+    def __init__(
+        self,
+        length: int,
+        info: Dict[bytes, Optional[int]],
+        chunk_size: int,
+        manifest: ChunkManifest,
+        chunk_keys,
+        open_stream: Callable[[bytes, int], Awaitable[Optional[ValueStream]]],
+    ):
+        super().__init__(length, info, chunk_size)
+        self._manifest = manifest
+        self._chunk_keys = list(chunk_keys)
+        self._open_stream = open_stream
+        self._index = 0
+        self._stream = None  # type: Optional[ValueStream]
+        self._checksum = 0
+
+    async def __anext__(self) -> bytes:
+        while not self._closed:
+            if self._stream is None:
+                if self._index == len(self._chunk_keys):
+                    self._closed = True
+                    if self._remaining or self._checksum != self._manifest.checksum:
+                        raise ResponseException(
+                            "get", self._manifest.version, ext_message="checksum"
+                        )
+                    raise StopAsyncIteration
+
+                self._stream = await self._next_stream()
+
+            try:
+                chunk = await self._stream.__anext__()
+            except StopAsyncIteration:
+                self._stream = None
+                self._index += 1
+                continue
+
+            except BaseException:
+                self._closed = True
+                raise
+
+            self._remaining -= len(chunk)
+            self._checksum = zlib.crc32(chunk, self._checksum)
+            return chunk
+
+        raise StopAsyncIteration
+
+    async def _next_stream(self) -> ValueStream:
+        chunk_key = self._chunk_keys[self._index]
+        stream = await self._open_stream(chunk_key, self._chunk_size)
+        expected = min(self._manifest.chunk_size, self._remaining)
+        if stream is None or stream.length != expected:
+            self._closed = True
+            if stream is not None:
+                await stream.aclose()
+            raise ResponseException(
+                "get", chunk_key, ext_message="missing or truncated chunk"
+            )
+
+        return stream
+
+    async def aclose(self) -> None:
+        self._closed = True
+        if self._stream is not None:
+            stream, self._stream = self._stream, None
+            await stream.aclose()
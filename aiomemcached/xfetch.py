@@ -0,0 +1,49 @@
+"""The envelope of the values of Client.get_or_set: the time their last
+computation took (delta), their logical expiry, then the encoded value.
+
+Readers recompute a value before its expiry with a probability growing as
+the expiry approaches, and with delta: XFetch, from "Optimal Probabilistic
+Cache Stampede Prevention" (Vattani, Chierichetti, Lowenstein). One of the
+readers of a hot key recomputes it ahead of time, the others keep getting
+the cached value.
+"""
+
+import math
+import random
+import struct
+import time
+from typing import Optional, Tuple
+
+__all__ = ["pack_envelope", "unpack_envelope", "should_recompute"]
+
+# version, delta (seconds), expiry (time.time())
+_ENVELOPE = struct.Struct("!Bdd")
+_ENVELOPE_VERSION = 1
+
+
+def pack_envelope(value: bytes, delta: float, expiry: float) -> bytes:
+    return b"".join((_ENVELOPE.pack(_ENVELOPE_VERSION, delta, expiry), value))
+
+
+def unpack_envelope(value: bytes) -> Optional[Tuple[float, float, bytes]]:
+    """(delta, expiry, value), None for a value which is not an envelope."""
+    if len(value) < _ENVELOPE.size:
+        return None
+
+    version, delta, expiry = _ENVELOPE.unpack_from(value)
+    if version != _ENVELOPE_VERSION:
+        return None
+    return delta, expiry, value[_ENVELOPE.size :]
+
+
+def should_recompute(
+    delta: float, expiry: float, beta: float, now: Optional[float] = None
+) -> bool:
+    """True when a reader should recompute a value ahead of its expiry:
+    now - delta * beta * log(rand()) >= expiry, beta > 1 favours earlier
+    recomputations.
+    """
+    if now is None:
+        now = time.time()
+    # 1 - random(): in (0, 1], log(0) is undefined
+    return now - delta * beta * math.log(1.0 - random.random()) >= expiry
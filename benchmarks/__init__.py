@@ -0,0 +1,7 @@
+"""Benchmarks of aiomemcached, not installed with the package.
+
+Run them from the repository root, e.g.::
+
+    python -m benchmarks.suite --quick
+    python -m benchmarks.server --port 11311
+"""
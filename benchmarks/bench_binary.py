@@ -0,0 +1,67 @@
+"""Client CPU time per operation, binary protocol against text protocol.
+
+Usage::
+
+    python -m benchmarks.bench_binary --uri memcached://localhost:11211
+"""
+
+import argparse
+import asyncio
+import time
+
+import aiomemcached
+
+
+async def measure(requests: int, func) -> (float, float):
+    """Returns the process CPU time and the wall time per call, in µs."""
+    started_cpu, started = time.process_time(), time.perf_counter()
+    for _ in range(requests):
+        await func()
+
+    return (
+        (time.process_time() - started_cpu) / requests * 1e6,
+        (time.perf_counter() - started) / requests * 1e6,
+    )
+
+
+async def run(client: aiomemcached.Client, args) -> dict:
+    keys = [b"bench:binary:%d" % i for i in range(args.keys)]
+    value = b"x" * args.value_size
+    await client.set_many({key: value for key in keys})
+
+    results = {
+        "set": await measure(args.requests, lambda: client.set(keys[0], value)),
+        "get": await measure(args.requests, lambda: client.get(keys[0])),
+        "get_many({})".format(args.keys): await measure(
+            args.requests // 10, lambda: client.get_many(keys)
+        ),
+    }
+    await client.close()
+    return results
+
+
+async def main(args):
+    print(
+        "requests={} keys={} value_size={}".format(
+            args.requests, args.keys, args.value_size
+        )
+    )
+
+    text = await run(aiomemcached.Client(uri=args.uri), args)
+    binary = await run(aiomemcached.BinaryClient(uri=args.uri), args)
+    for name in text:
+        print(
+            "{:<14s} text {:>7.1f} µs cpu {:>7.1f} µs wall | "
+            "binary {:>7.1f} µs cpu {:>7.1f} µs wall".format(
+                name, *text[name], *binary[name]
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default="memcached://localhost:11211")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--keys", type=int, default=100)
+    parser.add_argument("--value-size", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
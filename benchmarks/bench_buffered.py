@@ -0,0 +1,82 @@
+"""Large value gets over StreamReader and BufferedProtocol connections.
+
+Reports the time and the bytes allocated per get (tracemalloc), for the
+default bytes values, memoryview values and get_into a reused buffer.
+
+Usage::
+
+    python -m benchmarks.bench_buffered --uri memcached://localhost:11211
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+import aiomemcached
+
+KEY = b"bench:buffered"
+
+
+async def measure(client: aiomemcached.Client, get, rounds: int) -> (float, float):
+    await get()  # connect
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await get()
+    elapsed = (time.perf_counter() - started) / rounds
+
+    tracemalloc.start()
+    for _ in range(rounds):
+        await get()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    await client.close()
+    return elapsed, peak
+
+
+async def main(args):
+    value = bytes(args.size * 1024)
+    buffer = bytearray(len(value))
+    setup = aiomemcached.Client(uri=args.uri)
+    await setup.set(KEY, value)
+    await setup.close()
+
+    cases = [
+        ("stream", dict(), "get"),
+        ("buffered", dict(buffered_protocol=True), "get"),
+        (
+            "buffered memoryview",
+            dict(buffered_protocol=True, memoryview_values=True),
+            "get",
+        ),
+        ("buffered get_into", dict(buffered_protocol=True), "get_into"),
+    ]
+    print("value size {} KB, {} rounds".format(args.size, args.rounds))
+    for name, options, method in cases:
+        client = aiomemcached.Client(uri=args.uri, **options)
+        if method == "get_into":
+
+            def get():
+                return client.get_into(KEY, buffer)
+
+        else:
+
+            def get():
+                return client.get(KEY)
+
+        elapsed, peak = await measure(client, get, args.rounds)
+        print(
+            "{:<20} {:>8.1f} us/get  peak allocated {:>8.1f} KB".format(
+                name, elapsed * 1e6, peak / 1024
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default="memcached://localhost:11211")
+    parser.add_argument("--size", type=int, default=200, help="KB")
+    parser.add_argument("--rounds", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,78 @@
+"""Length-driven response framing against the former readline-until-END framing.
+
+Parses in-memory "get" responses of 100 KB - 1 MB text-like values (a line
+break every 80 bytes), so only the framing and parsing cost is measured.
+
+Usage::
+
+    python -m benchmarks.bench_framing
+"""
+
+import argparse
+import asyncio
+import time
+from io import BytesIO
+
+from aiomemcached.client import Client
+from aiomemcached.constants import END
+
+KEY = b"bench:framing"
+
+
+async def readline_until_end(reader: asyncio.StreamReader) -> dict:
+    """The framing used before, kept here as the reference."""
+    response_stream = BytesIO()
+    while True:
+        line = await reader.readline()
+        response_stream.write(line)
+        if line == END:
+            break
+
+    response_stream.seek(0)
+    values = {}
+    line = response_stream.readline()
+    while line != END:
+        terms = line.split()
+        data_len = int(terms[3])
+        values[terms[1]] = response_stream.read(data_len + 2).rstrip(b"\r\n")
+        line = response_stream.readline()
+
+    return values
+
+
+async def length_driven(reader: asyncio.StreamReader) -> dict:
+    values, _ = await Client._read_retrieval_response(
+        reader, raw_cmd=b"get " + KEY, keys_count=1, with_cas=False
+    )
+    return values
+
+
+async def measure(read_response, response: bytes, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        reader = asyncio.StreamReader(limit=2**30)
+        reader.feed_data(response)
+        reader.feed_eof()
+        await read_response(reader)
+
+    return (time.perf_counter() - started) / rounds
+
+
+async def main(args):
+    for size in args.sizes:
+        value = (b"x" * 78 + b"\r\n") * (size * 1024 // 80)
+        response = b"VALUE %b 0 %d\r\n%b\r\nEND\r\n" % (KEY, len(value), value)
+
+        before = await measure(readline_until_end, response, args.rounds)
+        after = await measure(length_driven, response, args.rounds)
+        print(
+            "{:>5d} KB  readline {:>8.1f} us  length-driven {:>8.1f} us  "
+            "x{:.1f}".format(size, before * 1e6, after * 1e6, before / after)
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 256, 512, 1000])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+"""Wire bytes and time of quiet meta gets against classic multi-key gets.
+
+The client talks to the server through an in-process proxy which counts the
+bytes of each direction.
+
+Usage::
+
+    python -m benchmarks.bench_meta --uri memcached://localhost:11211
+"""
+
+import argparse
+import asyncio
+import time
+
+import aiomemcached
+
+
+class CountingProxy:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.sent = 0
+        self.received = 0
+        self._handlers = set()
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _pipe(self, reader, writer, counter: str):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                setattr(self, counter, getattr(self, counter) + len(data))
+                writer.write(data)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _handle(self, client_reader, client_writer):
+        self._handlers.add(asyncio.current_task())
+        server_reader, server_writer = await asyncio.open_connection(
+            self.host, self.port
+        )
+        await asyncio.gather(
+            self._pipe(client_reader, server_writer, "sent"),
+            self._pipe(server_reader, client_writer, "received"),
+            return_exceptions=True,
+        )
+
+    async def close(self):
+        self.server.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    def reset(self):
+        self.sent = self.received = 0
+
+
+async def measure(proxy: CountingProxy, rounds: int, func) -> (float, int, int):
+    proxy.reset()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await func()
+    elapsed = time.perf_counter() - started
+    return elapsed / rounds, proxy.sent // rounds, proxy.received // rounds
+
+
+async def main(args):
+    host, port = aiomemcached.Client.uri_parser(args.uri)
+    proxy = CountingProxy(host, port)
+    client = aiomemcached.Client(port=await proxy.start())
+
+    keys = [b"bench:meta:%s:%d" % (b"k" * args.key_length, i) for i in range(args.keys)]
+    hits = keys[: int(len(keys) * args.hit_ratio)]
+    await client.delete_many(keys)
+    await client.set_many({key: b"x" * args.value_size for key in hits})
+
+    print(
+        "keys={} hit_ratio={} value_size={} key_length={}".format(
+            args.keys, args.hit_ratio, args.value_size, len(keys[0])
+        )
+    )
+    results = [
+        ("get_many", lambda: client.get_many(keys)),
+        ("meta_get_many", lambda: client.meta_get_many(keys, [b"v", b"f"])),
+        ("get (one per key)", lambda: asyncio.gather(*map(client.get, keys))),
+    ]
+    for name, func in results:
+        elapsed, sent, received = await measure(proxy, args.rounds, func)
+        print(
+            "{:<20s} {:>8.2f} ms {:>9d} bytes sent {:>9d} bytes received".format(
+                name, elapsed * 1000, sent, received
+            )
+        )
+
+    await client.close()
+    await proxy.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default="memcached://localhost:11211")
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--hit-ratio", type=float, default=0.8)
+    parser.add_argument("--value-size", type=int, default=32)
+    parser.add_argument("--key-length", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,63 @@
+"""Throughput of pipelined connections against the acquire-per-command path.
+
+Usage::
+
+    python -m benchmarks.bench_pipeline --uri memcached://localhost:11211
+"""
+
+import argparse
+import asyncio
+import time
+
+import aiomemcached
+
+
+async def run(client: aiomemcached.Client, requests: int, concurrency: int) -> float:
+    key = b"bench:pipeline"
+    await client.set(key, b"x" * 100)
+
+    async def worker(count: int):
+        for _ in range(count):
+            await client.get(key)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker(requests // concurrency) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    await client.close()
+    return requests / elapsed
+
+
+async def main(args):
+    print(
+        "requests={} concurrency={} pool_maxsize={}".format(
+            args.requests, args.concurrency, args.pool_maxsize
+        )
+    )
+
+    ops = await run(
+        aiomemcached.Client(uri=args.uri, pool_maxsize=args.pool_maxsize),
+        args.requests,
+        args.concurrency,
+    )
+    print("acquire-per-command: {:>10.0f} ops/s".format(ops))
+
+    for max_inflight in args.max_inflight:
+        client = aiomemcached.Client(
+            uri=args.uri,
+            pool_maxsize=args.pool_maxsize,
+            pipeline=True,
+            pipeline_max_inflight=max_inflight,
+        )
+        ops = await run(client, args.requests, args.concurrency)
+        print("pipeline max_inflight={:<4d} {:>10.0f} ops/s".format(max_inflight, ops))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default="memcached://localhost:11211")
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--pool-maxsize", type=int, default=5)
+    parser.add_argument("--max-inflight", type=int, nargs="+", default=[1, 8, 32, 128])
+    asyncio.run(main(parser.parse_args()))
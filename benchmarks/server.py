@@ -0,0 +1,645 @@
+"""A memcached stand-in over asyncio, for the benchmarks.
+
+Speaks the text protocol commands sent by aiomemcached.Client: get/gets,
+the storage commands, delete, incr/decr, touch, stats, version, flush_all
+and the meta commands (mg, ms, md, ma, mn). Items expire, and the least
+recently used ones are evicted beyond memory_limit bytes.
+
+It is not a memcached replacement: a single event loop, no slabs, no
+binary protocol, only the common meta flags.
+
+Usage::
+
+    python -m benchmarks.server --port 11311 --memory-limit 64
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+__all__ = ["StandInServer", "Storage"]
+
+# longer exptimes are unix timestamps
+_RELATIVE_EXPTIME_MAX = 60 * 60 * 24 * 30
+# accounted for each item on top of its key and value
+_ITEM_OVERHEAD = 48
+
+_VERSION = b"1.6.21"
+
+END = b"END\r\n"
+ERROR = b"ERROR\r\n"
+BAD_FORMAT = b"CLIENT_ERROR bad command line format\r\n"
+BAD_CHUNK = b"CLIENT_ERROR bad data chunk\r\n"
+NON_NUMERIC = b"CLIENT_ERROR cannot increment or decrement non-numeric value\r\n"
+TOO_LARGE = b"SERVER_ERROR object too large for cache\r\n"
+
+
+class Item:
+    __slots__ = ("value", "flags", "expires", "cas", "stale", "pending", "win_sent")
+
+    def __init__(self, value: bytes, flags: int, expires: float, cas: int):
+        self.value = value
+        self.flags = flags
+        self.expires = expires  # time.monotonic(), 0: never
+        self.cas = cas
+        # meta protocol: invalidated (stale) or vivified items are pending a
+        # recache, the first mg wins it
+        self.stale = False
+        self.pending = False
+        self.win_sent = False
+
+    def ttl(self) -> int:
+        """Remaining seconds, -1 for an item which never expires."""
+        if not self.expires:
+            return -1
+        return max(int(self.expires - time.monotonic()), 0)
+
+
+class Storage:
+    """Items in LRU order within memory_limit bytes, expired on access."""
+
+    def __init__(self, memory_limit: int, max_item_size: int):
+        self.memory_limit = memory_limit
+        self.max_item_size = max_item_size
+        self._items = OrderedDict()  # key -> Item, least recently used first
+        self._cas = 0
+
+        self.size = 0
+        self.total_items = 0
+        self.evictions = 0
+        self.get_hits = 0
+        self.get_misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @staticmethod
+    def expires(exptime: int) -> float:
+        if exptime == 0:
+            return 0
+        if exptime < 0:
+            return -1
+
+        now = time.monotonic()
+        if exptime > _RELATIVE_EXPTIME_MAX:
+            return now + exptime - time.time()
+        return now + exptime
+
+    def get(self, key: bytes) -> Optional[Item]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+
+        if item.expires and item.expires <= time.monotonic():
+            self.delete(key)
+            return None
+
+        self._items.move_to_end(key)
+        return item
+
+    def lookup(self, key: bytes) -> Optional[Item]:
+        """get, counted as a hit or a miss"""
+        item = self.get(key)
+        if item is None:
+            self.get_misses += 1
+        else:
+            self.get_hits += 1
+        return item
+
+    def store(self, key: bytes, value: bytes, flags: int, expires: float) -> Item:
+        self.delete(key)
+        self._cas += 1
+        item = self._items[key] = Item(value, flags, expires, self._cas)
+        self.size += len(key) + len(value) + _ITEM_OVERHEAD
+        self.total_items += 1
+
+        while self.size > self.memory_limit and len(self._items) > 1:
+            oldest = next(iter(self._items))
+            self.delete(oldest)
+            self.evictions += 1
+
+        return item
+
+    def update(self, key: bytes, item: Item, value: bytes) -> None:
+        """Replaces the value of item in place, a new cas."""
+        self.size += len(value) - len(item.value)
+        item.value = value
+        self._cas += 1
+        item.cas = self._cas
+
+    def delete(self, key: bytes) -> bool:
+        item = self._items.pop(key, None)
+        if item is None:
+            return False
+
+        self.size -= len(key) + len(item.value) + _ITEM_OVERHEAD
+        return True
+
+    def flush(self) -> None:
+        self._items.clear()
+        self.size = 0
+
+
+def _noreply(terms: List[bytes], index: int) -> bool:
+    return len(terms) > index and terms[index] == b"noreply"
+
+
+def _arithmetic(value: bytes, delta: int, incr: bool) -> Optional[bytes]:
+    """The new value of a counter, None if it is not one."""
+    if not value.isdigit():
+        return None
+
+    if incr:
+        return b"%d" % ((int(value) + delta) % 2**64)
+    return b"%d" % max(int(value) - delta, 0)
+
+
+class _Quit(Exception):
+    pass
+
+
+class StandInServer:
+    """Serves a Storage on host:port (port 0: a free one, see port)::
+
+    async with StandInServer() as server:
+        client = aiomemcached.Client(uri=server.uri)
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        memory_limit: int = 64 * 1024 * 1024,
+        max_item_size: int = 1024 * 1024,
+    ):
+        self.host = host
+        self.port = port
+        self.storage = Storage(memory_limit, max_item_size)
+        self._server = None
+        self._started = time.time()
+        self._connections = 0
+        self._cmd_get = 0
+        self._cmd_set = 0
+
+        # command -> (handler(terms, data), index of the data length term)
+        self._commands = {
+            b"get": (self._get, None),
+            b"gets": (self._gets, None),
+            b"set": (self._store, 4),
+            b"add": (self._store, 4),
+            b"replace": (self._store, 4),
+            b"append": (self._store, 4),
+            b"prepend": (self._store, 4),
+            b"cas": (self._store, 4),
+            b"delete": (self._delete, None),
+            b"incr": (self._incr_decr, None),
+            b"decr": (self._incr_decr, None),
+            b"touch": (self._touch, None),
+            b"stats": (self._stats, None),
+            b"version": (self._version, None),
+            b"flush_all": (self._flush_all, None),
+            b"verbosity": (self._verbosity, None),
+            b"quit": (self._quit, None),
+            b"mg": (self._meta_get, None),
+            b"ms": (self._meta_set, 2),
+            b"md": (self._meta_delete, None),
+            b"ma": (self._meta_arithmetic, None),
+            b"mn": (self._meta_noop, None),
+        }  # type: Dict[bytes, tuple]
+
+    @property
+    def uri(self) -> str:
+        return "memcached://{}:{}".format(self.host, self.port)
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "StandInServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.endswith(b"\n"):
+                    break
+
+                response = await self._execute(line, reader)
+                if response:
+                    writer.write(response)
+                    await writer.drain()
+
+        except (_Quit, ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+        except asyncio.CancelledError:
+            # the loop is shutting down with the connection open, a cancelled
+            # handler is reported as an error by StreamReaderProtocol
+            pass
+
+        finally:
+            self._connections -= 1
+            writer.close()
+
+    async def _execute(self, line: bytes, reader: asyncio.StreamReader) -> bytes:
+        terms = line.split()
+        if not terms:
+            return ERROR
+
+        command = self._commands.get(terms[0])
+        if command is None:
+            return ERROR
+
+        handler, length_index = command
+        data = None
+        if length_index is not None:
+            try:
+                length = int(terms[length_index])
+            except (IndexError, ValueError):
+                return BAD_FORMAT
+
+            data = await reader.readexactly(length + 2)
+            if data[-2:] != b"\r\n":
+                return BAD_CHUNK
+            data = data[:-2]
+            if length > self.storage.max_item_size:
+                return TOO_LARGE
+
+        try:
+            return handler(terms, data)
+        except (IndexError, ValueError):
+            return BAD_FORMAT
+
+    # text commands ---
+
+    def _get(
+        self, terms: List[bytes], data: Optional[bytes], with_cas: bool = False
+    ) -> bytes:
+        if len(terms) < 2:
+            return ERROR
+
+        self._cmd_get += len(terms) - 1
+        chunks = []
+        for key in terms[1:]:
+            item = self.storage.lookup(key)
+            if item is None:
+                continue
+
+            chunks.append(
+                b"VALUE %b %d %d%b\r\n%b\r\n"
+                % (
+                    key,
+                    item.flags,
+                    len(item.value),
+                    b" %d" % item.cas if with_cas else b"",
+                    item.value,
+                )
+            )
+
+        chunks.append(END)
+        return b"".join(chunks)
+
+    def _gets(self, terms: List[bytes], data: Optional[bytes]) -> bytes:
+        return self._get(terms, data, with_cas=True)
+
+    def _store(self, terms: List[bytes], data: bytes) -> Optional[bytes]:
+        command, key = terms[0], terms[1]
+        flags, exptime = int(terms[2]), int(terms[3])
+        cas = int(terms[5]) if command == b"cas" else None
+        noreply = _noreply(terms, 6 if command == b"cas" else 5)
+        self._cmd_set += 1
+
+        item = self.storage.get(key)
+        if command == b"cas":
+            if item is None:
+                response = b"NOT_FOUND\r\n"
+            elif item.cas != cas:
+                response = b"EXISTS\r\n"
+            else:
+                response = None
+
+        elif command == b"add":
+            response = None if item is None else b"NOT_STORED\r\n"
+
+        elif command in (b"replace", b"append", b"prepend"):
+            response = b"NOT_STORED\r\n" if item is None else None
+
+        else:
+            response = None
+
+        if response is None:
+            if command == b"append":
+                self.storage.update(key, item, item.value + data)
+            elif command == b"prepend":
+                self.storage.update(key, item, data + item.value)
+            else:
+                self.storage.store(key, data, flags, self.storage.expires(exptime))
+            response = b"STORED\r\n"
+
+        return None if noreply else response
+
+    def _delete(self, terms: List[bytes], data: Optional[bytes]) -> Optional[bytes]:
+        deleted = self.storage.get(terms[1]) is not None
+        if deleted:
+            self.storage.delete(terms[1])
+
+        if _noreply(terms, len(terms) - 1):
+            return None
+        return b"DELETED\r\n" if deleted else b"NOT_FOUND\r\n"
+
+    def _incr_decr(self, terms: List[bytes], data: Optional[bytes]) -> Optional[bytes]:
+        key, delta = terms[1], int(terms[2])
+        item = self.storage.get(key)
+        if item is None:
+            response = b"NOT_FOUND\r\n"
+        else:
+            value = _arithmetic(item.value, delta, terms[0] == b"incr")
+            if value is None:
+                return NON_NUMERIC
+
+            self.storage.update(key, item, value)
+            response = value + b"\r\n"
+
+        return None if _noreply(terms, 3) else response
+
+    def _touch(self, terms: List[bytes], data: Optional[bytes]) -> Optional[bytes]:
+        item = self.storage.get(terms[1])
+        if item is not None:
+            item.expires = self.storage.expires(int(terms[2]))
+
+        if _noreply(terms, 3):
+            return None
+        return b"NOT_FOUND\r\n" if item is None else b"TOUCHED\r\n"
+
+    def _stats(self, terms: List[bytes], data: Optional[bytes]) -> bytes:
+        if len(terms) > 1:
+            # stats items, slabs, ...: none of them
+            return END
+
+        storage = self.storage
+        stats = (
+            (b"pid", os.getpid()),
+            (b"uptime", int(time.time() - self._started)),
+            (b"time", int(time.time())),
+            (b"version", _VERSION),
+            (b"curr_connections", self._connections),
+            (b"cmd_get", self._cmd_get),
+            (b"cmd_set", self._cmd_set),
+            (b"get_hits", storage.get_hits),
+            (b"get_misses", storage.get_misses),
+            (b"curr_items", len(storage)),
+            (b"total_items", storage.total_items),
+            (b"bytes", storage.size),
+            (b"evictions", storage.evictions),
+            (b"limit_maxbytes", storage.memory_limit),
+        )
+        lines = [
+            b"STAT %b %b\r\n"
+            % (name, value if isinstance(value, bytes) else b"%d" % value)
+            for name, value in stats
+        ]
+        return b"".join(lines) + END
+
+    def _version(self, terms: List[bytes], data: Optional[bytes]) -> bytes:
+        return b"VERSION %b\r\n" % _VERSION
+
+    def _flush_all(self, terms: List[bytes], data: Optional[bytes]) -> Optional[bytes]:
+        self.storage.flush()
+        return None if _noreply(terms, len(terms) - 1) else b"OK\r\n"
+
+    def _verbosity(self, terms: List[bytes], data: Optional[bytes]) -> Optional[bytes]:
+        return None if _noreply(terms, len(terms) - 1) else b"OK\r\n"
+
+    def _quit(self, terms: List[bytes], data: Optional[bytes]) -> None:
+        raise _Quit()
+
+    # meta commands ---
+
+    @staticmethod
+    def _meta_parse(terms: List[bytes], first_flag: int) -> (bytes, Dict[bytes, bytes]):
+        """Returns the key, decoded if base64, and {flag: token}"""
+        flags = {term[:1]: term[1:] for term in terms[first_flag:]}
+        key = terms[1]
+        if b"b" in flags:
+            key = base64.b64decode(key)
+        return key, flags
+
+    @staticmethod
+    def _meta_response(
+        status: bytes,
+        terms: List[bytes],
+        flags: Dict[bytes, bytes],
+        item: Optional[Item] = None,
+        extra: List[bytes] = (),
+        value: Optional[bytes] = None,
+    ) -> bytes:
+        """status, the flags returned as requested, then value as a data block."""
+        tokens = [status]
+        if value is not None:
+            tokens.append(b"%d" % len(value))
+
+        for flag, token in flags.items():
+            if flag == b"O":
+                tokens.append(b"O" + token)
+            elif flag == b"k":
+                tokens.append(b"k" + terms[1])
+                if b"b" in flags:
+                    tokens.append(b"b")
+            elif item is None:
+                continue
+            elif flag == b"c":
+                tokens.append(b"c%d" % item.cas)
+            elif flag == b"f":
+                tokens.append(b"f%d" % item.flags)
+            elif flag == b"s":
+                tokens.append(b"s%d" % len(item.value))
+            elif flag == b"t":
+                tokens.append(b"t%d" % item.ttl())
+
+        tokens.extend(extra)
+        response = b" ".join(tokens) + b"\r\n"
+        if value is not None:
+            response += value + b"\r\n"
+        return response
+
+    def _meta_get(self, terms: List[bytes], data: Optional[bytes]) -> Optional[bytes]:
+        key, flags = self._meta_parse(terms, 2)
+        self._cmd_get += 1
+        item = self.storage.lookup(key)
+        extra = []
+        if item is None:
+            if b"N" not in flags:
+                return (
+                    None if b"q" in flags else self._meta_response(b"EN", terms, flags)
+                )
+
+            # vivified: a placeholder, this client recaches it
+            item = self.storage.store(
+                key, b"", 0, self.storage.expires(int(flags[b"N"]))
+            )
+            item.pending = item.win_sent = True
+            extra.append(b"W")
+
+        else:
+            if b"T" in flags:
+                item.expires = self.storage.expires(int(flags[b"T"]))
+
+            recache = b"R" in flags and 0 <= item.ttl() < int(flags[b"R"])
+            if item.pending or recache:
+                extra.append(b"Z" if item.win_sent else b"W")
+                item.win_sent = True
+            if item.stale:
+                extra.append(b"X")
+
+        value = item.value if b"v" in flags else None
+        return self._meta_response(
+            b"VA" if value is not None else b"HD", terms, flags, item, extra, value
+        )
+
+    def _meta_set(self, terms: List[bytes], data: bytes) -> Optional[bytes]:
+        key, flags = self._meta_parse(terms, 3)
+        self._cmd_set += 1
+        mode = flags.get(b"M", b"S").upper()
+        item = self.storage.get(key)
+
+        status = None
+        if b"C" in flags:
+            if item is None:
+                status = b"NF"
+            elif item.cas != int(flags[b"C"]):
+                status = b"EX"
+        elif mode == b"E" and item is not None:
+            status = b"NS"
+        elif mode in (b"R", b"A", b"P") and item is None:
+            status = b"NS"
+
+        if status is None:
+            status = b"HD"
+            if mode == b"A":
+                self.storage.update(key, item, item.value + data)
+            elif mode == b"P":
+                self.storage.update(key, item, data + item.value)
+            else:
+                item = self.storage.store(
+                    key,
+                    data,
+                    int(flags.get(b"F") or 0),
+                    self.storage.expires(int(flags.get(b"T") or 0)),
+                )
+
+        if status == b"HD" and b"q" in flags:
+            return None
+        return self._meta_response(status, terms, flags, item)
+
+    def _meta_delete(
+        self, terms: List[bytes], data: Optional[bytes]
+    ) -> Optional[bytes]:
+        key, flags = self._meta_parse(terms, 2)
+        item = self.storage.get(key)
+        if item is None:
+            status = b"NF"
+        elif b"C" in flags and item.cas != int(flags[b"C"]):
+            status = b"EX"
+        else:
+            status = b"HD"
+            if b"I" in flags:
+                # invalidated, served stale until recached
+                item.stale = item.pending = True
+                item.win_sent = False
+                if b"T" in flags:
+                    item.expires = self.storage.expires(int(flags[b"T"]))
+            else:
+                self.storage.delete(key)
+
+        if status in (b"HD", b"NF") and b"q" in flags:
+            return None
+        return self._meta_response(status, terms, flags)
+
+    def _meta_arithmetic(
+        self, terms: List[bytes], data: Optional[bytes]
+    ) -> Optional[bytes]:
+        key, flags = self._meta_parse(terms, 2)
+        item = self.storage.get(key)
+        if item is None:
+            if b"N" not in flags:
+                if b"q" in flags:
+                    return None
+                return self._meta_response(b"NF", terms, flags)
+
+            item = self.storage.store(
+                key,
+                b"%d" % int(flags.get(b"J") or 0),
+                0,
+                self.storage.expires(int(flags[b"N"])),
+            )
+
+        else:
+            value = _arithmetic(
+                item.value,
+                int(flags.get(b"D") or 1),
+                flags.get(b"M", b"I").upper() in (b"I", b"+"),
+            )
+            if value is None:
+                return NON_NUMERIC
+
+            self.storage.update(key, item, value)
+            if b"T" in flags:
+                item.expires = self.storage.expires(int(flags[b"T"]))
+
+        if b"v" in flags:
+            return self._meta_response(b"VA", terms, flags, item, value=item.value)
+        if b"q" in flags:
+            return None
+        return self._meta_response(b"HD", terms, flags, item)
+
+    def _meta_noop(self, terms: List[bytes], data: Optional[bytes]) -> bytes:
+        return b"MN\r\n"
+
+
+async def serve(server: StandInServer) -> None:
+    async with server:
+        print("memcached stand-in listening on {}".format(server.uri), flush=True)
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11311)
+    parser.add_argument("--memory-limit", type=int, default=64, help="megabytes")
+    parser.add_argument("--max-item-size", type=int, default=1024 * 1024)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(
+            serve(
+                StandInServer(
+                    args.host,
+                    args.port,
+                    memory_limit=args.memory_limit * 1024 * 1024,
+                    max_item_size=args.max_item_size,
+                )
+            )
+        )
+    except KeyboardInterrupt:
+        pass
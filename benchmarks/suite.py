@@ -0,0 +1,289 @@
+"""Throughput and latency of get/set/get_many over a matrix of value sizes,
+key counts, pool sizes and concurrency levels.
+
+Runs against a memcached stand-in (see benchmarks.server) started in a
+subprocess, or against --uri. Writes the results as JSON, and compares
+them with the results of another run (another commit)::
+
+    python -m benchmarks.suite --output base.json
+    git checkout my-branch
+    python -m benchmarks.suite --output mine.json --compare base.json
+
+--compare exits with 1 when a case lost more than --tolerance of its
+throughput.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import socket
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+import aiomemcached
+
+RESULTS_FORMAT = 1
+
+
+class Case:
+    __slots__ = ("op", "value_size", "keys", "pool_size", "concurrency")
+
+    def __init__(
+        self, op: str, value_size: int, keys: int, pool_size: int, concurrency: int
+    ):
+        self.op = op
+        self.value_size = value_size
+        self.keys = keys  # per get_many, 1 for get/set
+        self.pool_size = pool_size
+        self.concurrency = concurrency
+
+    @property
+    def name(self) -> str:
+        return "{}/k{}/v{}/p{}/c{}".format(
+            self.op, self.keys, self.value_size, self.pool_size, self.concurrency
+        )
+
+
+def build_cases(args) -> List[Case]:
+    cases = []
+    for value_size, pool_size, concurrency in itertools.product(
+        args.value_sizes, args.pool_sizes, args.concurrency
+    ):
+        for op in ("get", "set"):
+            cases.append(Case(op, value_size, 1, pool_size, concurrency))
+        for keys in args.keys:
+            cases.append(Case("get_many", value_size, keys, pool_size, concurrency))
+
+    return cases
+
+
+def percentile(latencies: List[float], q: float) -> float:
+    """latencies: sorted"""
+    return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+
+async def run_case(uri: str, case: Case, requests: int) -> dict:
+    client = aiomemcached.Client(
+        uri=uri, pool_minsize=case.pool_size, pool_maxsize=case.pool_size
+    )
+    value = b"x" * case.value_size
+    keys = [
+        b"bench:suite:%d:%d" % (case.value_size, i)
+        for i in range(max(case.keys, case.concurrency))
+    ]
+    await client.set_many({key: value for key in keys})
+
+    if case.op == "get":
+
+        def command(i: int):
+            return client.get(keys[i % len(keys)])
+
+    elif case.op == "set":
+
+        def command(i: int):
+            return client.set(keys[i % len(keys)], value)
+
+    else:
+
+        def command(i: int):
+            start = i % (len(keys) - case.keys + 1)
+            return client.get_many(keys[start : start + case.keys])
+
+    latencies = []
+
+    async def worker(first: int, count: int, record: bool):
+        for i in range(first, first + count):
+            started = time.perf_counter()
+            await command(i)
+            if record:
+                latencies.append(time.perf_counter() - started)
+
+    per_worker = max(requests // case.concurrency, 1)
+    # warm up: connections opened, code paths hot
+    await asyncio.gather(
+        *[worker(i, max(per_worker // 10, 1), False) for i in range(case.concurrency)]
+    )
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *[worker(i * per_worker, per_worker, True) for i in range(case.concurrency)]
+    )
+    elapsed = time.perf_counter() - started
+    await client.close()
+
+    latencies.sort()
+    return {
+        "name": case.name,
+        "op": case.op,
+        "value_size": case.value_size,
+        "keys": case.keys,
+        "pool_size": case.pool_size,
+        "concurrency": case.concurrency,
+        "requests": len(latencies),
+        "elapsed": elapsed,
+        "ops_per_sec": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "mean": sum(latencies) / len(latencies),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class StandInProcess:
+    """benchmarks.server in a subprocess, on a free port."""
+
+    def __init__(self, memory_limit: int):
+        self._memory_limit = memory_limit
+        self._process = None
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+
+    @property
+    def uri(self) -> str:
+        return "memcached://127.0.0.1:{}".format(self.port)
+
+    def __enter__(self) -> "StandInProcess":
+        self._process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.server",
+                "--port",
+                str(self.port),
+                "--memory-limit",
+                str(self._memory_limit),
+            ],
+            stdout=subprocess.DEVNULL,
+        )
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", self.port)).close()
+                return self
+            except OSError:
+                time.sleep(0.05)
+
+        self._process.kill()
+        raise RuntimeError("the stand-in server did not start")
+
+    def __exit__(self, *exc_info) -> None:
+        self._process.terminate()
+        self._process.wait()
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float) -> bool:
+    """Prints the changes against baseline, returns False on a regression."""
+    base = {result["name"]: result for result in baseline}
+    ok = True
+    print("\n{:<36} {:>10} {:>10} {:>8} {:>8}".format("", "ops/s", "base", "", "p99"))
+    for result in results:
+        other = base.get(result["name"])
+        if other is None:
+            continue
+
+        change = result["ops_per_sec"] / other["ops_per_sec"] - 1
+        p99_change = result["p99"] / other["p99"] - 1 if other["p99"] else 0.0
+        regression = change < -tolerance
+        ok = ok and not regression
+        print(
+            "{:<36} {:>10.0f} {:>10.0f} {:>+7.1%} {:>+7.1%}{}".format(
+                result["name"],
+                result["ops_per_sec"],
+                other["ops_per_sec"],
+                change,
+                p99_change,
+                "  REGRESSION" if regression else "",
+            )
+        )
+
+    return ok
+
+
+async def run(uri: str, cases: List[Case], requests: int) -> List[dict]:
+    results = []
+    print("{:<36} {:>10} {:>10} {:>10}".format("case", "ops/s", "p50 us", "p99 us"))
+    for case in cases:
+        result = await run_case(uri, case, requests)
+        results.append(result)
+        print(
+            "{:<36} {:>10.0f} {:>10.1f} {:>10.1f}".format(
+                case.name,
+                result["ops_per_sec"],
+                result["p50"] * 1000000,
+                result["p99"] * 1000000,
+            )
+        )
+
+    return results
+
+
+def main(args) -> int:
+    if args.quick:
+        args.value_sizes, args.pool_sizes = [100, 10000], [4]
+        args.concurrency, args.keys = [1, 32], [10]
+        args.requests = min(args.requests, 2000)
+
+    cases = build_cases(args)
+    if args.uri is None:
+        with StandInProcess(args.memory_limit) as server:
+            results = asyncio.run(run(server.uri, cases, args.requests))
+    else:
+        results = asyncio.run(run(args.uri, cases, args.requests))
+
+    document = {
+        "format": RESULTS_FORMAT,
+        "meta": {
+            "commit": _git_commit(),
+            "aiomemcached": aiomemcached.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "server": args.uri or "stand-in",
+            "time": time.time(),
+            "requests": args.requests,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline["results"], args.tolerance):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", help="default: a stand-in server")
+    parser.add_argument("--memory-limit", type=int, default=256, help="megabytes")
+    parser.add_argument("--requests", type=int, default=5000, help="per case")
+    parser.add_argument(
+        "--value-sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000]
+    )
+    parser.add_argument("--keys", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 128])
+    parser.add_argument("--quick", action="store_true", help="a reduced matrix")
+    parser.add_argument("--output", help="JSON results file")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    sys.exit(main(parser.parse_args()))
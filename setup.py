@@ -168,7 +168,9 @@ setup(
     #   py_modules=["my_module"],
     #
     # packages=find_packages(where='src'),  # Required
-    packages=find_packages(exclude=["contrib", "docs", "tests", "test_*"]),
+    packages=find_packages(
+        exclude=["contrib", "docs", "tests", "test_*", "benchmarks", "benchmarks.*"]
+    ),
     # Specify which Python versions you support. In contrast to the
     # 'Programming Language' classifiers above, 'pip install' will check this
     # and refuse to install the project if the version does not match. If you
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+
+import pytest
+
+from aiomemcached.client import Client
+from benchmarks import suite
+from benchmarks.server import StandInServer
+
+
+@pytest.mark.asyncio
+async def test_stand_in_server():
+    async with StandInServer() as server:
+        client = Client(uri=server.uri)
+        assert await client.set(b"key", b"value", flags=3)
+        assert (await client.get(b"key"))[0] == b"value"
+        assert (await client.get(b"missing"))[0] is None
+
+        value, info = await client.gets(b"key")
+        assert not await client.cas(b"key", b"other", info["cas"] + 1)
+        assert await client.cas(b"key", b"other", info["cas"])
+        assert (await client.get(b"key"))[0] == b"other"
+
+        assert await client.add(b"key", b"x") is False
+        assert await client.append(b"key", b"!")
+        assert (await client.get(b"key"))[0] == b"other!"
+
+        await client.set(b"counter", b"10")
+        assert await client.incr(b"counter", 5) == 15
+        assert await client.decr(b"counter", 20) == 0
+
+        await client.set(b"expiring", b"x", exptime=1)
+        await asyncio.sleep(1.1)
+        assert (await client.get(b"expiring"))[0] is None
+
+        response = await client.meta_get(b"key", (b"v", b"t"))
+        assert response.status == b"VA"
+        assert response.value == b"other!"
+        assert response.flags[b"t"] == b"-1"
+
+        assert await client.delete(b"key")
+        response = await client.meta_get(b"key", (b"v", b"N30"))
+        assert response.value == b""
+        assert b"W" in response.flags
+        response = await client.meta_get(b"key", (b"v",))
+        assert b"Z" in response.flags
+
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_stand_in_server_lru():
+    async with StandInServer(memory_limit=10000) as server:
+        client = Client(uri=server.uri)
+        for i in range(10):
+            await client.set(b"key:%d" % i, b"x" * 1000)
+            await client.get(b"key:0")
+
+        assert (await client.get(b"key:0"))[0] is not None
+        assert (await client.get(b"key:1"))[0] is None
+        assert (await client.get(b"key:9"))[0] is not None
+        assert server.storage.evictions > 0
+        assert server.storage.size <= 10000
+
+        stats = await client.stats()
+        assert int(stats[b"evictions"]) == server.storage.evictions
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_suite(tmp_path):
+    args = argparse.Namespace(
+        value_sizes=[100], pool_sizes=[2], concurrency=[1, 4], keys=[5]
+    )
+    cases = suite.build_cases(args)
+    assert [case.name for case in cases] == [
+        "get/k1/v100/p2/c1",
+        "set/k1/v100/p2/c1",
+        "get_many/k5/v100/p2/c1",
+        "get/k1/v100/p2/c4",
+        "set/k1/v100/p2/c4",
+        "get_many/k5/v100/p2/c4",
+    ]
+
+    async with StandInServer() as server:
+        results = await suite.run(server.uri, cases, 40)
+
+    assert len(results) == 6
+    for result in results:
+        assert result["requests"] == 40
+        assert result["ops_per_sec"] > 0
+        assert 0 < result["p50"] <= result["p99"]
+
+    json.dumps(results)
+    slower = [dict(result, ops_per_sec=result["ops_per_sec"] / 2) for result in results]
+    assert suite.compare(results, results, 0.1)
+    assert suite.compare(results, slower, 0.1)
+    assert not suite.compare(slower, results, 0.1)
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from aiomemcached.binary import BinaryClient, pack_request
+from aiomemcached.exceptions import ResponseException, ValidationException
+
+
+@pytest.fixture
+async def binary_client(mcache_params):
+    client = BinaryClient(**mcache_params)
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_binary_storage(binary_client):
+    client = binary_client
+    key = b"test:key:binary"
+    await client.delete(key)
+
+    assert await client.set(key, b"1", flags=7)
+    assert await client.get(key) == (b"1", {"flags": 7, "cas": None})
+
+    value, info = await client.gets(key)
+    assert not await client.cas(key, b"2", info["cas"] + 1)
+    assert await client.cas(key, b"2", info["cas"])
+
+    assert not await client.add(key, b"3")
+    assert await client.replace(key, b"3")
+    assert not await client.replace(b"not:" + key, b"3")
+    assert await client.append(key, b"4")
+    assert await client.prepend(key, b"2")
+    assert not await client.append(b"not:" + key, b"4")
+    assert await client.get(key) == (b"234", {"flags": 0, "cas": None})
+
+    assert await client.incr(key, 6) == 240
+    assert await client.decr(key, 250) == 0
+    assert await client.incr(b"not:" + key) is None
+
+    assert await client.touch(key, 100)
+    assert not await client.touch(b"not:" + key, 100)
+
+    assert await client.delete(key)
+    assert not await client.delete(key)
+    assert await client.get(key, b"default") == (b"default", {})
+
+    await client.set(key, b"text")
+    with pytest.raises(ResponseException):
+        await client.incr(key)
+
+
+@pytest.mark.asyncio
+async def test_binary_get_many(binary_client):
+    client = binary_client
+    keys = [b"test:key:binary:%d" % i for i in range(20)]
+    for key in keys[:10]:
+        await client.set(key, key, flags=1)
+
+    values, info = await client.get_many(keys + [keys[0]])
+    assert values == {key: key for key in keys[:10]}
+    assert info[keys[0]] == {"flags": 1, "cas": None}
+
+    values, info = await client.gets_many(keys)
+    assert len(values) == 10
+    assert all(isinstance(info[key]["cas"], int) for key in values)
+
+    buffer = bytearray(100)
+    data_len, info = await client.get_into(keys[1], buffer)
+    assert (data_len, info["flags"]) == (len(keys[1]), 1)
+    assert bytes(buffer[: len(keys[1])]) == keys[1]
+    assert await client.get_into(keys[-1], buffer) == (None, {})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pipeline", [False, True])
+async def test_binary_bulk_and_noreply(mcache_params, pipeline):
+    client = BinaryClient(
+        pool_minsize=1, pool_maxsize=1, pipeline=pipeline, **mcache_params
+    )
+    keys = [b"test:key:binary:bulk:%d" % i for i in range(150)]
+    await client.delete_many(keys)
+
+    assert await client.set_many({key: key for key in keys[:100]}, batch_size=30)
+    result = await client.add_many([(key, b"add") for key in keys[90:]])
+    assert result == {key: i >= 10 for i, key in enumerate(keys[90:])}
+
+    result = await client.touch_many(keys[:5] + [b"not:" + keys[0]], 100)
+    assert result.pop(b"not:" + keys[0]) is False
+    assert result == {key: True for key in keys[:5]}
+    with pytest.raises(ValidationException):
+        await client.touch_many(keys[:5], -1)
+
+    result = await client.delete_many(keys[:50] + [b"not:" + keys[0]])
+    assert result[b"not:" + keys[0]] is False
+    assert all(result[key] for key in keys[:50])
+
+    key = keys[-1]
+    assert await client.set(key, b"1", noreply=True) is None
+    assert await client.incr(key, 2, noreply=True) is None
+    assert await client.touch(key, 100, noreply=True) is None
+    # an unknown opcode: its error response must not desync the connection
+    await client._execute_raw_cmd(pack_request(0x50, key), noreply=True)
+    assert await client.get(key) == (b"3", {"flags": 0, "cas": None})
+    assert await client.delete(key, noreply=True) is None
+    assert await client.get(key) == (None, {})
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_binary_server_commands(binary_client):
+    client = binary_client
+    assert b"pid" in await client.stats()
+    assert await client.version()
+
+    key = b"test:key:binary"
+    for command in (
+        client.meta_get(key),
+        client.meta_set(key, b"value"),
+        client.meta_delete(key),
+        client.meta_arithmetic(key),
+        client.meta_get_many([key]),
+        client.meta_set_many({key: b"value"}),
+        client.get_with_lease(key, meta=True),
+    ):
+        with pytest.raises(ValidationException, match="text protocol"):
+            await command
+
+
+@pytest.mark.asyncio
+async def test_binary_memoryview_values(mcache_params):
+    client = BinaryClient(
+        memoryview_values=True, buffered_protocol=True, **mcache_params
+    )
+    key, value = b"test:key:binary:memoryview", b"x" * 100000
+    await client.set(key, value)
+
+    result, _ = await client.get(key)
+    assert isinstance(result, memoryview)
+    assert result == value
+
+    results = await asyncio.gather(*[client.get(key) for _ in range(10)])
+    assert all(result == value for result, _ in results)
+    await client.close()
@@ -0,0 +1,124 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from aiomemcached.buffered import BufferedReaderProtocol
+from aiomemcached.client import Client
+from aiomemcached.exceptions import ValidationException
+
+
+def feed(protocol: BufferedReaderProtocol, data: bytes):
+    while data:
+        buffer = protocol.get_buffer(len(data))
+        n = min(len(buffer), len(data))
+        buffer[:n] = data[:n]
+        protocol.buffer_updated(n)
+        data = data[n:]
+
+
+@pytest.mark.asyncio
+async def test_buffered_reader_protocol():
+    protocol = BufferedReaderProtocol(buffer_size=16)
+    protocol.connection_made(mock.Mock())
+    feed(protocol, b"VALUE k 0 5\r\nhello\r\nEND\r\n")
+    protocol.feed_eof()
+
+    assert await protocol.readline() == b"VALUE k 0 5\r\n"
+    assert await protocol.readexactly(5) == b"hello"
+    assert await protocol.readexactly(2) == b"\r\n"
+    assert await protocol.readline() == b"END\r\n"
+    assert await protocol.readline() == b""
+
+    with pytest.raises(asyncio.IncompleteReadError):
+        await protocol.readexactly(1)
+
+
+@pytest.mark.asyncio
+async def test_buffered_reader_protocol_readinto():
+    protocol = BufferedReaderProtocol(buffer_size=16)
+    protocol.connection_made(mock.Mock())
+    data = bytes(range(256)) * 4
+
+    feed(protocol, data[:10])
+    target = bytearray(len(data))
+    task = asyncio.ensure_future(protocol.readinto(memoryview(target)))
+    await asyncio.sleep(0)
+
+    # the rest is received straight into the target
+    buffer = protocol.get_buffer(-1)
+    assert len(buffer) == len(data) - 10
+    buffer[:] = data[10:]
+    protocol.buffer_updated(len(data) - 10)
+
+    await task
+    assert target == data
+
+
+@pytest.mark.asyncio
+async def test_buffered_reader_protocol_long_line():
+    protocol = BufferedReaderProtocol(buffer_size=16)
+    protocol.connection_made(mock.Mock())
+    line = b"STAT " + b"x" * 100 + b"\r\n"
+    feed(protocol, line)
+
+    assert await protocol.readline() == line
+
+
+@pytest.mark.asyncio
+async def test_buffered_protocol_client(mcache_params):
+    client = Client(buffered_protocol=True, **mcache_params)
+    values = {
+        b"test:key:buffered:%d" % size: bytes(range(256)) * (size // 256)
+        for size in (0, 256, 64 * 1024, 200 * 1024)
+    }
+    for key, value in values.items():
+        assert await client.set(key, value)
+
+    for key, value in values.items():
+        result, _ = await client.get(key)
+        assert result == value
+
+    result, _ = await client.get_many(list(values))
+    assert result == values
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_memoryview_values(mcache_params):
+    client = Client(buffered_protocol=True, memoryview_values=True, **mcache_params)
+    key, value = b"test:key:memoryview_values", b"x" * 200 * 1024
+    await client.set(key, value)
+
+    result, _ = await client.get(key)
+    assert isinstance(result, memoryview)
+    assert result == value
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_into(mcache_params):
+    for buffered_protocol in (False, True):
+        client = Client(buffered_protocol=buffered_protocol, **mcache_params)
+        key, value = b"test:key:get_into", b"x" * 200 * 1024
+        await client.set(key, value, flags=3)
+
+        buffer = bytearray(300 * 1024)
+        length, info = await client.get_into(key, buffer)
+        assert length == len(value)
+        assert buffer[:length] == value
+        assert info["flags"] == 3
+
+        length, info = await client.get_into(b"not:" + key, buffer)
+        assert length is None
+
+        with pytest.raises(ValidationException):
+            await client.get_into(key, bytearray(10))
+
+        # the connection is still in sync
+        result, _ = await client.get(key)
+        assert result == value
+
+        await client.close()
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from aiomemcached.binary import BinaryClient
+from aiomemcached.chunking import CHUNKED_FLAG, ChunkManifest
+from aiomemcached.client import Client
+from aiomemcached.exceptions import ValidationException
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_class", [Client, BinaryClient])
+@pytest.mark.parametrize("pipeline", [False, True])
+async def test_large_values(mcache_params, client_class, pipeline):
+    client = client_class(
+        large_values=True, chunk_size=1000, pipeline=pipeline, **mcache_params
+    )
+    key, value = b"test:key:large", os.urandom(10 * 1000 + 1)
+    small_key = b"test:key:large:small"
+
+    assert await client.set(key, value, flags=3)
+    assert await client.set(small_key, b"small")
+    assert await client.get(key) == (value, {"flags": 3, "cas": None})
+    assert (await client.gets(key))[0] == value
+
+    values, info = await client.get_many([key, small_key, b"test:key:large:miss"])
+    assert values == {key: value, small_key: b"small"}
+    assert info[key]["flags"] == 3
+
+    buffer = bytearray(len(value) + 10)
+    assert await client.get_into(key, buffer) == (len(value), {"flags": 3, "cas": None})
+    assert buffer[: len(value)] == value
+    with pytest.raises(ValidationException):
+        await client.get_into(key, bytearray(100))
+
+    # a new version, the manifest is the only item seen by a plain client
+    assert await client.set(key, value[::-1])
+    plain_client = client_class(**mcache_params)
+    manifest_value, manifest_info = await plain_client.get(key)
+    assert manifest_info["flags"] == CHUNKED_FLAG
+    manifest = ChunkManifest.unpack(manifest_value)
+    assert manifest.length == len(value)
+    assert manifest.chunk_count == 11
+    assert await client.get(key) == (value[::-1], {"flags": 0, "cas": None})
+
+    assert await client.add(key, value) is False
+    with pytest.raises(ValidationException):
+        await client.set(key, value, flags=CHUNKED_FLAG)
+
+    await client.close()
+    await plain_client.close()
+
+
+@pytest.mark.asyncio
+async def test_large_values_partial(mcache_params):
+    client = Client(large_values=True, chunk_size=100, **mcache_params)
+    plain_client = Client(**mcache_params)
+    key, value = b"test:key:large:partial", os.urandom(1000)
+
+    async def chunk_keys():
+        manifest_value, _ = await plain_client.get(key)
+        return ChunkManifest.unpack(manifest_value).chunk_keys(key)
+
+    # an evicted chunk
+    await client.set(key, value)
+    await plain_client.delete((await chunk_keys())[4])
+    assert await client.get(key) == (None, {})
+    assert await client.get_many([key]) == ({}, {})
+
+    # a corrupted chunk
+    await client.set(key, value)
+    await plain_client.set((await chunk_keys())[0], b"x" * 100)
+    assert await client.get(key) == (None, {})
+
+    # a chunk of the wrong size
+    await client.set(key, value)
+    await plain_client.set((await chunk_keys())[-1], b"x" * 101)
+    assert await client.get_into(key, bytearray(1000)) == (None, {})
+
+    with pytest.raises(ValidationException):
+        Client(large_values=True, chunk_size=0)
+
+    await client.close()
+    await plain_client.close()
+
+
+def test_chunk_manifest():
+    manifest = ChunkManifest.for_value(b"x" * 250, 100)
+    assert manifest.chunk_count == 3
+    assert ChunkManifest.unpack(manifest.pack()).version == manifest.version
+    assert ChunkManifest.unpack(b"not a manifest") is None
+
+    keys = manifest.chunk_keys(b"k" * 250)
+    assert len(keys) == 3
+    assert all(len(key) <= 250 for key in keys)
+    assert not manifest.verify(b"y" * 250)
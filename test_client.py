@@ -1,32 +1,30 @@
 import asyncio
-from io import BytesIO
-from sys import version_info
 
 import pytest
 from unittest import mock
 
 from aiomemcached.constants import DEFAULT_MAX_KEY_LENGTH, DEFAULT_MAX_VALUE_LENGTH
 from aiomemcached.client import Client
+from aiomemcached.nearcache import NearCache
+from aiomemcached.pool import MemcachedConnection
 from aiomemcached.exceptions import (
     ValidationException,
     ResponseException,
 )
 
 
-async def run_func_with_mocked_execute_raw_cmd(
+async def run_func_with_mocked_server_response(
     client, server_response: bytes, func, *args, **kwargs
 ):
-    if version_info.major <= 3 and version_info.minor <= 7:
-        # TODO py38+
-        # py37 say: object _io.BytesIO can't be used in 'await' expression
-        return
+    reader = asyncio.StreamReader()
+    reader.feed_data(server_response)
+    reader.feed_eof()
+    conn = MemcachedConnection(reader, mock.Mock())
 
-    response = BytesIO()
-    response.write(server_response)
-    response.seek(0)
+    async def acquire():
+        return conn
 
-    with mock.patch.object(client, "_execute_raw_cmd") as patched:
-        patched.return_value = response
+    with mock.patch.object(client._pool, "acquire", acquire):
         await func(*args, **kwargs)
 
 
@@ -148,14 +146,14 @@ async def test_get_set(client):
         with pytest.raises(ResponseException):
             await client.set(key, value)
 
-    await run_func_with_mocked_execute_raw_cmd(client, b"SERVER_ERROR\r\n", func)
+    await run_func_with_mocked_server_response(client, b"SERVER_ERROR\r\n", func)
 
     # retrieval command error ---
     async def func_r_server(*args, **kwargs):
         with pytest.raises(ResponseException):
             await client.get(*args, **kwargs)
 
-    await run_func_with_mocked_execute_raw_cmd(
+    await run_func_with_mocked_server_response(
         client, b"SERVER_ERROR\r\n", func_r_server, key
     )
 
@@ -163,7 +161,7 @@ async def test_get_set(client):
         with pytest.raises(ResponseException):
             await client.get(*args, **kwargs)
 
-    await run_func_with_mocked_execute_raw_cmd(
+    await run_func_with_mocked_server_response(
         client,
         b"VALUE %b 0 1\r\n1\r\nVALUE %b 0 1\r\n1\r\n" % (key, key),
         func_r_dup,
@@ -171,11 +169,12 @@ async def test_get_set(client):
     )
 
     async def func_r_data_include_new_line(*args, **kwargs):
-        await client.get(*args, **kwargs)
+        result, _ = await client.get(*args, **kwargs)
+        assert result == b"_new\n_line"
 
-    await run_func_with_mocked_execute_raw_cmd(
+    await run_func_with_mocked_server_response(
         client,
-        b"VALUE %b 0 10\r\n_new\n_line\r\n" % key,
+        b"VALUE %b 0 10\r\n_new\n_line\r\nEND\r\n" % key,
         func_r_data_include_new_line,
         key,
     )
@@ -184,7 +183,7 @@ async def test_get_set(client):
         with pytest.raises(ResponseException):
             await client.get(*args, **kwargs)
 
-    await run_func_with_mocked_execute_raw_cmd(
+    await run_func_with_mocked_server_response(
         client, b"VALUE %b 0 1\r\n12\r\n" % key, func_r_data_len, key
     )
 
@@ -192,7 +191,7 @@ async def test_get_set(client):
         with pytest.raises(ResponseException):
             await client.get(*args, **kwargs)
 
-    await run_func_with_mocked_execute_raw_cmd(
+    await run_func_with_mocked_server_response(
         client,
         b"VALUE %b 0 1\r\n1\r\nVALUE %b 0 1\r\n1\r\n" % (key, key + b"other"),
         func_r_too_many,
@@ -200,6 +199,31 @@ async def test_get_set(client):
     )
 
 
+@pytest.mark.asyncio
+async def test_get_framing(client):
+    # data blocks are framed by their length, not by lines
+    key_1, value_1 = b"test:key:get_framing:1", b"END\r\n" * 10
+    key_2, value_2 = b"test:key:get_framing:2", bytes(200 * 1024)
+    await client.set(key_1, value_1)
+    await client.set(key_2, value_2)
+
+    result, _ = await client.get_many([key_1, key_2])
+    assert result == {key_1: value_1, key_2: value_2}
+
+    # a broken response can not be returned to the pool
+    async def func():
+        with pytest.raises(ResponseException):
+            await client.get(key_1)
+
+    with mock.patch.object(
+        client._pool, "dispose", wraps=client._pool.dispose
+    ) as dispose:
+        await run_func_with_mocked_server_response(
+            client, b"VALUE %b 0 1\r\n12\r\nEND\r\n" % key_1, func
+        )
+    assert dispose.called
+
+
 @pytest.mark.asyncio
 async def test_gets_set_cas(client):
     key, value_1, value_2 = b"test:key:gets_set_cas", b"1", b"2"
@@ -386,7 +410,7 @@ async def test_delete(client):
         with pytest.raises(ResponseException):
             await client.delete(*args, **kwargs)
 
-    await run_func_with_mocked_execute_raw_cmd(client, b"SERVER_ERROR\r\n", func, key)
+    await run_func_with_mocked_server_response(client, b"SERVER_ERROR\r\n", func, key)
 
 
 @pytest.mark.asyncio
@@ -448,7 +472,7 @@ async def test_incr_decr(client):
     async def func_1(*args, **kwargs):
         assert await client.incr(*args, **kwargs) is None
 
-    await run_func_with_mocked_execute_raw_cmd(
+    await run_func_with_mocked_server_response(
         client, b"NOT_FOUND\r\n", func_1, b"not:" + key
     )
 
@@ -456,7 +480,7 @@ async def test_incr_decr(client):
         with pytest.raises(ResponseException):
             await client.incr(*args, **kwargs)
 
-    await run_func_with_mocked_execute_raw_cmd(
+    await run_func_with_mocked_server_response(
         client, b"SERVER_ERROR\r\n", func_2, b"not:" + key
     )
 
@@ -485,11 +509,110 @@ async def test_touch(client):
         with pytest.raises(ResponseException):
             await client.touch(*args, **kwargs)
 
-    await run_func_with_mocked_execute_raw_cmd(
+    await run_func_with_mocked_server_response(
         client, b"SERVER_ERROR\r\n", func, b"not:" + key, 1
     )
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pipeline", [False, True])
+async def test_noreply(mcache_params, pipeline):
+    client = Client(pool_minsize=1, pool_maxsize=1, pipeline=pipeline, **mcache_params)
+    key = b"test:key:noreply:%d" % pipeline
+
+    assert await client.set(key, b"1", noreply=True) is None
+    assert await client.incr(key, 2, noreply=True) is None
+    assert await client.get(key) == (b"3", {"flags": 0, "cas": None})
+
+    assert await client.touch(key, 100, noreply=True) is None
+    assert await client.delete(key, noreply=True) is None
+    assert await client.get(key) == (None, {})
+
+    # the server answers malformed noreply commands with error lines,
+    # they must not be taken for the responses of the next commands
+    await client._execute_raw_cmd(b"set %b 0 0 x noreply\r\n" % key, noreply=True)
+    await client._execute_raw_cmd(b"bogus noreply\r\n", noreply=True)
+    assert await client.add(key, b"4")
+    assert await client.get(key) == (b"4", {"flags": 0, "cas": None})
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pipeline", [False, True])
+async def test_bulk_write(mcache_params, pipeline):
+    client = Client(pipeline=pipeline, **mcache_params)
+    keys = [b"test:key:bulk:%d" % i for i in range(250)]
+    await client.delete_many(keys)
+
+    result = await client.set_many({key: key for key in keys[:200]}, batch_size=30)
+    assert result == {key: True for key in keys[:200]}
+
+    result = await client.add_many([(key, b"add") for key in keys[190:]], flags=1)
+    assert result == {key: i >= 10 for i, key in enumerate(keys[190:])}
+    values, _ = await client.get_many(keys)
+    assert values == {key: key if i < 200 else b"add" for i, key in enumerate(keys)}
+
+    result = await client.replace_many([(keys[0], b"replace")], exptime=100)
+    assert result == {keys[0]: True}
+
+    result = await client.touch_many(keys[:10] + [b"not:" + keys[0]], 100)
+    assert result[b"not:" + keys[0]] is False
+    assert all(result[key] for key in keys[:10])
+
+    result = await client.delete_many(keys[:100], concurrency=1)
+    assert result == {key: True for key in keys[:100]}
+    values, _ = await client.get_many(keys)
+    assert len(values) == 150
+
+    with pytest.raises(ValidationException):
+        await client.set_many({b"key": b"value"}, batch_size=0)
+    with pytest.raises(ValidationException):
+        await client.delete_many([b"key", b"bad key"])
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_bulk_write_unexpected_response(mcache_params):
+    client = Client(near_cache=NearCache(), **mcache_params)
+    keys = [b"test:key:bulk:error:%d" % i for i in range(3)]
+
+    async def func():
+        with pytest.raises(ResponseException) as excinfo:
+            await client.set_many({key: b"value" for key in keys})
+
+        assert excinfo.value.results == {keys[0]: True, keys[2]: True}
+
+    await run_func_with_mocked_server_response(
+        client, b"STORED\r\nSERVER_ERROR out of memory\r\nSTORED\r\n", func
+    )
+    # the keys after the failing one made it to the near cache too
+    assert client._near_cache.lookup(keys[2])[0] == b"value"
+    assert client._near_cache.lookup(keys[1]) is None
+
+    for method, args, response in (
+        (client.delete_many, (keys,), b"DELETED\r\nERROR\r\nNOT_FOUND\r\n"),
+        (client.touch_many, (keys, 10), b"TOUCHED\r\nERROR\r\nNOT_FOUND\r\n"),
+    ):
+        await client.set(keys[2], b"value")
+        assert client._near_cache.lookup(keys[2]) is not None
+
+        async def func():
+            with pytest.raises(ResponseException) as excinfo:
+                await method(*args)
+
+            assert excinfo.value.results == {keys[0]: True, keys[2]: False}
+
+        await run_func_with_mocked_server_response(client, response, func)
+        assert client._near_cache.lookup(keys[2]) is None
+
+    with pytest.raises(ValidationException):
+        await client.touch_many(keys, -1)
+    with pytest.raises(ValidationException):
+        await client.touch(keys[0], -1)
+
+
 @pytest.mark.asyncio
 async def test_stats(client):
     stats = await client.stats()
@@ -498,7 +621,7 @@ async def test_stats(client):
     async def func():
         await client.stats()
 
-    await run_func_with_mocked_execute_raw_cmd(
+    await run_func_with_mocked_server_response(
         client, b"STAT a\r\nSTAT a b\r\nSTAT a b c\r\nEND\r\n", func
     )
 
@@ -507,7 +630,7 @@ async def test_stats(client):
         with pytest.raises(ResponseException):
             await client.stats()
 
-    await run_func_with_mocked_execute_raw_cmd(
+    await run_func_with_mocked_server_response(
         client, b"BAD_RESPONSE\r\nEND\r\n", func_bad_response
     )
 
@@ -522,7 +645,7 @@ async def test_version(client):
         with pytest.raises(ResponseException):
             await client.version()
 
-    await run_func_with_mocked_execute_raw_cmd(client, b"NOT_VERSION\r\n", func)
+    await run_func_with_mocked_server_response(client, b"NOT_VERSION\r\n", func)
 
 
 @pytest.mark.asyncio
@@ -542,7 +665,7 @@ async def test_flush_all(client):
         with pytest.raises(ResponseException):
             await client.flush_all()
 
-    await run_func_with_mocked_execute_raw_cmd(client, b"NOT_OK\r\n", func)
+    await run_func_with_mocked_server_response(client, b"NOT_OK\r\n", func)
 
 
 @pytest.mark.asyncio
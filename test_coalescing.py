@@ -0,0 +1,85 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from aiomemcached.client import Client
+from aiomemcached.exceptions import ConnectException
+
+
+@pytest.mark.asyncio
+async def test_coalesce_gets(mcache_params):
+    client = Client(coalesce_gets=True, **mcache_params)
+    keys = [b"test:key:coalesce:%d" % i for i in range(50)]
+    for key in keys[:40]:
+        await client.set(key, key)
+
+    with mock.patch.object(
+        client, "_execute_raw_cmd", wraps=client._execute_raw_cmd
+    ) as execute:
+        results = await asyncio.gather(*[client.get(key, b"default") for key in keys])
+
+    assert execute.call_count == 1
+    assert [value for value, _ in results] == keys[:40] + [b"default"] * 10
+
+    # gets, the same key twice
+    with mock.patch.object(
+        client, "_execute_raw_cmd", wraps=client._execute_raw_cmd
+    ) as execute:
+        (value_1, info_1), (value_2, info_2) = await asyncio.gather(
+            client.gets(keys[0]), client.gets(keys[0])
+        )
+
+    assert execute.call_count == 1
+    assert value_1 == value_2 == keys[0]
+    assert isinstance(info_1["cas"], int)
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_max_keys(mcache_params):
+    client = Client(coalesce_gets=True, coalesce_max_keys=10, **mcache_params)
+    keys = [b"test:key:coalesce:%d" % i for i in range(50)]
+
+    with mock.patch.object(
+        client, "_execute_raw_cmd", wraps=client._execute_raw_cmd
+    ) as execute:
+        await asyncio.gather(*[client.get(key) for key in keys])
+
+    assert execute.call_count == 5
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_window(mcache_params):
+    client = Client(coalesce_gets=True, coalesce_window=0.05, **mcache_params)
+    key = b"test:key:coalesce_window"
+    await client.set(key, b"1")
+
+    async def delayed_get(delay):
+        await asyncio.sleep(delay)
+        return await client.get(key)
+
+    with mock.patch.object(
+        client, "_execute_raw_cmd", wraps=client._execute_raw_cmd
+    ) as execute:
+        await asyncio.gather(delayed_get(0), delayed_get(0.01), delayed_get(0.02))
+
+    assert execute.call_count == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_error(mcache_params):
+    client = Client(coalesce_gets=True, **mcache_params)
+
+    with mock.patch.object(
+        client, "_execute_raw_cmd", side_effect=ConnectException("broken")
+    ):
+        results = await asyncio.gather(
+            client.get(b"test:key:1"), client.get(b"test:key:2"), return_exceptions=True
+        )
+
+    assert all(isinstance(result, ConnectException) for result in results)
+    await client.close()
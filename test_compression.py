@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+
+from aiomemcached.binary import BinaryClient
+from aiomemcached.client import Client
+from aiomemcached.compression import CODEC_FLAGS, Compressor
+from aiomemcached.exceptions import ValidationException
+from aiomemcached.nearcache import NearCache
+
+VALUE = json.dumps([{"id": i, "name": "item", "tags": ["a", "b"]} for i in range(100)])
+VALUE = VALUE.encode()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_class", [Client, BinaryClient])
+@pytest.mark.parametrize("codec", ["zlib", "bz2", "lzma"])
+async def test_compression(mcache_params, client_class, codec):
+    compressor = Compressor(codec, threshold=100, levels={"zlib": 1})
+    client = client_class(compressor=compressor, **mcache_params)
+    plain_client = client_class(**mcache_params)
+    key, small_key = b"test:key:compressed", b"test:key:compressed:small"
+
+    assert await client.set(key, VALUE, flags=3)
+    assert await client.set(small_key, b"small", flags=3)
+    stored, info = await plain_client.get(key)
+    assert len(stored) * 3 < len(VALUE)
+    assert info["flags"] & ~CODEC_FLAGS == 3
+    assert await plain_client.get(small_key) == (b"small", {"flags": 3, "cas": None})
+
+    assert await client.get(key) == (VALUE, {"flags": 3, "cas": None})
+    assert (await client.gets(key))[0] == VALUE
+    values, info = await client.get_many([key, small_key])
+    assert values == {key: VALUE, small_key: b"small"}
+    assert info[key]["flags"] == 3
+
+    buffer = bytearray(len(VALUE))
+    assert await client.get_into(key, buffer) == (len(VALUE), {"flags": 3, "cas": None})
+    assert buffer == VALUE
+    with pytest.raises(ValidationException):
+        await client.get_into(key, bytearray(len(stored)))
+
+    assert await client.set_many({key: VALUE, small_key: b"small"}) == {
+        key: True,
+        small_key: True,
+    }
+    assert await client.get(key) == (VALUE, {"flags": 0, "cas": None})
+
+    _, info = await client.gets(key)
+    assert await client.cas(key, VALUE[::-1], info["cas"])
+    assert (await client.get(key))[0] == VALUE[::-1]
+
+    # incompressible
+    random_value = os.urandom(1000)
+    await client.set(key, random_value)
+    assert await plain_client.get(key) == (random_value, {"flags": 0, "cas": None})
+
+    # an unknown codec, a miss
+    await plain_client.set(key, b"garbage", flags=info["flags"] | CODEC_FLAGS)
+    assert await client.get(key) == (None, {})
+
+    with pytest.raises(ValidationException):
+        await client.set(key, VALUE, flags=1 << 28)
+
+    stats = compressor.stats()[codec]
+    assert stats["compressions"] == 3
+    assert stats["skipped"] == 1
+    assert stats["decompressions"] == 8
+    assert stats["errors"] == 0
+    assert stats["bytes_saved"] > 0
+    assert stats["ratio"] > 3
+    compressor.reset_stats()
+    assert compressor.stats()[codec]["compressions"] == 0
+
+    await client.close()
+    await plain_client.close()
+
+
+@pytest.mark.asyncio
+async def test_compression_large_values(mcache_params):
+    client = Client(
+        compressor=Compressor(threshold=100),
+        large_values=True,
+        chunk_size=100,
+        near_cache=NearCache(),
+        **mcache_params
+    )
+    key = b"test:key:compressed:large"
+    await client.set(key, VALUE, flags=2)
+    assert await client.get(key) == (VALUE, {"flags": 2, "cas": None})
+    assert await client.get(key) == (VALUE, {"flags": 2, "cas": None})
+    assert await client.get_many([key]) == (
+        {key: VALUE},
+        {key: {"flags": 2, "cas": None}},
+    )
+    await client.close()
+
+
+def test_compressor():
+    with pytest.raises(ValidationException):
+        Compressor("snappy")
+    with pytest.raises(ValidationException):
+        Compressor(levels={"snappy": 1})
+
+    compressor = Compressor(threshold=10)
+    assert compressor.codec == "zlib"
+    assert compressor.compress(b"x" * 9, 1) == (b"x" * 9, 1)
+    value, flags = compressor.compress(b"x" * 100, 1)
+    assert compressor.decompress(value, flags) == b"x" * 100
+    assert compressor.decompress(value, 7 << 28) is None
+    assert compressor.decompress(b"garbage", flags) is None
+    assert compressor.stats()["zlib"]["errors"] == 1
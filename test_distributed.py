@@ -0,0 +1,97 @@
+import pytest
+
+from aiomemcached.distributed import DistributedClient
+from aiomemcached.exceptions import ValidationException
+from aiomemcached.ketama import KetamaRing
+
+
+def test_ketama_ring():
+    ring = KetamaRing({"10.0.0.1:11211": 1, "10.0.0.2:11211": 1})
+    assert len(ring._points) == 2 * 160
+    assert list(ring._points) == sorted(ring._points)
+
+    key = b"test:key:ketama"
+    assert ring.get_node(key) == ring.get_node(key)
+
+    with pytest.raises(ValidationException):
+        KetamaRing({})
+
+
+@pytest.mark.parametrize("servers, digests", [(7, 40), (98, 40), (61, 39)])
+def test_ketama_ring_float_points(servers, digests):
+    # libketama: floorf(pct * 40.0 * numservers) with pct a C float,
+    # 39 digests with doubles for 7 and 98 servers, 40 for 61
+    nodes = {"10.0.0.{}:11211".format(i): 1 for i in range(1, servers + 1)}
+    ring = KetamaRing(nodes)
+    assert len(ring._points) == servers * digests * 4
+
+    # the points of md5(b"10.0.0.1:11211-39"), the 40th digest
+    points = {1612109566, 3796560173, 257991924, 2536707799}
+    assert points.issubset(ring._points) is (digests == 40)
+
+
+def test_ketama_ring_weight():
+    ring = KetamaRing({"10.0.0.1:11211": 1, "10.0.0.2:11211": 3})
+    keys = [b"test:key:ketama:%d" % i for i in range(10000)]
+    heavy = [ring.get_node(key) for key in keys].count("10.0.0.2:11211")
+    assert 0.65 < heavy / len(keys) < 0.85
+
+
+def test_ketama_ring_consistency():
+    nodes = {"10.0.0.{}:11211".format(i): 1 for i in range(1, 5)}
+    ring = KetamaRing(nodes)
+    nodes["10.0.0.5:11211"] = 1
+    new_ring = KetamaRing(nodes)
+
+    keys = [b"test:key:ketama:%d" % i for i in range(10000)]
+    moved = [key for key in keys if ring.get_node(key) != new_ring.get_node(key)]
+    # only the keys of the new node move
+    assert all(new_ring.get_node(key) == "10.0.0.5:11211" for key in moved)
+    assert len(moved) < len(keys) / 3
+
+
+@pytest.mark.asyncio
+async def test_distributed_client(mcache_params):
+    # two names of the same server, still two nodes on the ring
+    client = DistributedClient(
+        [
+            "memcached://localhost:{}".format(mcache_params["port"]),
+            ("memcached://127.0.0.1:{}".format(mcache_params["port"]), 2),
+        ]
+    )
+    assert set(client.clients) == {
+        "localhost:{}".format(mcache_params["port"]),
+        "127.0.0.1:{}".format(mcache_params["port"]),
+    }
+
+    keys = [b"test:key:distributed:%d" % i for i in range(20)]
+    assert len(set(client.get_client(key) for key in keys)) == 2
+    for key in keys:
+        assert await client.set(key, key, flags=1)
+
+    value, info = await client.get(keys[0])
+    assert value == keys[0]
+    assert info["flags"] == 1
+
+    values, info = await client.get_many(keys + [b"not:" + keys[0]])
+    assert values == {key: key for key in keys}
+
+    values, info = await client.gets_many(keys)
+    assert values == {key: key for key in keys}
+    assert all(isinstance(info[key]["cas"], int) for key in keys)
+
+    assert await client.delete(keys[0])
+    value, _ = await client.get(keys[0])
+    assert value is None
+
+    result = await client.set_many({key: b"bulk" for key in keys})
+    assert result == {key: True for key in keys}
+    values, _ = await client.get_many(keys)
+    assert values == {key: b"bulk" for key in keys}
+    result = await client.delete_many(keys)
+    assert result == {key: True for key in keys}
+
+    versions = await client.version()
+    assert len(versions) == 2
+
+    await client.close()
@@ -0,0 +1,127 @@
+import pytest
+
+from aiomemcached.binary import BinaryClient
+from aiomemcached.client import Client
+from aiomemcached.exceptions import TimeoutException
+from aiomemcached.hooks import CommandHook
+from aiomemcached.metrics import Metrics
+
+
+class RecordingHook(CommandHook):
+    def __init__(self):
+        self.calls = []
+        self.events = []
+
+    def on_start(self, event):
+        self.calls.append(("start", event.command))
+
+    def on_acquired(self, event):
+        assert event.connection is not None
+        self.calls.append(("acquired", event.command))
+
+    def on_first_byte(self, event):
+        self.calls.append(("first_byte", event.command))
+
+    def on_complete(self, event):
+        self.calls.append(("complete", event.command))
+        self.events.append(event)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_class", [Client, BinaryClient])
+@pytest.mark.parametrize("buffered_protocol", [False, True])
+@pytest.mark.parametrize("pipeline", [False, True])
+async def test_hooks(mcache_params, client_class, buffered_protocol, pipeline):
+    metrics = Metrics()
+    client = client_class(
+        metrics=metrics,
+        buffered_protocol=buffered_protocol,
+        pipeline=pipeline,
+        **mcache_params
+    )
+    hook = RecordingHook()
+    client.add_hook(hook)
+    key, other_key = b"test:key:hooks", b"test:key:hooks:other"
+
+    await client.set(key, b"x" * 100)
+    assert hook.calls == [
+        ("start", "set"),
+        ("acquired", "set"),
+        ("first_byte", "set"),
+        ("complete", "set"),
+    ]
+    event = hook.events[-1]
+    assert event.keys == (key,)
+    assert event.request_size > 100
+    assert 0 < event.response_size < 100
+    assert event.started <= event.acquired <= event.first_byte <= event.finished
+    assert event.pool_wait >= 0 and event.elapsed >= 0
+    assert event.exception is None
+
+    await client.get_many([key, other_key])
+    event = hook.events[-1]
+    assert (event.command, sorted(event.keys)) == ("get", [key, other_key])
+    assert event.response_size > 100
+
+    await client.set_many({key: b"1", other_key: b"2"}, batch_size=1)
+    assert sorted(e.keys[0] for e in hook.events[-2:]) == [key, other_key]
+
+    await client.delete(other_key, noreply=True)
+    event = hook.events[-1]
+    assert (event.first_byte, event.response_size) == (None, None)
+
+    # hooks and metrics together
+    assert metrics.snapshot()["commands"]["set"]["count"] == 3
+
+    client.remove_hook(hook)
+    await client.get(key)
+    assert hook.calls[-1] == ("complete", "delete")
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_hooks_exception(mcache_params):
+    client = Client(pool_maxsize=1, pool_acquire_timeout=0, **mcache_params)
+    hook = RecordingHook()
+    client.add_hook(hook)
+
+    conn = await client._pool.acquire()
+    with pytest.raises(TimeoutException):
+        await client.get(b"test:key:hooks")
+    await client._pool.release(conn)
+
+    assert hook.calls == [("start", "get"), ("complete", "get")]
+    event = hook.events[0]
+    assert isinstance(event.exception, TimeoutException)
+    assert event.acquired is None and event.pool_wait is None
+    await client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_class", [Client, BinaryClient])
+@pytest.mark.parametrize("pipeline", [False, True])
+async def test_hooks_get_stream(mcache_params, client_class, pipeline):
+    metrics = Metrics()
+    client = client_class(metrics=metrics, pipeline=pipeline, **mcache_params)
+    key = b"test:key:hooks:stream"
+    await client.set(key, b"x" * 10000)
+    hook = RecordingHook()
+    client.add_hook(hook)
+
+    stream = await client.get_stream(key)
+    assert [call for call, _ in hook.calls] == [
+        "start",
+        "acquired",
+        "first_byte",
+        "complete",
+    ]
+    # up to the item line, the data block is read by the consumer
+    event = hook.events[-1]
+    assert event.keys == (key,)
+    assert event.response_size > 0
+    assert event.exception is None
+    assert b"".join([chunk async for chunk in stream]) == b"x" * 10000
+    assert len(hook.events) == 1
+    assert metrics.commands[b"get"].count == 1
+
+    await client.close()
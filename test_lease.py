@@ -0,0 +1,127 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from aiomemcached.binary import BinaryClient
+from aiomemcached.client import Client
+from aiomemcached.lease import Lease, backoff, lease_key
+from aiomemcached.serialization import Serializer
+
+LEASE_CLIENTS = [
+    pytest.param(Client, None, id="meta"),
+    pytest.param(Client, False, id="add"),
+    pytest.param(BinaryClient, None, id="binary-add"),
+]
+
+
+def test_backoff():
+    assert 0.0025 <= backoff(0) <= 0.005
+    assert 0.01 <= backoff(2) <= 0.02
+    assert 0.05 <= backoff(100) <= 0.1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_class, meta", LEASE_CLIENTS)
+async def test_lease(mcache_params, client_class, meta):
+    client = client_class(**mcache_params)
+    key = b"test:lease:herd"
+    await client.delete(key)
+    await client.delete(lease_key(key))
+
+    value, lease = await client.get_with_lease(key, meta=meta)
+    assert value is None
+    assert isinstance(lease, Lease)
+    assert lease.meta is (meta is None and client_class is Client)
+
+    # the others wait for the winner
+    async def reader():
+        return await client.get_with_lease(key, wait=2, meta=meta)
+
+    readers = [asyncio.ensure_future(reader()) for _ in range(5)]
+    await asyncio.sleep(0.05)
+    assert not any(task.done() for task in readers)
+
+    assert await client.set_with_lease(key, b"computed", lease, exptime=60)
+    assert await asyncio.gather(*readers) == [(b"computed", None)] * 5
+    assert await client.get_with_lease(key, meta=meta) == (b"computed", None)
+    assert (await client.get(lease_key(key)))[0] is None
+    await client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_class, meta", LEASE_CLIENTS)
+async def test_lease_wait(mcache_params, client_class, meta):
+    client = client_class(**mcache_params)
+    key = b"test:lease:wait"
+    await client.delete(key)
+    await client.delete(lease_key(key))
+
+    _, lease = await client.get_with_lease(key, meta=meta)
+    assert lease is not None
+    assert await client.get_with_lease(key, wait=0.05, meta=meta) == (None, None)
+
+    # the lease expires (its item), the next caller wins a new one
+    await client.delete(key if lease.meta else lease_key(key))
+    _, other = await client.get_with_lease(key, meta=meta)
+    assert other is not None
+    await client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_class", [Client, BinaryClient])
+async def test_lease_add_race(mcache_params, client_class):
+    client = client_class(**mcache_params)
+    key = b"test:lease:race"
+    await client.delete(key)
+    await client.delete(lease_key(key))
+    add = client.add
+
+    async def add_after_winner(*args, **kwargs):
+        # the previous winner sets the value and releases its lease
+        # between our get and our add
+        await client.set(key, b"computed")
+        return await add(*args, **kwargs)
+
+    with mock.patch.object(client, "add", add_after_winner):
+        assert await client.get_with_lease(key, meta=False) == (b"computed", None)
+
+    assert (await client.get(lease_key(key)))[0] is None
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_lease_expired_meta(mcache_params):
+    client = Client(**mcache_params)
+    key = b"test:lease:expired"
+    await client.delete(key)
+
+    _, lease = await client.get_with_lease(key)
+    await client.delete(key)
+    _, other = await client.get_with_lease(key)
+    assert other is not None
+    # the first lease has been lost
+    assert not await client.set_with_lease(key, b"late", lease)
+    assert await client.set_with_lease(key, b"value", other)
+    assert (await client.get(key))[0] == b"value"
+    await client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("serve_stale", [True, False])
+async def test_lease_stale(mcache_params, serve_stale):
+    client = Client(serializer=Serializer(), **mcache_params)
+    key = b"test:lease:stale"
+    await client.set(key, "old", exptime=60)
+    await client.meta_delete(key, invalidate=True)
+
+    value, lease = await client.get_with_lease(key)
+    assert value == "old"
+    assert lease is not None
+
+    result = await client.get_with_lease(key, wait=0.05, serve_stale=serve_stale)
+    assert result == (("old", None) if serve_stale else (None, None))
+
+    assert await client.set_with_lease(key, {"new": 1}, lease)
+    assert await client.get_with_lease(key) == ({"new": 1}, None)
+    await client.close()
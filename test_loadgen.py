@@ -0,0 +1,163 @@
+import asyncio
+import json
+import random
+from collections import Counter
+
+import pytest
+
+from aiomemcached.client import Client
+from aiomemcached.loadgen import KeyDistribution, LoadGenerator, ValueSizes, main
+from aiomemcached.metrics import Metrics
+
+
+def test_key_distribution():
+    rng = random.Random(1)
+    uniform = KeyDistribution(10, rng=rng)
+    counts = Counter(uniform.index() for _ in range(10000))
+    assert set(counts) == set(range(10))
+    assert min(counts.values()) > 800
+
+    zipf = KeyDistribution(1000, zipf_s=1, prefix=b"k:", rng=rng)
+    counts = Counter(zipf.index() for _ in range(10000))
+    assert max(counts) < 1000
+    # the weight of rank 1 over the 1000 ranks: 1 / H(1000), about 13%
+    assert 1100 < counts[0] < 1600
+    assert counts[0] > 5 * counts[9]
+    assert zipf.key(3) == b"k:3"
+
+    with pytest.raises(ValueError):
+        KeyDistribution(0)
+
+
+def test_value_sizes():
+    rng = random.Random(1)
+    assert {ValueSizes("100", rng=rng).size() for _ in range(10)} == {100}
+
+    sizes = ValueSizes("10-20", rng=rng)
+    assert sizes.max == 20
+    assert {sizes.size() for _ in range(1000)} == set(range(10, 21))
+
+    sizes = ValueSizes("100:8,2000:2", rng=rng)
+    assert sizes.max == 2000
+    counts = Counter(sizes.size() for _ in range(10000))
+    assert 7500 < counts[100] < 8500
+    assert counts[100] + counts[2000] == 10000
+
+    for spec in ("", "a", "1-2-3", "100:x"):
+        with pytest.raises(ValueError):
+            ValueSizes(spec)
+
+
+@pytest.mark.asyncio
+async def test_load_generator(mcache_params):
+    rng = random.Random(1)
+    client = Client(metrics=Metrics(), **mcache_params)
+    keys = KeyDistribution(100, zipf_s=0.99, prefix=b"test:loadgen:", rng=rng)
+    await client.delete_many([keys.key(index) for index in range(100)])
+
+    generator = LoadGenerator(
+        client,
+        keys,
+        ValueSizes("10-100", rng=rng),
+        read_ratio=0.8,
+        qps=400,
+        workers=4,
+        duration=0.5,
+        warmup=0.1,
+        fill_misses=True,
+        rng=rng,
+    )
+    report = await generator.run()
+    await client.close()
+
+    # open loop: the requests scheduled in the measured half second
+    assert report.completed == 200
+    assert 300 < report.throughput <= 410
+    assert report.ops["get"] + report.ops["set"] == 200
+    assert report.hits + report.misses == report.ops["get"]
+    assert report.hits > report.misses > 0
+    assert report.timeouts == 0
+    assert report.errors == {}
+    assert report.latency.count == 200
+    assert report.op_latency["get"].count == report.ops["get"]
+    assert report.lag.count == 200
+    assert report.pool_wait is not None
+
+    result = json.loads(json.dumps(report.as_dict()))
+    assert result["completed"] == 200
+    assert result["client"]["commands"]["get"]["count"] >= report.ops["get"]
+    assert "p99" in report.format()
+
+
+class StallingClient:
+    """Answers every get at once, but the first one after 0.15s."""
+
+    metrics = None
+
+    def __init__(self):
+        self.gets = 0
+
+    async def get(self, key):
+        self.gets += 1
+        if self.gets == 1:
+            await asyncio.sleep(0.15)
+        return b"x", {}
+
+
+@pytest.mark.asyncio
+async def test_load_generator_open_loop():
+    client = StallingClient()
+    generator = LoadGenerator(
+        client,
+        KeyDistribution(10),
+        ValueSizes("10"),
+        read_ratio=1,
+        qps=100,
+        workers=4,
+        duration=0.2,
+    )
+    report = await generator.run()
+
+    # the requests after the stalled one are sent on schedule all the same
+    assert report.completed == client.gets == 20
+    assert report.lag.max < 0.05
+    assert report.latency.max >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_load_generator_closed_loop(mcache_params):
+    client = Client(**mcache_params)
+    generator = LoadGenerator(
+        client, KeyDistribution(10), ValueSizes("10"), workers=2, duration=0.2
+    )
+    await generator.prefill(batch_size=3)
+    report = await generator.run()
+    await client.close()
+
+    assert report.completed > 10
+    assert report.misses == 0
+    assert report.pool_wait is None
+
+
+@pytest.mark.asyncio
+async def test_load_generator_errors():
+    client = Client(host="127.0.0.1", port=1)
+    generator = LoadGenerator(
+        client, KeyDistribution(10), ValueSizes("10"), qps=100, workers=2, duration=0.1
+    )
+    report = await generator.run()
+
+    assert report.completed == 0
+    assert sum(report.errors.values()) == 10
+    assert "errors ConnectException 10" in report.format()
+
+
+def test_main(mcache_params, capsys):
+    uri = "memcached://{host}:{port}".format(**mcache_params)
+    argv = ["--uri", uri, "--duration", "0.2", "--warmup", "0", "--qps", "100"]
+    assert main(argv + ["--json", "--seed", "1"]) == 0
+    result = json.loads(capsys.readouterr().out)
+    assert result["completed"] == 20
+
+    with pytest.raises(SystemExit):
+        main(argv + ["--value-sizes", "x"])
@@ -0,0 +1,140 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from aiomemcached.client import Client
+from aiomemcached.exceptions import ResponseException, ValidationException
+from aiomemcached.meta import MetaResponse, build_meta_cmd, read_meta_response
+
+
+@pytest.mark.asyncio
+async def test_meta_get_set(client):
+    key, value = b"test:key:meta", b"1"
+
+    response = await client.meta_set(key, value, flags=3, meta_flags=[b"c"])
+    assert response.ok
+    assert isinstance(response.cas, int)
+
+    response = await client.meta_get(key, [b"v", b"f", b"c", b"t", b"k"])
+    assert response.status == b"VA"
+    assert response.value == value
+    assert response.client_flags == 3
+    assert response.ttl == -1
+    assert response.key == key
+    cas = response.cas
+
+    response = await client.meta_set(key, b"2", cas=cas + 1)
+    assert response.status == b"EX"
+    response = await client.meta_set(key, b"2", cas=cas)
+    assert response.ok
+
+    response = await client.meta_set(key, b"3", mode=b"E")
+    assert response.status == b"NS"
+
+    # hit without value
+    response = await client.meta_get(key, [b"s"])
+    assert response == MetaResponse(b"HD", None, {b"s": b"1"})
+
+    assert (await client.meta_delete(key)).ok
+    response = await client.meta_get(key)
+    assert response.status == b"EN"
+    assert not response.ok
+    assert (await client.meta_delete(key)).status == b"NF"
+
+
+@pytest.mark.asyncio
+async def test_meta_binary_key(client):
+    key = b"test:key:meta binary\x00\xff"
+    assert (await client.meta_set(key, b"binary")).ok
+
+    response = await client.meta_get(key, [b"v", b"k"])
+    assert response.value == b"binary"
+    assert response.key == key
+
+    with pytest.raises(ValidationException):
+        await client.meta_get(b"")
+    with pytest.raises(ValidationException):
+        await client.meta_get(key, [b"v q"])
+    with pytest.raises(ValidationException):
+        await client.meta_get(key, [b"v\n"])
+
+    # a trailing newline would split the command in two
+    key = b"test:key:meta:newline\n"
+    assert build_meta_cmd(b"mg", key, [b"v"]).count(b"\n") == 1
+    assert (await client.meta_set(key, b"newline")).ok
+    assert (await client.meta_get(key, [b"v"])).value == b"newline"
+    assert (await client.meta_get(b"test:key:meta:newline", [b"v"])).status == b"EN"
+
+
+@pytest.mark.asyncio
+async def test_meta_arithmetic(client):
+    key = b"test:key:meta:counter"
+    await client.meta_delete(key)
+
+    assert (await client.meta_arithmetic(key)).status == b"NF"
+
+    response = await client.meta_arithmetic(key, initial=10)
+    assert response.value == b"10"
+    response = await client.meta_arithmetic(key, delta=5)
+    assert response.value == b"15"
+    response = await client.meta_arithmetic(key, delta=20, decr=True)
+    assert response.value == b"0"
+
+
+@pytest.mark.asyncio
+async def test_meta_invalidate(client):
+    key = b"test:key:meta:stale"
+    await client.meta_set(key, b"old")
+
+    assert (await client.meta_delete(key, invalidate=True)).ok
+    first, second = await asyncio.gather(client.meta_get(key), client.meta_get(key))
+    assert first.stale and second.stale
+    assert [first.win, second.win].count(True) == 1
+    assert first.value == b"old"
+
+    await client.meta_set(key, b"new")
+    response = await client.meta_get(key)
+    assert not response.stale and not response.win
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pipeline", [False, True])
+async def test_meta_many(mcache_params, pipeline):
+    client = Client(pipeline=pipeline, **mcache_params)
+    keys = [b"test:key:meta:many:%d" % i for i in range(250)]
+    await client.delete_many(keys)
+
+    result = await client.meta_set_many(
+        {key: key for key in keys[:200]}, flags=2, batch_size=40
+    )
+    assert result == {key: True for key in keys[:200]}
+
+    result = await client.meta_set_many([(key, b"") for key in keys[190:]], mode=b"E")
+    assert result == {key: i >= 10 for i, key in enumerate(keys[190:])}
+
+    with mock.patch.object(
+        client, "_execute_raw_cmd", wraps=client._execute_raw_cmd
+    ) as execute:
+        responses = await client.meta_get_many(keys + keys[:10], batch_size=100)
+        assert execute.call_count == 3
+
+    assert set(responses) == set(keys)
+    assert responses[keys[0]].value == keys[0]
+    assert responses[keys[0]].client_flags == 2
+    assert responses[keys[-1]].value == b""
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_meta_response_errors():
+    reader = asyncio.StreamReader()
+    reader.feed_data(b"SERVER_ERROR out of memory\r\nVA 3 f1\r\nabcd\r\n")
+
+    raw_cmd = build_meta_cmd(b"mg", b"key", [b"v"])
+    assert raw_cmd == b"mg key v\r\n"
+    with pytest.raises(ResponseException):
+        await read_meta_response(reader, raw_cmd)
+    with pytest.raises(ResponseException):
+        await read_meta_response(reader, raw_cmd)
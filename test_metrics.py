@@ -0,0 +1,78 @@
+import pytest
+
+from aiomemcached.binary import BinaryClient
+from aiomemcached.client import Client
+from aiomemcached.exceptions import TimeoutException
+from aiomemcached.metrics import LatencyHistogram, Metrics
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_class", [Client, BinaryClient])
+@pytest.mark.parametrize("buffered_protocol", [False, True])
+@pytest.mark.parametrize("pipeline", [False, True])
+async def test_metrics(mcache_params, client_class, buffered_protocol, pipeline):
+    metrics = Metrics()
+    client = client_class(
+        metrics=metrics,
+        buffered_protocol=buffered_protocol,
+        pipeline=pipeline,
+        **mcache_params
+    )
+    key = b"test:key:metrics"
+    assert client.metrics is metrics
+
+    await client.set(key, b"x" * 100)
+    await client.get(key)
+    await client.get_many([key, b"test:key:metrics:miss"])
+    await client.delete(b"test:key:metrics:miss")
+
+    snapshot = metrics.snapshot()
+    commands = snapshot["commands"]
+    assert commands["set"]["count"] == 1
+    assert commands["get"]["count"] == 2
+    assert commands["delete"]["count"] == 1
+    assert 0 < commands["get"]["p50"] <= commands["get"]["max"]
+    assert (snapshot["hits"], snapshot["misses"]) == (2, 1)
+    assert snapshot["bytes_sent"] > 100
+    assert snapshot["bytes_received"] > 200
+    assert snapshot["connects"] == 1
+    assert snapshot["pool_wait"]["count"] >= 1
+
+    metrics.reset()
+    assert metrics.snapshot()["commands"] == {}
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_metrics_timeouts(mcache_params):
+    metrics = Metrics()
+    client = Client(
+        metrics=metrics, pool_maxsize=1, pool_acquire_timeout=0, **mcache_params
+    )
+    conn = await client._pool.acquire()
+    with pytest.raises(TimeoutException):
+        await client.get(b"test:key:metrics")
+    await client._pool.dispose(conn)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["timeouts"] == 1
+    assert snapshot["disposes"] == 1
+    await client.close()
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    for us in range(1, 1001):
+        histogram.record(us / 1000000)
+
+    assert histogram.count == 1000
+    assert histogram.max == 0.001
+    # within a bucket width
+    assert 0.0005 <= histogram.quantile(0.5) <= 0.0005 * 1.25
+    assert 0.00099 <= histogram.quantile(0.99) <= 0.001
+    assert sum(count for _, count in histogram.buckets()) == 1000
+
+    histogram.record(10**6)
+    assert histogram.buckets()[-1][1] == 1
+    histogram.reset()
+    assert histogram.snapshot()["p99"] == 0.0
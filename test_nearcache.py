@@ -0,0 +1,114 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from aiomemcached.client import Client
+from aiomemcached.nearcache import NearCache
+
+
+@pytest.mark.asyncio
+async def test_near_cache_client(mcache_params):
+    near_cache = NearCache(ttl=10, negative_ttl=10)
+    client = Client(near_cache=near_cache, **mcache_params)
+    key, value = b"test:key:near_cache", b"1"
+    await client.delete(key)
+
+    with mock.patch.object(
+        client, "_execute_raw_cmd", wraps=client._execute_raw_cmd
+    ) as execute:
+        assert await client.get(key, b"default") == (b"default", {})
+        assert await client.get(key, b"default") == (b"default", {})
+        assert execute.call_count == 1
+
+        # set updates the entry
+        await client.set(key, value, flags=3)
+        assert await client.get(key) == (value, {"flags": 3, "cas": None})
+        assert execute.call_count == 2
+
+        # gets always goes to the server
+        _, info = await client.gets(key)
+        assert isinstance(info["cas"], int)
+        assert execute.call_count == 3
+
+        # delete invalidates the entry
+        await client.delete(key)
+        assert await client.get(key) == (None, {})
+        assert execute.call_count == 5
+
+    stats = near_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["negative_hits"] == 1
+    assert stats["misses"] == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_near_cache_get_many(mcache_params):
+    client = Client(near_cache=NearCache(ttl=10), **mcache_params)
+    keys = [b"test:key:near_cache:%d" % i for i in range(4)]
+    for key in keys[:3]:
+        await client.set(key, key)
+    await client.delete(keys[3])
+    client.near_cache.invalidate(keys[0])
+
+    with mock.patch.object(
+        client, "_retrieval_command", wraps=client._retrieval_command
+    ) as retrieval_command:
+        values, info = await client.get_many(keys)
+        assert values == {key: key for key in keys[:3]}
+        assert sorted(retrieval_command.call_args[0][0]) == [keys[0], keys[3]]
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_near_cache_write_during_fetch(mcache_params):
+    near_cache = NearCache(ttl=10)
+    client = Client(near_cache=near_cache, **mcache_params)
+    key = b"test:key:near_cache:race"
+    await client.set(key, b"old")
+    near_cache.clear()
+
+    # a fetch which started before a write is not cached
+    results = await asyncio.gather(client.get(key), client.set(key, b"new"))
+    assert results[1] is True
+    assert await client.get(key) == (b"new", {"flags": 0, "cas": None})
+    await client.close()
+
+
+def test_near_cache_expiration():
+    near_cache = NearCache(ttl=10)
+    with mock.patch("aiomemcached.nearcache.time.monotonic", return_value=100):
+        near_cache.update(b"k1", b"v", exptime=5)
+        near_cache.update(b"k2", b"v")
+
+    with mock.patch("aiomemcached.nearcache.time.monotonic", return_value=106):
+        assert near_cache.lookup(b"k1") is None
+        assert near_cache.lookup(b"k2") == (b"v", {"flags": 0, "cas": None})
+
+    with mock.patch("aiomemcached.nearcache.time.monotonic", return_value=111):
+        assert near_cache.lookup(b"k2") is None
+
+    assert near_cache.expirations == 2
+    assert len(near_cache) == 0
+    assert near_cache.bytes == 0
+
+
+def test_near_cache_eviction():
+    near_cache = NearCache(max_bytes=1300)
+    for i in range(4):
+        near_cache.update(b"k%d" % i, b"v" * 100)
+
+    assert near_cache.lookup(b"k0") == (b"v" * 100, {"flags": 0, "cas": None})
+    near_cache.update(b"k4", b"v" * 100)
+
+    # least recently used first
+    assert near_cache.lookup(b"k1") is None
+    assert near_cache.lookup(b"k0") is not None
+    assert near_cache.evictions == 1
+    assert near_cache.bytes <= 1300
+
+    # larger than the whole budget
+    near_cache.update(b"big", b"v" * 1300)
+    assert near_cache.lookup(b"big") is None
@@ -0,0 +1,93 @@
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from aiomemcached.binary import BinaryClient
+from aiomemcached.client import Client
+from aiomemcached.compression import Compressor
+from aiomemcached.serialization import Serializer
+
+VALUE = [{"id": i, "name": "item", "tags": ["a", "b"]} for i in range(1000)]
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_class", [Client, BinaryClient])
+@pytest.mark.parametrize("memoryview_values", [False, True])
+async def test_offload(mcache_params, client_class, memoryview_values):
+    executor = CountingExecutor(max_workers=2)
+    compressor = Compressor(threshold=100)
+    client = client_class(
+        compressor=compressor,
+        serializer=Serializer(),
+        executor=executor,
+        executor_threshold=2048,
+        memoryview_values=memoryview_values,
+        **mcache_params
+    )
+    key, small_key = b"test:key:offload", b"test:key:offload:small"
+    large_size = len(json.dumps(VALUE, separators=(",", ":")))
+
+    # below the threshold, on the loop
+    assert await client.set(small_key, "small")
+    assert await client.get(small_key) == ("small", {"flags": 0, "cas": None})
+    assert executor.submitted == 0
+
+    assert await client.set(key, VALUE)
+    assert executor.submitted == 1
+    assert compressor.stats()["zlib"]["compressions"] == 1
+    assert await client.get(key) == (VALUE, {"flags": 0, "cas": None})
+    assert executor.submitted == 2
+
+    # the values of a multi-key command add up
+    items = {key + b":%d" % i: VALUE[:100] for i in range(20)}
+    assert all((await client.set_many(items)).values())
+    assert executor.submitted == 3
+    values, _ = await client.get_many(list(items) + [small_key])
+    assert values == {**items, small_key: "small"}
+    assert executor.submitted == 4
+
+    buffer = bytearray(large_size)
+    # the bytes, not deserialized
+    assert (await client.get_into(key, buffer))[0] == large_size
+    assert json.loads(bytes(buffer)) == VALUE
+    assert executor.submitted == 5
+
+    await client.close()
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("memoryview_values", [False, True])
+async def test_offload_process_pool(mcache_params, memoryview_values):
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        compressor = Compressor(threshold=100)
+        client = Client(
+            compressor=compressor,
+            serializer=Serializer(),
+            executor=executor,
+            executor_threshold=1024,
+            memoryview_values=memoryview_values,
+            **mcache_params
+        )
+        key = b"test:key:offload:process"
+
+        assert await client.set(key, VALUE)
+        assert await client.get(key) == (VALUE, {"flags": 0, "cas": None})
+        values, _ = await client.get_many([key])
+        assert values == {key: VALUE}
+
+        # the work done in the process is accounted for
+        stats = compressor.stats()["zlib"]
+        assert stats["compressions"] == 1
+        assert stats["decompressions"] == 2
+
+        await client.close()
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from aiomemcached.client import Client
+from aiomemcached.exceptions import ConnectException
+from aiomemcached.pipeline import MemcachedPipeline
+from aiomemcached.pool import MemcachedPool
+
+
+async def read_line(reader):
+    return await reader.readline()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_client(mcache_params):
+    client = Client(pipeline=True, pool_minsize=1, pool_maxsize=1, **mcache_params)
+    keys = [b"test:key:pipeline:%d" % i for i in range(200)]
+
+    results = await asyncio.gather(*[client.set(key, key) for key in keys])
+    assert all(results)
+
+    results = await asyncio.gather(*[client.get(key) for key in keys])
+    assert [value for value, _ in results] == keys
+    assert len(client._pipelines) == 1
+    assert client._pool.size() == 1
+
+    await client.close()
+    assert len(client._pipelines) == 0
+    assert client._pool.size() == 0
+
+
+@pytest.mark.asyncio
+async def test_pipeline_open_new_connection_when_full(mcache_params):
+    client = Client(
+        pipeline=True, pipeline_max_inflight=2, pool_maxsize=3, **mcache_params
+    )
+    await asyncio.gather(*[client.version() for _ in range(20)])
+    assert 1 < len(client._pipelines) <= 3
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_max_inflight(mcache_params):
+    pool = MemcachedPool(**mcache_params)
+    pipeline = MemcachedPipeline(await pool.acquire(), max_inflight=4)
+
+    seen = []
+
+    async def read_version(reader):
+        seen.append(pipeline.inflight())
+        return await reader.readline()
+
+    results = await asyncio.gather(
+        *[pipeline.execute(b"version\r\n", read_version) for _ in range(20)]
+    )
+    assert all(result.startswith(b"VERSION") for result in results)
+    assert max(seen) == 4
+    assert pipeline.inflight() == 0
+
+    pipeline.close()
+    await pool.clear()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_cancelled_waiter_keeps_stream_in_sync(mcache_params):
+    pool = MemcachedPool(**mcache_params)
+    pipeline = MemcachedPipeline(await pool.acquire())
+
+    first = asyncio.ensure_future(pipeline.execute(b"version\r\n", read_line))
+    second = asyncio.ensure_future(pipeline.execute(b"bad_command\r\n", read_line))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == b"ERROR\r\n"
+    assert (await pipeline.execute(b"version\r\n", read_line)).startswith(b"VERSION")
+
+    pipeline.close()
+    await pool.clear()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_read_error_fails_all_waiters(mcache_params):
+    pool = MemcachedPool(**mcache_params)
+    pipeline = MemcachedPipeline(await pool.acquire())
+
+    async def read_broken(reader):
+        await reader.readline()
+        raise ConnectException("broken")
+
+    results = await asyncio.gather(
+        pipeline.execute(b"version\r\n", read_broken),
+        pipeline.execute(b"version\r\n", read_line),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ConnectException) for result in results)
+    assert pipeline.closed
+
+    with pytest.raises(ConnectException):
+        await pipeline.execute(b"version\r\n", read_line)
+
+    pipeline.close()
+    await pool.clear()
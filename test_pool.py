@@ -3,6 +3,7 @@ import asyncio
 import pytest
 from aiomemcached.pool import MemcachedPool, MemcachedConnection
 from aiomemcached.client import acquire
+from aiomemcached.exceptions import TimeoutException
 
 
 @pytest.mark.asyncio
@@ -47,6 +48,26 @@ async def test_pool_clear(mcache_params):
     assert pool.size() == 0
 
 
+@pytest.mark.asyncio
+async def test_pool_clear_wakes_up_waiters(mcache_params):
+    pool = MemcachedPool(minsize=1, maxsize=2, **mcache_params)
+    conns = [await pool.acquire(), await pool.acquire()]
+
+    waiters = [asyncio.ensure_future(pool.acquire()) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    await pool.clear()
+
+    # the slots are free again, two waiters get new connections
+    done, pending = await asyncio.wait(waiters, timeout=1)
+    assert len(done) == 2 and len(pending) == 1
+    assert all(task.result() not in conns for task in done)
+    assert pool.size() == 2
+
+    await pool.release(done.pop().result())
+    assert (await asyncio.wait_for(pending.pop(), 1)) is not None
+    await pool.clear()
+
+
 @pytest.mark.asyncio
 async def test_acquire_dont_create_new_connection_if_have_conn_in_pool(
     mcache_params,
@@ -57,6 +78,7 @@ async def test_acquire_dont_create_new_connection_if_have_conn_in_pool(
     # Add a valid connection
     _conn = await pool._create_new_connection()
     pool._pool.append(_conn)
+    pool._free.append(_conn)
     assert pool.size() == 1
 
     conn = await pool.acquire()
@@ -142,3 +164,91 @@ async def test_bad_connection(mcache_params):
         assert isinstance(conn.writer, asyncio.StreamWriter)
         await pool.release(conn)
     assert pool.size() == 0
+
+
+@pytest.mark.asyncio
+async def test_acquire_wakeup_on_release(mcache_params):
+    pool = MemcachedPool(minsize=1, maxsize=1, **mcache_params)
+    conn = await pool.acquire()
+
+    waiter = asyncio.ensure_future(pool.acquire())
+    await asyncio.sleep(0.01)
+    assert pool.waiters() == 1
+
+    await pool.release(conn)
+    assert await asyncio.wait_for(waiter, 0.1) is conn
+
+    stats = pool.stats.snapshot()
+    assert stats["acquires"] == 2
+    assert stats["waits"] == 1
+    assert 0 < stats["max_wait_time"] < 0.5
+    await pool.clear()
+
+
+@pytest.mark.asyncio
+async def test_acquire_fifo(mcache_params):
+    pool = MemcachedPool(minsize=1, maxsize=1, **mcache_params)
+    conn = await pool.acquire()
+
+    order = []
+
+    async def acquire_release(n):
+        _conn = await pool.acquire()
+        order.append(n)
+        await asyncio.sleep(0)
+        await pool.release(_conn)
+
+    tasks = []
+    for n in range(10):
+        tasks.append(asyncio.ensure_future(acquire_release(n)))
+        await asyncio.sleep(0)
+
+    await pool.release(conn)
+    await asyncio.gather(*tasks)
+    assert order == list(range(10))
+    await pool.clear()
+
+
+@pytest.mark.asyncio
+async def test_acquire_timeout(mcache_params):
+    pool = MemcachedPool(minsize=1, maxsize=1, acquire_timeout=0.05, **mcache_params)
+    conn = await pool.acquire()
+
+    with pytest.raises(TimeoutException):
+        await pool.acquire()
+    assert pool.stats.timeouts == 1
+    assert pool.waiters() == 0
+
+    await pool.release(conn)
+    assert await pool.acquire() is conn
+    await pool.clear()
+
+
+@pytest.mark.asyncio
+async def test_dispose_wakes_up_waiter(mcache_params):
+    pool = MemcachedPool(minsize=1, maxsize=1, **mcache_params)
+    conn = await pool.acquire()
+
+    waiter = asyncio.ensure_future(pool.acquire())
+    await asyncio.sleep(0.01)
+    await pool.dispose(conn)
+
+    new_conn = await asyncio.wait_for(waiter, 1)
+    assert new_conn is not conn
+    assert pool.size() == 1
+    assert pool.stats.disposes == 1
+    assert pool.stats.connects == 2
+    await pool.clear()
+
+
+@pytest.mark.asyncio
+async def test_acquire_skip_closed_free_connection(mcache_params):
+    pool = MemcachedPool(minsize=2, maxsize=2, **mcache_params)
+    conn = await pool.acquire()
+    await pool.release(conn)
+    await conn.close()
+
+    new_conn = await pool.acquire()
+    assert new_conn is not conn
+    assert pool.size() == 1
+    await pool.clear()
@@ -0,0 +1,177 @@
+import io
+import json
+
+import pytest
+
+from aiomemcached.binary import BinaryClient
+from aiomemcached.client import Client
+from aiomemcached.hooks import CommandEvent
+from aiomemcached.replay import (
+    Replayer,
+    TrafficRecord,
+    TrafficRecorder,
+    main,
+    read_records,
+    request_values,
+)
+
+
+def test_request_values():
+    request = (
+        b"set a 0 0 3\r\nabc\r\nget a\r\nms b 2 T0\r\nxy\r\nadd c 1 2 0 noreply\r\n\r\n"
+    )
+    assert [bytes(value) for value in request_values(request)] == [
+        b"abc",
+        b"xy",
+        b"",
+    ]
+    assert request_values(b"get a b\r\n") == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_class", [Client, BinaryClient])
+@pytest.mark.parametrize("record_values", [False, True])
+async def test_record(mcache_params, client_class, record_values):
+    file = io.BytesIO()
+    recorder = TrafficRecorder(file, record_values=record_values)
+    client = client_class(**mcache_params)
+    client.add_hook(recorder)
+    keys = [b"test:replay:%d" % i for i in range(3)]
+
+    await client.set(keys[0], b"abc")
+    await client.get_many(keys)
+    await client.set_many({key: b"x" * 10 for key in keys})
+    await client.delete(keys[2], noreply=True)
+    await client.version()
+    await client.close()
+    recorder.close()
+    assert recorder.records == 5
+
+    file.seek(0)
+    records = list(read_records(file))
+    assert [record.command for record in records] == [
+        "set",
+        "get",
+        "set",
+        "delete",
+        "version",
+    ]
+    assert records[0].keys == keys[:1]
+    assert records[0].value_sizes == [3]
+    assert sorted(records[1].keys) == keys
+    assert records[1].value_sizes == []
+    assert records[2].value_sizes == [10] * 3
+    assert records[3].noreply
+    assert not records[2].noreply
+    assert not any(record.failed for record in records)
+    if record_values:
+        assert records[0].values == [b"abc"]
+        assert records[2].values == [b"x" * 10] * 3
+    else:
+        assert records[0].values is None
+
+    assert all(record.elapsed > 0 for record in records)
+    assert [record.time for record in records] == sorted(
+        record.time for record in records
+    )
+
+
+def test_recorder_max_bytes(tmp_path):
+    path = str(tmp_path / "traffic.log")
+    with TrafficRecorder(path, max_bytes=80) as recorder:
+        assert recorder.size == 13
+        for _ in range(3):
+            recorder.on_complete(_event())
+        assert recorder.records == 1
+        assert recorder.dropped == 2
+        assert recorder.size == 53
+
+    with pytest.raises(ValueError):
+        list(read_records(io.BytesIO(b"not a recording")))
+    with pytest.raises(ValueError):
+        list(read_records(io.BytesIO(open(path, "rb").read() + b"\x00")))
+    assert [record.keys for record in read_records(path)] == [[b"test:replay:0"]]
+
+
+@pytest.mark.asyncio
+async def test_replay(mcache_params):
+    keys = [b"test:replay:%d" % i for i in range(4)]
+    records = [
+        TrafficRecord(0.00, 0.001, "set", keys[:1], [5]),
+        TrafficRecord(0.01, 0.001, "set", keys[1:], [], [b"a", b"b", b"c"]),
+        TrafficRecord(0.02, 0.002, "get", keys[:1], []),
+        TrafficRecord(0.03, 0.002, "get", keys, []),
+        TrafficRecord(0.04, 0.001, "incr", keys[:1], []),
+        TrafficRecord(0.05, 0.001, "delete", keys[3:], [], noreply=True),
+        TrafficRecord(0.06, 0.001, "touch", keys[:1], [], failed=True),
+        TrafficRecord(0.07, 0.001, "version", [], []),
+        TrafficRecord(0.08, 0.001, "mg", keys[1:3], []),
+    ]
+    client = Client(**mcache_params)
+    report = await Replayer(client, records, speed=2).run()
+
+    assert (await client.get(keys[0]))[0] == b"xxxxx"
+    assert (await client.get(keys[1]))[0] == b"a"
+    assert (await client.get(keys[3]))[0] is None
+    await client.close()
+
+    assert 0.04 <= report.elapsed < 1
+    assert report.skipped == {"version": 1}
+    assert report.errors == {"ResponseException": 1}  # incr of b"xxxxx"
+    assert report.timeouts == 0
+    assert report.completed == 6
+    assert report.uncompared == 1  # the touch failed in the recording
+    # every record is accounted for once
+    assert report.completed + report.uncompared + report.timeouts + sum(
+        report.errors.values()
+    ) + sum(report.skipped.values()) == len(records)
+    assert report.original["get"].count == 2
+    assert report.replayed["get"].count == 2
+    assert "touch" not in report.original
+    assert report.lag.count == 8
+
+    result = json.loads(json.dumps(report.as_dict()))
+    assert set(result["commands"]) == {"set", "get", "delete", "mg"}
+    assert result["uncompared"] == 1
+    assert "speed x2" in report.format()
+    assert "1 uncompared" in report.format()
+
+
+@pytest.mark.asyncio
+async def test_replay_recording(mcache_params, tmp_path):
+    path = str(tmp_path / "traffic.log")
+    client = Client(**mcache_params)
+    with TrafficRecorder(path) as recorder:
+        client.add_hook(recorder)
+        for i in range(20):
+            await client.set(b"test:replay:%d" % i, b"x" * i)
+            await client.get(b"test:replay:%d" % i)
+    client.remove_hook(recorder)
+
+    report = await Replayer(client, read_records(path), speed=0, concurrency=4).run()
+    await client.close()
+    assert report.completed == 40
+    assert report.original["set"].count == report.replayed["set"].count == 20
+
+
+def test_main(mcache_params, tmp_path, capsys):
+    path = str(tmp_path / "traffic.log")
+    with open(path, "wb") as file:
+        recorder = TrafficRecorder(file)
+        recorder.on_complete(_event())
+        recorder.close()
+
+    uri = "memcached://{host}:{port}".format(**mcache_params)
+    assert main([path, "--uri", uri, "--speed", "0", "--json"]) == 0
+    result = json.loads(capsys.readouterr().out)
+    assert result["completed"] == 1
+
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "missing.log"), "--uri", uri])
+
+
+def _event():
+    event = CommandEvent("get", [b"test:replay:0"], b"get test:replay:0\r\n", 1.0)
+    event.response_size = 5
+    event.finished = 1.001
+    return event
@@ -0,0 +1,102 @@
+import pytest
+
+from aiomemcached.binary import BinaryClient
+from aiomemcached.client import Client
+from aiomemcached.compression import Compressor
+from aiomemcached.exceptions import ValidationException
+from aiomemcached.serialization import TYPE_FLAGS, Serializer
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+    def __eq__(self, other):
+        return (self.x, self.y) == (other.x, other.y)
+
+
+VALUES = {
+    b"test:key:serialized:bytes": b"bytes",
+    b"test:key:serialized:str": "str é",
+    b"test:key:serialized:int": -42,
+    b"test:key:serialized:json": {"a": [1, 2.5, None, True]},
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_class", [Client, BinaryClient])
+async def test_serializer(mcache_params, client_class):
+    client = client_class(serializer=Serializer(), **mcache_params)
+    plain_client = client_class(**mcache_params)
+
+    for key, value in VALUES.items():
+        assert await client.set(key, value, flags=1)
+        assert await client.get(key) == (value, {"flags": 1, "cas": None})
+
+    assert (await client.gets(b"test:key:serialized:int"))[0] == -42
+    assert await client.get_many(list(VALUES)) == (
+        VALUES,
+        {key: {"flags": 1, "cas": None} for key in VALUES},
+    )
+
+    # ints are stored as digits, incr works on them
+    stored, info = await plain_client.get(b"test:key:serialized:int")
+    assert stored == b"-42" and info["flags"] & TYPE_FLAGS
+    await client.set(b"test:key:serialized:int", 41)
+    assert await client.incr(b"test:key:serialized:int") == 42
+    assert await client.get(b"test:key:serialized:int") == (
+        42,
+        {"flags": 0, "cas": None},
+    )
+
+    assert await client.set_many({b"test:key:serialized:str": "many"})
+    assert (await client.get(b"test:key:serialized:str"))[0] == "many"
+
+    # pickled values are refused unless enabled
+    pickle_client = client_class(
+        serializer=Serializer(use_pickle=True), **mcache_params
+    )
+    assert await pickle_client.set(b"test:key:serialized:pickle", Point(1, 2))
+    assert await pickle_client.get(b"test:key:serialized:pickle") == (
+        Point(1, 2),
+        {"flags": 0, "cas": None},
+    )
+    assert await client.get(b"test:key:serialized:pickle") == (None, {})
+    assert await client.get_many([b"test:key:serialized:pickle"]) == ({}, {})
+
+    with pytest.raises(ValidationException):
+        await client.set(b"test:key:serialized:pickle", Point(1, 2))
+    with pytest.raises(ValidationException):
+        await client.set(b"test:key:serialized:str", "x", flags=1 << 24)
+
+    await client.close()
+    await plain_client.close()
+    await pickle_client.close()
+
+
+@pytest.mark.asyncio
+async def test_serializer_compressed(mcache_params):
+    client = Client(
+        serializer=Serializer(), compressor=Compressor(threshold=10), **mcache_params
+    )
+    key, value = b"test:key:serialized:compressed", {"items": list(range(100))}
+    assert await client.set(key, value, flags=7)
+    assert await client.get(key) == (value, {"flags": 7, "cas": None})
+    assert await client.get_many([key]) == (
+        {key: value},
+        {key: {"flags": 7, "cas": None}},
+    )
+    await client.close()
+
+
+def test_serializer_loads():
+    serializer = Serializer()
+    for value in VALUES.values():
+        assert serializer.loads(*serializer.dumps(value, 0)) == value
+
+    assert serializer.dumps(bytearray(b"x"), 0) == (bytearray(b"x"), 0)
+    assert serializer.loads(memoryview(b"12"), 2 << 24) == 12
+    with pytest.raises(ValueError):
+        serializer.loads(b"\xff", 1 << 24)
+    with pytest.raises(ValueError):
+        serializer.loads(b"x", 15 << 24)
@@ -0,0 +1,104 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from aiomemcached.client import Client
+from aiomemcached.exceptions import ConnectException
+from aiomemcached.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_single_flight_client(mcache_params):
+    client = Client(single_flight=True, **mcache_params)
+    key, value = b"test:key:single_flight", b"hot"
+    await client.set(key, value)
+
+    with mock.patch.object(
+        client, "_execute_raw_cmd", wraps=client._execute_raw_cmd
+    ) as execute:
+        results = await asyncio.gather(*[client.get(key) for _ in range(100)])
+        assert execute.call_count == 1
+        assert all(result == value for result, _ in results)
+
+        results = await asyncio.gather(
+            *[client.gets(key) for _ in range(10)],
+            client.get(b"not:" + key, b"default"),
+        )
+        assert execute.call_count == 3
+        assert results[-1][0] == b"default"
+
+    assert len(client._single_flight) == 0
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cancellation():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b"value"
+
+    tasks = [asyncio.ensure_future(single_flight.do(b"k", slow)) for _ in range(3)]
+    await asyncio.sleep(0)
+    tasks[0].cancel()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1:] == [b"value", b"value"]
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_single_flight_error():
+    single_flight = SingleFlight()
+
+    async def broken():
+        await asyncio.sleep(0)
+        raise ConnectException("broken")
+
+    results = await asyncio.gather(
+        *[single_flight.do(b"k", broken) for _ in range(3)], return_exceptions=True
+    )
+    assert all(isinstance(result, ConnectException) for result in results)
+    assert len(single_flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_forget():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    first = asyncio.ensure_future(single_flight.do(b"k", slow))
+    await asyncio.sleep(0)
+    single_flight.forget(b"k")
+    second = asyncio.ensure_future(single_flight.do(b"k", slow))
+
+    assert await asyncio.gather(first, second) == [2, 2]
+    assert len(single_flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cancel():
+    single_flight = SingleFlight()
+
+    async def forever():
+        await asyncio.Event().wait()
+
+    task = single_flight.start(b"k", forever)
+    caller = asyncio.ensure_future(single_flight.do(b"k", forever))
+    await asyncio.sleep(0)
+
+    await single_flight.cancel()
+    assert task.cancelled()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    assert len(single_flight) == 0
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from aiomemcached.binary import BinaryClient
+from aiomemcached.client import Client
+from aiomemcached.exceptions import TimeoutException
+from aiomemcached.slowlog import SlowLog
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_class", [Client, BinaryClient])
+@pytest.mark.parametrize("buffered_protocol", [False, True])
+async def test_slowlog(mcache_params, client_class, buffered_protocol):
+    slowlog = SlowLog(threshold=0, maxlen=3, max_keys=2, key_length=10)
+    client = client_class(
+        slowlog=slowlog, buffered_protocol=buffered_protocol, **mcache_params
+    )
+    assert client.slowlog is slowlog
+    keys = [b"test:key:slowlog:%d" % i for i in range(3)]
+
+    await client.set(keys[0], b"x" * 100)
+    await client.get_many(keys)
+    entry = slowlog.entries()[-1]
+    assert entry.command == "get"
+    assert entry.key_count == 3
+    assert len(entry.keys) == 2
+    assert all(key == b"test:key:s" for key in entry.keys)
+    assert entry.request_size > 3 * 10
+    assert entry.response_size > 100
+    assert 0 <= entry.pool_wait <= entry.first_byte <= entry.elapsed
+    assert entry.connection.startswith("127.0.0.1:")
+    assert entry.exception is None
+
+    for _ in range(3):
+        await client.delete(keys[0])
+    assert len(slowlog) == 3
+    assert slowlog.total == 5
+    assert [entry.command for entry in slowlog.entries()] == ["delete"] * 3
+
+    dumped = json.loads(json.dumps(slowlog.dump()))
+    assert dumped[0]["keys"] == ["test:key:s"]
+
+    slowlog.clear()
+    slowlog.threshold = 10
+    await client.get(keys[0])
+    assert len(slowlog) == 0
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_slowlog_exception(mcache_params):
+    slowlog = SlowLog(threshold=0)
+    client = Client(
+        slowlog=slowlog, pool_maxsize=1, pool_acquire_timeout=0, **mcache_params
+    )
+    conn = await client._pool.acquire()
+    with pytest.raises(TimeoutException):
+        await client.get(b"test:key:slowlog")
+    await client._pool.release(conn)
+
+    entry = slowlog.entries()[0]
+    assert entry.exception.startswith("TimeoutException")
+    assert entry.connection is None and entry.pool_wait is None
+    await client.close()
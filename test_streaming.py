@@ -0,0 +1,99 @@
+import io
+import os
+
+import pytest
+
+from aiomemcached.binary import BinaryClient
+from aiomemcached.chunking import ChunkManifest
+from aiomemcached.client import Client
+from aiomemcached.exceptions import ResponseException, ValidationException
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_class", [Client, BinaryClient])
+@pytest.mark.parametrize("buffered_protocol", [False, True])
+@pytest.mark.parametrize("pipeline", [False, True])
+async def test_get_stream(mcache_params, client_class, buffered_protocol, pipeline):
+    client = client_class(
+        pool_minsize=1,
+        pool_maxsize=1,
+        buffered_protocol=buffered_protocol,
+        pipeline=pipeline,
+        **mcache_params
+    )
+    if pipeline:
+        # the pipeline holds the only pooled connection
+        await client.get(b"test:key:stream:miss")
+    key, value = b"test:key:stream", os.urandom(100 * 1000)
+    await client.set(key, value, flags=5)
+    await client.delete(b"test:key:stream:miss")
+
+    assert await client.get_stream(b"test:key:stream:miss") is None
+
+    stream = await client.get_stream(key, chunk_size=30 * 1000)
+    assert (stream.length, stream.info) == (len(value), {"flags": 5, "cas": None})
+    chunks = [chunk async for chunk in stream]
+    assert [len(chunk) for chunk in chunks] == [30000, 30000, 30000, 10000]
+    assert b"".join(chunks) == value
+
+    # the connection is back in the pool and in sync, closed with pipeline
+    assert client.pool_stats()["free"] == (0 if pipeline else 1)
+    assert client.pool_stats()["size"] == 1
+    assert await client.get(key) == (value, {"flags": 5, "cas": None})
+
+    file = io.BytesIO()
+    stream = await client.get_stream(key)
+    assert await stream.write_to(file) == len(value)
+    assert file.getvalue() == value
+
+    buffer = bytearray(len(value))
+    stream = await client.get_stream(key)
+    assert await stream.readinto(buffer) == len(value)
+    assert buffer == value
+    with pytest.raises(ValidationException):
+        await (await client.get_stream(key)).readinto(bytearray(10))
+
+    # closed before its end, the connection is disposed of
+    async with await client.get_stream(key, chunk_size=1000) as stream:
+        assert await stream.__anext__() == value[:1000]
+    assert client.pool_stats()["disposes"] == (0 if pipeline else 2)
+    assert await client.get(key) == (value, {"flags": 5, "cas": None})
+
+    with pytest.raises(ValidationException):
+        await client.get_stream(key, chunk_size=0)
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_stream_large_value(mcache_params):
+    client = Client(large_values=True, chunk_size=1000, **mcache_params)
+    plain_client = Client(**mcache_params)
+    key, value = b"test:key:stream:large", os.urandom(5500)
+    await client.set(key, value, flags=1)
+
+    stream = await client.get_stream(key, chunk_size=400)
+    assert (stream.length, stream.info) == (len(value), {"flags": 1, "cas": None})
+    chunks = [chunk async for chunk in stream]
+    assert max(len(chunk) for chunk in chunks) == 400
+    assert b"".join(chunks) == value
+
+    # an evicted chunk
+    manifest_value, _ = await plain_client.get(key)
+    chunk_keys = ChunkManifest.unpack(manifest_value).chunk_keys(key)
+    await plain_client.delete(chunk_keys[2])
+    stream = await client.get_stream(key)
+    with pytest.raises(ResponseException):
+        await stream.write_to(io.BytesIO())
+
+    # a corrupted chunk
+    await client.set(key, value)
+    manifest_value, _ = await plain_client.get(key)
+    chunk_keys = ChunkManifest.unpack(manifest_value).chunk_keys(key)
+    await plain_client.set(chunk_keys[0], b"x" * 1000)
+    stream = await client.get_stream(key)
+    with pytest.raises(ResponseException):
+        await stream.write_to(io.BytesIO())
+
+    await client.close()
+    await plain_client.close()
@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+import pytest
+
+from aiomemcached.client import Client
+from aiomemcached.compression import Compressor
+from aiomemcached.serialization import Serializer
+from aiomemcached.xfetch import pack_envelope, should_recompute, unpack_envelope
+
+
+def test_envelope():
+    envelope = pack_envelope(b"value", 0.25, 1000.5)
+    assert unpack_envelope(envelope) == (0.25, 1000.5, b"value")
+    assert unpack_envelope(memoryview(envelope))[2] == b"value"
+    assert unpack_envelope(b"value") is None
+    assert unpack_envelope(b"\x02" + envelope[1:]) is None
+
+
+def test_should_recompute():
+    expiry = 1000.0
+    assert should_recompute(0.1, expiry, 1, now=expiry)
+    assert not should_recompute(0, expiry, 1, now=expiry - 0.001)
+
+    # P(recompute) = exp(-(expiry - now) / (delta * beta))
+    recomputes = sum(
+        should_recompute(1, expiry, 1, now=expiry - 1) for _ in range(2000)
+    )
+    assert 600 < recomputes < 870  # 1/e: 736
+    recomputes = sum(
+        should_recompute(1, expiry, 2, now=expiry - 1) for _ in range(2000)
+    )
+    assert 1050 < recomputes < 1370  # exp(-0.5): 1213
+    recomputes = sum(
+        should_recompute(1, expiry, 1, now=expiry - 10) for _ in range(2000)
+    )
+    assert recomputes < 10
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"serializer": Serializer(), "compressor": Compressor(threshold=10)},
+        {"large_values": True, "chunk_size": 100},
+    ],
+)
+async def test_get_or_set(mcache_params, options):
+    client = Client(**options, **mcache_params)
+    key = b"test:xfetch:get_or_set"
+    value = b"x" * 300 if not options.get("serializer") else "value " * 50
+    await client.delete(key)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return value
+
+    results = await asyncio.gather(
+        *[client.get_or_set(key, loader, 60, beta=0) for _ in range(5)]
+    )
+    assert results == [value] * 5
+    assert len(calls) == 1
+
+    assert await client.get_or_set(key, loader, 60, beta=0) == value
+    assert len(calls) == 1
+
+    # recomputed ahead of its expiry, with a huge beta
+    assert await client.get_or_set(key, loader, 60, beta=1e9) == value
+    assert len(calls) == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_loader_function(mcache_params):
+    client = Client(**mcache_params)
+    key = b"test:xfetch:function"
+    await client.set(key, b"not an envelope")
+
+    assert await client.get_or_set(key, lambda: b"computed", 60) == b"computed"
+    value, _ = await client.get(key)
+    assert unpack_envelope(value)[2] == b"computed"
+    assert 59 < unpack_envelope(value)[1] - time.time() <= 60
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_expired(mcache_params):
+    client = Client(**mcache_params)
+    key = b"test:xfetch:expired"
+    await client.set(key, pack_envelope(b"old", 0.01, time.time() - 1), exptime=60)
+
+    assert await client.get_or_set(key, lambda: b"new", 60) == b"new"
+    assert await client.get_or_set(key, lambda: b"newer", 60, beta=0) == b"new"
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_stale(mcache_params):
+    client = Client(**mcache_params)
+    key = b"test:xfetch:stale"
+    await client.set(key, pack_envelope(b"old", 0.01, time.time() - 1), exptime=60)
+    refreshed = asyncio.Event()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await refreshed.wait()
+        return b"new"
+
+    # stale: returned while one background task recomputes it
+    for _ in range(3):
+        assert await client.get_or_set(key, loader, 60, stale_ttl=30) == b"old"
+    await asyncio.sleep(0)
+    assert len(calls) == 1
+
+    refreshed.set()
+    for _ in range(10):
+        await asyncio.sleep(0.01)
+        if b"test:xfetch:stale" not in client._recomputes:
+            break
+    assert await client.get_or_set(key, loader, 60, beta=0, stale_ttl=30) == b"new"
+    assert len(calls) == 1
+
+    # a failed background recomputation is dropped
+    await client.set(key, pack_envelope(b"old", 0.01, time.time() - 1), exptime=60)
+
+    async def failing():
+        raise RuntimeError("down")
+
+    assert await client.get_or_set(key, failing, 60, stale_ttl=30) == b"old"
+    await asyncio.sleep(0.01)
+    assert key not in client._recomputes
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_close(mcache_params):
+    client = Client(**mcache_params)
+    key = b"test:xfetch:close"
+    await client.set(key, pack_envelope(b"old", 0.01, time.time() - 1), exptime=60)
+    cancelled = []
+
+    async def loader():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    assert await client.get_or_set(key, loader, 60, stale_ttl=30) == b"old"
+    await asyncio.sleep(0)
+    assert key in client._recomputes
+
+    # the background refresh does not outlive the client
+    await client.close()
+    assert cancelled == [1]
+    assert len(client._recomputes) == 0